@@ -0,0 +1,84 @@
+# message_widget_benchmark.py
+"""MessageWidget construction benchmark.
+
+Builds message bubbles offscreen and paints each one once, the way loading a long chat does, and
+reports the cost per message. Icons are only decoded when first painted, so the paint is timed
+too. Fails (exit code 1) when the median per-message cost exceeds the threshold.
+
+Usage: python benchmarks/message_widget_benchmark.py [--messages 300] [--runs 3] [--threshold-ms 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_THRESHOLD_MS = 5
+
+SAMPLE_MESSAGES = [
+    "How do I read a file line by line in Python?",
+    "Use a `with` block and iterate over the file object:\n\nIt reads **one line at a time**, so large files are fine.",
+    "Thanks! And what about *binary* files?",
+    "Open them with mode `'rb'` and read fixed-size chunks instead of lines.",
+]
+
+
+def build_widgets(count):
+    """Return (construction, first paint) times in seconds for each of count message widgets"""
+    from widgets.message_widget import MessageWidget
+
+    built, painted, widgets = [], [], []
+    for i in range(count):
+        start = time.perf_counter()
+        widget = MessageWidget(SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)], i % 2 == 0)
+        built.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        widget.grab()
+        painted.append(time.perf_counter() - start)
+        widgets.append(widget)
+    for widget in widgets:
+        widget.deleteLater()
+    return built, painted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=300, help="message widgets built per run")
+    parser.add_argument("--runs", type=int, default=3, help="number of runs")
+    parser.add_argument("--threshold-ms", type=float, default=DEFAULT_THRESHOLD_MS,
+                        help="maximum allowed median construction time per message (best of runs)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.chdir(REPO_ROOT)  # Asset paths are relative to the repository root
+    sys.path.insert(0, REPO_ROOT)
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    runs = []
+    for _ in range(args.runs):
+        built, painted = build_widgets(args.messages)
+        app.processEvents()
+        runs.append((built, painted))
+
+    built, painted = runs[0]
+    print(f"First message widget (cold): {built[0] * 1000:.2f} ms to build, {painted[0] * 1000:.2f} ms to paint")
+    medians = []
+    for run, (built, painted) in enumerate(runs, 1):
+        total = [b + p for b, p in zip(built, painted)]
+        medians.append(statistics.median(total) * 1000)
+        print(f"Run {run}: median {statistics.median(built) * 1000:.3f} ms to build + {statistics.median(painted) * 1000:.3f} ms to paint, "
+              f"mean {statistics.mean(total) * 1000:.3f} ms per message ({args.messages} messages)")
+    best = min(medians)
+    print(f"Best median per message: {best:.3f} ms (threshold {args.threshold_ms:.1f} ms)")
+
+    if best > args.threshold_ms:
+        print(f"\nREGRESSION: message widget construction {best:.3f} ms exceeds threshold {args.threshold_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
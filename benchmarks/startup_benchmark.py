@@ -0,0 +1,73 @@
+# startup_benchmark.py
+"""Startup import-time benchmark.
+
+Runs ``python -X importtime -c "import main"`` in a fresh interpreter, reports the slowest
+imports and fails (exit code 1) when the cumulative import time of ``main`` exceeds the
+threshold or when a module that must stay lazy is imported at startup.
+
+Usage: python benchmarks/startup_benchmark.py [--threshold-ms 600] [--runs 3] [--top 15]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_THRESHOLD_MS = 600
+
+# These are imported in the background after the window is shown; importing them from main is a regression
+LAZY_MODULES = ("langchain", "langchain_core", "langchain_community", "GPUtil", "wmi", "numpy")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def run_importtime():
+    """Return {module: (self_us, cumulative_us)} for one cold `import main`."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"`import main` failed:\n{result.stderr[-2000:]}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            timings[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold-ms", type=float, default=DEFAULT_THRESHOLD_MS,
+                        help="maximum allowed cumulative import time of main (best of runs)")
+    parser.add_argument("--runs", type=int, default=3, help="number of cold interpreter runs")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    args = parser.parse_args()
+
+    runs = [run_importtime() for _ in range(args.runs)]
+    best = min(runs, key=lambda timings: timings.get("main", (0, 0))[1])
+    total_ms = best.get("main", (0, 0))[1] / 1000
+
+    print(f"Cumulative import time of main (best of {args.runs}): {total_ms:.1f} ms (threshold {args.threshold_ms:.0f} ms)")
+    print("\nSlowest imports by cumulative time:")
+    for module, (self_us, cumulative_us) in sorted(best.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {self_us / 1000:8.1f} ms self  {module}")
+
+    failures = []
+    eager = sorted(module for module in best if module.split(".")[0] in LAZY_MODULES)
+    if eager:
+        failures.append(f"modules that must be lazy were imported at startup: {', '.join(eager[:10])}")
+    if total_ms > args.threshold_ms:
+        failures.append(f"startup import time {total_ms:.1f} ms exceeds threshold {args.threshold_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"\nREGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# theme_benchmark.py
+"""Theme switch benchmark.
+
+Fills an offscreen chat view with a long transcript, then switches between the light and dark
+theme the way View > Toggle Dark Mode does and reports how long each switch takes, including the
+re-polish and relayout it triggers. Fails (exit code 1) when the median switch exceeds the
+threshold. Settings are only changed in memory; config.json is not written.
+
+Usage: python benchmarks/theme_benchmark.py [--messages 1000] [--switches 6] [--threshold-ms 1500]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_THRESHOLD_MS = 1500
+
+
+def build_transcript(count):
+    """A main window whose scroll area holds count message widgets, shown offscreen"""
+    from PyQt5.QtWidgets import QMainWindow, QScrollArea, QWidget, QVBoxLayout
+    from widgets.message_widget import MessageWidget
+
+    window = QMainWindow()
+    area = QScrollArea()
+    area.setWidgetResizable(True)
+    body = QWidget()
+    layout = QVBoxLayout(body)
+    for i in range(count):
+        layout.addWidget(MessageWidget(f"Message **{i}** with some `inline code` and a [link](https://ollama.com).", i % 2 == 0))
+    area.setWidget(body)
+    window.setCentralWidget(area)
+    window.resize(1000, 800)
+    window.show()
+    return window
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000, help="messages in the transcript")
+    parser.add_argument("--switches", type=int, default=6, help="number of theme switches")
+    parser.add_argument("--threshold-ms", type=float, default=DEFAULT_THRESHOLD_MS,
+                        help="maximum allowed median time per theme switch")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.chdir(REPO_ROOT)  # Stylesheet and asset paths are relative to the repository root
+    sys.path.insert(0, REPO_ROOT)
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+    from handlers.settings_handler import SettingsHandler, SETTINGS
+
+    window = build_transcript(args.messages)
+    settings_handler = SettingsHandler(window)
+    settings_handler.load_stylesheet()
+    app.processEvents()
+
+    timings = []
+    for _ in range(args.switches):
+        SETTINGS['theme'] = 'Light' if SETTINGS['theme'] == 'Dark' else 'Dark'
+        start = time.perf_counter()
+        settings_handler.load_stylesheet()
+        app.processEvents()
+        timings.append(time.perf_counter() - start)
+
+    for switch, seconds in enumerate(timings, 1):
+        print(f"Switch {switch}: {seconds * 1000:.1f} ms")
+    median = statistics.median(timings) * 1000
+    print(f"Median theme switch with {args.messages} messages: {median:.1f} ms (threshold {args.threshold_ms:.0f} ms)")
+
+    if median > args.threshold_ms:
+        print(f"\nREGRESSION: theme switch {median:.1f} ms exceeds threshold {args.threshold_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
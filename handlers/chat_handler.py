@@ -3,14 +3,22 @@ import logging
 import uuid
 import os
 from PyQt5 import QtWidgets
-from PyQt5.QtWidgets import QMessageBox, QFileDialog, QApplication
-from PyQt5.QtCore import Qt, QObject, pyqtSignal, QThread, QEvent
-from langchain.memory import ConversationBufferMemory
-from langchain.callbacks.base import BaseCallbackHandler
-from langchain.schema import HumanMessage, AIMessage
+from PyQt5.QtWidgets import QMessageBox, QFileDialog, QApplication, QLabel, QProgressBar
+from PyQt5.QtCore import Qt, QObject, pyqtSignal, QThread, QEvent, QTimer
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage, AIMessage
 from widgets.message_widget import MessageWidget
 from logger import app_logger
+from handlers.metrics_handler import GenerationMetrics, MetricsHandler, format_metrics_footer
+from handlers.settings_handler import SETTINGS
 from handlers.database_handler import DatabaseHandler
+from handlers.health_monitor import classify_chat_error, SERVER_DOWN
+from handlers.request_queue import RequestQueue, ReplayThread, history_until, MAX_CONCURRENT_REQUESTS
+from handlers.response_cache import ResponseCache, cache_key, replay_chunks
+from handlers.markdown_renderer import content_hash, render_markdown, code_blocks, fully_highlighted
+from handlers.syntax_highlighter import HighlightThread, cached_highlight
+
+DOCUMENT_FILE_FILTER = "Documents (*.txt *.md *.markdown *.rst *.pdf *.csv *.json *.yaml *.yml *.html *.xml);;Code (*.py *.js *.ts *.java *.c *.cpp *.h *.cs *.go *.rs *.rb *.php *.sh *.sql);;All Files (*)"
 
 # Stream Handler for real-time token processing
 class StreamHandler(QObject, BaseCallbackHandler):
@@ -25,26 +33,83 @@ class StreamHandler(QObject, BaseCallbackHandler):
 # Thread for handling chat operations
 class ChatThread(QThread):
     response_ready = pyqtSignal(str)
-    error_occurred = pyqtSignal(str)
+    error_occurred = pyqtSignal(str, str)  # error kind, message
     token_ready = pyqtSignal(str)  # New signal for token updates
+    metrics_ready = pyqtSignal(dict)
     
-    def __init__(self, app, llm, messages):
+    def __init__(self, app, llm, messages, metrics=None, cached_response=None):
         super().__init__()
         self.app = app
         self.llm = llm
         self.messages = messages
+        self.metrics = metrics
+        self.cached_response = cached_response
+        self.cache_key = None
+        self.semantic_cache = None  # Set with semantic_namespace and semantic_query for standalone questions
+        self.semantic_namespace = None
+        self.semantic_query = None
+        self.semantic_vector = None
+        self.semantic_score = None
+        self.context_sources = []  # Retrievers for past messages and attached files, queried with context_query
+        self.context_query = None
+        self.context_db_path = None
+        self.known_uids = set()
+        self.request = None
         self.stream_handler = StreamHandler()
         self.stream_handler.new_token.connect(self.on_new_token)
     
     def run(self):
         try:
             os.environ['no_proxy'] = 'localhost,127.0.0.1'
-            response = self.llm.invoke(self.messages)
+            if self.cached_response is None and self.semantic_cache is not None:
+                self.lookup_semantic_cache()
+            if self.cached_response is not None:
+                # Replay through the same token path a live reply takes
+                for chunk in replay_chunks(self.cached_response):
+                    self.token_ready.emit(chunk)
+                self.response_ready.emit(self.cached_response)
+                return
+            if self.context_sources:
+                self.add_retrieved_context()
+            if self.metrics:
+                self.metrics.start()
+                response = self.llm.invoke(self.messages, config={"callbacks": [self.metrics]})
+                self.metrics.finish(getattr(response, 'response_metadata', None))
+                self.metrics_ready.emit(self.metrics.to_dict())
+            else:
+                response = self.llm.invoke(self.messages)
             self.response_ready.emit(response.content)
+            if self.semantic_vector is not None:
+                self.semantic_cache.add(self.semantic_namespace, self.semantic_query, response.content, self.semantic_vector)
         except Exception as e:
             app_logger.error(f"Error in ChatThread: {str(e)}")
-            error_message = "Oops! We couldn't connect to Ollama on your computer. This might be because of a VPN or proxy. Please try turning off any VPN or proxy you're using, and then try again." if "503" in str(e) else str(e)
-            self.error_occurred.emit(error_message)
+            self.error_occurred.emit(classify_chat_error(e), str(e))
+
+    def add_retrieved_context(self):
+        """Prepend relevant past messages and file excerpts; without them the reply just has less context"""
+        # SQLite connections can't cross threads, so the worker opens one and every source shares it
+        db_handler = DatabaseHandler(self.context_db_path)
+        try:
+            for source in self.context_sources:
+                try:
+                    context = source.context_message(self.context_query, self.known_uids, db_handler)
+                    if context is not None:
+                        self.messages = [context] + list(self.messages)
+                except Exception as e:
+                    app_logger.error(f"Error retrieving context: {str(e)}")
+        finally:
+            db_handler.close()
+
+    def lookup_semantic_cache(self):
+        """Use the stored answer of a paraphrased question; an embedding failure just means a miss"""
+        try:
+            hit = self.semantic_cache.lookup(self.semantic_namespace, self.semantic_query)
+            self.semantic_vector = hit.vector
+            if hit.content is not None:
+                self.cached_response = hit.content
+                self.semantic_score = hit.score
+        except Exception as e:
+            app_logger.error(f"Error querying semantic cache: {str(e)}")
 
     def on_new_token(self, token: str):
         self.token_ready.emit(token)
@@ -56,17 +121,49 @@ class ChatHandler(QObject):
         self.app = app
         self.chat_thread = None
         self.current_ai_message = None
-        self.db_handler = DatabaseHandler()
+        # Opened by the startup pipeline and handed over through attach_database
+        self.db_handler = None
+        self.metrics_handler = None
+        self.response_cache = None
+        self.semantic_cache = None  # Created on first use; it pulls in NumPy
+        self.history_index = None
+        self.history_indexer = None
+        self.search_threads = []
+        self.search_query = None
+        self.ingest_thread = None
+        self.summary_threads = {}  # Rolling summaries being written, by chat id
+        self.highlight_thread = None  # Started when the first code block needs highlighting
+        self.highlight_waiting = {}  # Highlight cache key -> ids of the messages showing that code
         self.current_chat_id = None
+        self.current_ai_message_id = None
+        self.request_queue = None  # Prompts waiting for the server, persisted in SQLite
+        self.current_request = None
+        self.replay_threads = {}  # Background replays for chats that aren't open, by request id
         self.chat_widget = None
         self.chat_layout = None
+        self.message_widgets = {}  # Bubbles of the open chat by message id
+        self.regenerate_uids = set()  # Prompts whose next reply must bypass the caches
         self.stream_handler = StreamHandler()
         self.stream_handler.new_token.connect(self.update_ai_message)
         
         # Initialize UI components
-        self.load_chat_list()
         self.setup_chat_area()
         self.setup_input_field()
+        self.setup_cache_label()
+        self.setup_ingest_progress()
+
+    def attach_database(self, db_handler, chat_list=None):
+        """Take over the database opened in the background and show its chat list"""
+        self.db_handler = db_handler
+        self.metrics_handler = MetricsHandler(self.db_handler)
+        self.request_queue = RequestQueue(self.db_handler)
+        self.response_cache = ResponseCache(self.db_handler, SETTINGS['response_cache_max_mb'])
+        self.load_chat_list(chat_list)
+        if SETTINGS['semantic_search_enabled']:
+            self.start_history_indexer()
+        waiting = len(self.request_queue)
+        if waiting:
+            self.app.ui_handler.add_system_message(f"{waiting} queued message(s) from your last session will be sent once Ollama is ready.")
 
     # UI Setup Methods
     def setup_chat_area(self):
@@ -84,6 +181,51 @@ class ChatHandler(QObject):
         """Configure the input field for message entry"""
         self.app.ui.inputField.setAcceptRichText(False)
 
+    def setup_cache_label(self):
+        """Show response cache hit/miss counters in the top bar while the cache is enabled"""
+        self.cache_label = QLabel()
+        self.cache_label.setObjectName("cacheLabel")
+        self.app.ui.topBarLayout.addWidget(self.cache_label)
+        self.update_cache_label()
+
+    def setup_ingest_progress(self):
+        """Progress bar in the top bar while attached files are being indexed"""
+        self.ingest_progress = QProgressBar()
+        self.ingest_progress.setObjectName("ingestProgress")
+        self.ingest_progress.setMaximumWidth(220)
+        self.ingest_progress.setFormat("Indexing files %v/%m")
+        self.ingest_progress.setVisible(False)
+        self.app.ui.topBarLayout.addWidget(self.ingest_progress)
+
+    def update_cache_label(self):
+        parts = []
+        if SETTINGS['response_cache_enabled'] and self.response_cache is not None:
+            parts.append(self.response_cache.stats_text())
+        if SETTINGS['semantic_cache_enabled'] and self.semantic_cache is not None:
+            parts.append(self.semantic_cache.stats_text())
+        self.cache_label.setVisible(bool(parts))
+        self.cache_label.setText(" · ".join(parts))
+
+    def update_cache_settings(self):
+        """Pick up changed response cache settings"""
+        if self.response_cache is not None:
+            self.response_cache.set_max_mb(SETTINGS['response_cache_max_mb'])
+        if self.semantic_cache is not None:
+            self.semantic_cache.configure(SETTINGS['semantic_cache_threshold'], SETTINGS['semantic_cache_max_entries'], SETTINGS['embedding_model'])
+        elif SETTINGS['semantic_cache_enabled']:
+            self.get_semantic_cache()
+        self.update_cache_label()
+
+    def get_semantic_cache(self):
+        if self.semantic_cache is None and self.db_handler is not None:
+            try:
+                from handlers.semantic_cache import SemanticCache
+                self.semantic_cache = SemanticCache(self.db_handler.db_path, SETTINGS['semantic_cache_threshold'],
+                                                    SETTINGS['semantic_cache_max_entries'], SETTINGS['embedding_model'])
+            except Exception as e:
+                app_logger.error(f"Error opening semantic cache: {str(e)}")
+        return self.semantic_cache
+
     # Message Handling Methods
     def send_message(self):
         """Process and send user message, initiate AI response"""
@@ -101,38 +243,293 @@ class ChatHandler(QObject):
                 QMessageBox.warning(self.app, "Warning", "Model not loaded. Please check your settings and try again.")
                 return
 
-            self.app.memory_handler.memory.chat_memory.add_user_message(user_message)
-            
-            # Prepare and send message to AI
-            formatted_prompt = self.app.prompt_template.format(input=user_message)
-            messages = [HumanMessage(content=formatted_prompt)]
-            messages.extend(self.app.memory_handler.memory.chat_memory.messages)
-            
-            self.chat_thread = ChatThread(self.app, self.app.llm, messages)
-            self.chat_thread.response_ready.connect(self.handle_response)
-            self.chat_thread.error_occurred.connect(self.handle_error)
-            self.chat_thread.token_ready.connect(self.update_ai_message)  # Connect to the new signal
-            self.chat_thread.start()
-            
-            # Prepare UI for AI response
-            ai_message_id = uuid.uuid4().hex
-            self.current_ai_message = MessageWidget("", is_user=False, chat_app=self.app, message_id=ai_message_id)
-            self.add_message_widget(self.current_ai_message)
-            self.scroll_to_bottom()
+            self.submit_prompt(user_message, user_message_id)
         except Exception as e:
             app_logger.error(f"Error sending message: {str(e)}")
             QMessageBox.critical(self.app, "Error", f"Failed to send message: {str(e)}")
 
+    def submit_prompt(self, content, message_id):
+        """Queue a user message that is already in the UI and memory"""
+        # Every prompt goes through the durable queue so none is lost if the server drops mid-reply;
+        # saving first gives the chat an id and keeps the prompt even if the reply never arrives
+        self.save_chat(notify=False)
+        request = self.request_queue.enqueue(self.current_chat_id, content, message_id)
+        self.replay_queue()
+        if self.current_request is None or self.current_request.id != request.id:
+            self.notify_queued()
+
+    def dispatch_message(self, request):
+        """Send a queued user message that is already in the UI and memory to the model"""
+        # Prepare and send message to AI
+        formatted_prompt = self.app.prompt_template.format(input=request.content)
+        messages = [HumanMessage(content=formatted_prompt)]
+        chat_messages = history_until(self.app.memory_handler.store.messages, request.message_uid)
+        prompt_history = self.app.memory_handler.prompt_history(chat_messages)
+        messages.extend(prompt_history)
+        context_sources = [source for source in (
+            self.app.memory_handler.create_retriever(self.history_index, self.db_handler.db_path),
+            self.create_document_retriever(request.chat_id),
+        ) if source is not None]
+
+        # Retrieved context is only known inside the thread, so it can't be part of a cache key;
+        # a regenerated reply has to come from the model, not from the cache
+        regenerate = request.message_uid in self.regenerate_uids
+        self.regenerate_uids.discard(request.message_uid)
+        key, cached_response = None, None
+        if SETTINGS['response_cache_enabled'] and self.response_cache is not None and not context_sources and not regenerate:
+            key = cache_key(self.app.model_handler.llm_options(), messages)
+            cached_response = self.response_cache.get(key)
+            self.update_cache_label()
+        
+        ai_message_id = uuid.uuid4().hex
+        metrics = None
+        if cached_response is None:
+            metrics = GenerationMetrics(ai_message_id, model=SETTINGS['model'], num_ctx=self.app.model_handler.runtime_options()['num_ctx'])
+        self.chat_thread = ChatThread(self.app, self.app.llm, messages, metrics, cached_response)
+        self.chat_thread.cache_key = key
+        if context_sources:
+            self.chat_thread.context_sources = context_sources
+            self.chat_thread.context_query = request.content
+            self.chat_thread.context_db_path = self.db_handler.db_path
+            # Older turns of this chat that fell out of the window can still be retrieved
+            self.chat_thread.known_uids = {message.id for message in prompt_history}
+        # Only opening questions without retrieved context are matched semantically; follow-ups depend on the conversation
+        if (cached_response is None and not context_sources and not regenerate and SETTINGS['semantic_cache_enabled']
+                and len(messages) == 2 and self.get_semantic_cache()):
+            self.chat_thread.semantic_cache = self.semantic_cache
+            self.chat_thread.semantic_namespace = self.semantic_cache.namespace_for(SETTINGS['model'])
+            self.chat_thread.semantic_query = request.content
+        self.chat_thread.response_ready.connect(self.handle_response)
+        self.chat_thread.error_occurred.connect(self.handle_error)
+        self.chat_thread.token_ready.connect(self.update_ai_message)  # Connect to the new signal
+        self.chat_thread.metrics_ready.connect(self.handle_metrics)
+        self.chat_thread.request = request
+        self.current_request = request
+        self.chat_thread.start()
+        if cached_response is None and getattr(self.app, 'resource_sampler', None):
+            self.app.resource_sampler.set_generation(ai_message_id)
+        if cached_response is None and getattr(self.app, 'health_monitor', None):
+            self.app.health_monitor.expect_model(SETTINGS['model'])
+        
+        # Prepare UI for AI response
+        self.current_ai_message_id = ai_message_id
+        self.current_ai_message = MessageWidget("", is_user=False, chat_app=self.app, message_id=ai_message_id)
+        self.add_message_widget(self.current_ai_message)
+        self.scroll_to_bottom()
+
+    def notify_queued(self):
+        waiting = len(self.request_queue)
+        health_monitor = getattr(self.app, 'health_monitor', None)
+        if health_monitor and health_monitor.state == SERVER_DOWN:
+            self.app.ui_handler.add_system_message(f"Ollama is unavailable right now, so I've queued your message ({waiting} waiting). It will be sent automatically once the server is back.")
+        else:
+            self.app.ui_handler.add_system_message(f"Queued your message ({waiting} waiting). I'll send it as soon as I finish the current reply.")
+
+    def replay_queue(self):
+        """Start queued prompts in order: the open chat's in the chat view, other chats' in the background"""
+        if self.request_queue is None or self.app.llm is None:
+            return
+        health_monitor = getattr(self.app, 'health_monitor', None)
+        if health_monitor and health_monitor.state == SERVER_DOWN:
+            return
+        try:
+            foreground_busy = self.chat_thread is not None and self.chat_thread.isRunning()
+            busy_chats = {thread.request.chat_id for thread in self.replay_threads.values()}
+            if foreground_busy:
+                busy_chats.add(self.current_chat_id)
+            slots = MAX_CONCURRENT_REQUESTS - len(self.replay_threads) - int(foreground_busy)
+            for request in self.request_queue.next_batch(busy_chats, max(slots, 0)):
+                self.request_queue.mark_sending(request.id)
+                if request.chat_id == self.current_chat_id:
+                    self.dispatch_message(request)
+                else:
+                    self.start_background_replay(request)
+        except Exception as e:
+            app_logger.error(f"Error replaying queued messages: {str(e)}")
+
+    def start_background_replay(self, request):
+        thread = ReplayThread(request, self.app.model_handler.create_llm(), self.app.prompt_template, self.db_handler.db_path)
+        thread.reply_ready.connect(self.handle_replay_response)
+        thread.error_occurred.connect(self.handle_replay_error)
+        self.replay_threads[request.id] = thread
+        thread.start()
+
+    def handle_replay_response(self, request_id, response, reply_uid):
+        """A queued prompt of another chat was answered; the worker already stored the reply"""
+        request = self.replay_threads.pop(request_id).request
+        if request.chat_id == self.current_chat_id:
+            # The user opened that chat while the reply was on its way. It was stored under its prompt,
+            # so it's only shown if the prompt still ends the shown branch; otherwise it's another branch
+            last_message = self.app.memory_handler.store.last()
+            if last_message is not None and last_message.id == request.message_uid:
+                self.app.ui_handler.add_message(response, is_user=False, message_id=reply_uid)
+            else:
+                self.app.ui_handler.add_system_message("A queued message in this chat has been answered on another branch. Use the ‹ › controls to see it.")
+            self.refresh_branch_controls()
+        else:
+            self.app.ui_handler.add_system_message("A queued message from another chat has been answered. Open it from the chat list to read the reply.")
+        self.update_chat_list()
+        QTimer.singleShot(0, self.replay_queue)
+
+    def handle_replay_error(self, request_id, error_kind, error_message):
+        self.replay_threads.pop(request_id, None)
+        if error_kind == "server_down":
+            self.request_queue.requeue(request_id)
+            health_monitor = getattr(self.app, 'health_monitor', None)
+            if health_monitor:
+                health_monitor.check_now()
+            return
+        self.request_queue.mark_failed(request_id, error_message)
+        self.app.ui_handler.add_system_message(f"A queued message from another chat could not be sent: {error_message}")
+        QTimer.singleShot(0, self.replay_queue)
+
+    def stop_background_work(self, timeout):
+        """Give background replays and indexing a moment to finish on exit; unfinished work is redone on the next start"""
+        if self.history_indexer is not None:
+            self.history_indexer.stop()
+        if self.ingest_thread is not None:
+            self.ingest_thread.stop()
+        if self.highlight_thread is not None:
+            self.highlight_thread.stop()
+        background = list(self.replay_threads.values()) + list(self.summary_threads.values()) + self.search_threads
+        for thread in background + [self.history_indexer, self.ingest_thread, self.highlight_thread]:
+            if thread is not None and not thread.wait(timeout):
+                thread.terminate()
+                thread.wait()
+
+    def start_history_indexer(self):
+        """Embed saved messages in the background so past chats can be searched by meaning"""
+        try:
+            from handlers.history_index import HistoryIndex, HistoryIndexer
+            if self.history_index is None or self.history_index.embedding_model != SETTINGS['embedding_model']:
+                self.history_index = HistoryIndex(self.db_handler.db_path, SETTINGS['embedding_model'])
+            self.history_indexer = HistoryIndexer(self.history_index, self.db_handler.db_path)
+            self.history_indexer.progress.connect(self.on_history_indexed)
+            self.history_indexer.start()
+        except Exception as e:
+            app_logger.error(f"Error starting history indexer: {str(e)}")
+            self.history_indexer = None
+
+    def stop_history_indexer(self):
+        if self.history_indexer is not None:
+            self.history_indexer.stop()
+            self.history_indexer.wait()
+            self.history_indexer = None
+
+    def update_history_index_settings(self):
+        """Start, stop or rebuild the history index after the settings changed"""
+        if self.db_handler is None:
+            return
+        model_changed = self.history_index is not None and self.history_index.embedding_model != SETTINGS['embedding_model']
+        if self.history_indexer is not None and (model_changed or not SETTINGS['semantic_search_enabled']):
+            self.stop_history_indexer()
+        if SETTINGS['semantic_search_enabled'] and self.history_indexer is None:
+            self.start_history_indexer()
+
+    def on_history_indexed(self, indexed, total):
+        app_logger.info(f"Indexed {indexed} messages for semantic search ({total} vectors)")
+
+    # Rolling Summary Methods
+    def schedule_summary(self):
+        """Fold turns that left the memory window into the chat's summary without delaying the next prompt"""
+        chat_id = self.current_chat_id
+        if chat_id is None or chat_id in self.summary_threads:
+            return  # A running summary picks up the remaining turns after the next reply
+        try:
+            pending = self.app.memory_handler.pending_summary(self.app.memory_handler.store.messages)
+            if pending is None:
+                return
+            from handlers.summary_memory import SummaryThread
+            previous_summary, messages = pending
+            thread = SummaryThread(chat_id, previous_summary, messages, self.app.model_handler.create_summary_llm(), self.db_handler.db_path)
+            thread.summary_ready.connect(self.on_summary_ready)
+            thread.finished.connect(lambda: self.summary_threads.pop(chat_id, None))
+            self.summary_threads[chat_id] = thread
+            thread.start()
+        except Exception as e:
+            app_logger.error(f"Error starting chat summary: {str(e)}")
+
+    def on_summary_ready(self, chat_id, summary, covered_uid):
+        # The user may have switched chats meanwhile; the summary is cached for when they come back
+        if chat_id == self.current_chat_id:
+            self.app.memory_handler.apply_summary(summary, covered_uid)
+            app_logger.info(f"Updated rolling summary of chat {chat_id}")
+
+    # Attached Files Methods
+    def attach_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(self.app, "Attach Files", "", DOCUMENT_FILE_FILTER)
+        if paths:
+            self.start_ingestion(paths)
+
+    def attach_folder(self):
+        """Attach every supported file below a folder; attaching it again only re-reads files that changed"""
+        folder = QFileDialog.getExistingDirectory(self.app, "Attach Folder")
+        if folder:
+            self.start_ingestion([folder])
+
+    def start_ingestion(self, paths):
+        """Chunk and embed files into the current chat's document index in the background"""
+        try:
+            if self.ingest_thread is not None and self.ingest_thread.isRunning():
+                self.app.ui_handler.add_system_message("I'm still indexing the previous files. Please attach more once that's done.")
+                return
+            if self.current_chat_id is None:
+                # Files belong to a chat, so an empty one is saved to give them an id
+                name = os.path.basename(os.path.normpath(paths[0]))
+                self.current_chat_id = self.db_handler.save_chat(f"Files: {name}", [])
+                self.update_chat_list()
+            from handlers.document_ingestion import DocumentIngestThread
+            self.ingest_thread = DocumentIngestThread(self.current_chat_id, paths, self.db_handler.db_path, SETTINGS['embedding_model'])
+            self.ingest_thread.progress.connect(self.on_ingest_progress)
+            self.ingest_thread.ingest_finished.connect(self.on_ingest_finished)
+            self.ingest_thread.start()
+        except Exception as e:
+            app_logger.error(f"Error attaching files: {str(e)}")
+            QMessageBox.critical(self.app, "Error", f"Failed to attach files: {str(e)}")
+
+    def on_ingest_progress(self, done, total, path):
+        # A zero range shows a busy indicator while folders are still being listed
+        self.ingest_progress.setRange(0, total)
+        self.ingest_progress.setValue(done)
+        self.ingest_progress.setToolTip(path)
+        self.ingest_progress.setVisible(True)
+
+    def on_ingest_finished(self, summary):
+        self.ingest_progress.setVisible(False)
+        parts = [f"{summary[outcome]} {outcome}" for outcome in ("added", "updated", "unchanged", "removed", "failed") if summary[outcome]]
+        if parts:
+            self.app.ui_handler.add_system_message(f"Finished indexing attached files ({', '.join(parts)}; {summary['chunks']} new chunks). I'll use them to answer questions in this chat.")
+        else:
+            self.app.ui_handler.add_system_message("I couldn't find any supported files to attach (text, Markdown, code or PDF).")
+
+    def create_document_retriever(self, chat_id):
+        """Retriever over the chat's attached files, or None when it has none"""
+        if chat_id is None:
+            return None
+        try:
+            if not self.db_handler.get_document_summary(chat_id)[1]:
+                return None
+            from handlers.document_ingestion import DocumentRetriever
+            return DocumentRetriever(chat_id, self.db_handler.db_path, SETTINGS['embedding_model'],
+                                     SETTINGS['documents_top_k'], SETTINGS['documents_token_budget'])
+        except Exception as e:
+            app_logger.error(f"Error opening attached files: {str(e)}")
+            return None
+
+    def on_server_state_changed(self, state, details):
+        if state != SERVER_DOWN:
+            self.replay_queue()
+
     def update_ai_message(self, token):
         if self.current_ai_message:
-            current_text = self.current_ai_message.text.toPlainText()
-            self.current_ai_message.text.setPlainText(current_text + token)
+            self.current_ai_message.append_markdown(token)
             self.scroll_to_bottom()
 
     def add_message_widget(self, message_widget):
         """Add a message widget to the chat layout"""
         if self.chat_layout is not None:
             self.chat_layout.addWidget(message_widget)
+            self.message_widgets[message_widget.message_id] = message_widget
         else:
             app_logger.error("Chat layout is not initialized")
 
@@ -141,37 +538,321 @@ class ChatHandler(QObject):
         try:
             if self.current_ai_message:
                 # Final update to ensure complete message
-                self.current_ai_message.text.setPlainText(response)
-                self.app.memory_handler.memory.chat_memory.add_ai_message(response)
+                self.current_ai_message.set_markdown(response)
+                self.highlight_code(self.current_ai_message)
+                reply_uid = self.current_ai_message_id
+                if self.chat_thread.semantic_score is not None:
+                    self.current_ai_message.set_footer(f"♻ Answer to a similar earlier question (similarity {self.chat_thread.semantic_score:.2f}) · {SETTINGS['model']}")
+                    if getattr(self.app, 'resource_sampler', None):
+                        self.app.resource_sampler.set_generation(None)
+                elif self.chat_thread.cached_response is not None:
+                    self.current_ai_message.set_footer(f"♻ Cached reply · {SETTINGS['model']}")
+                elif self.chat_thread.cache_key:
+                    self.response_cache.put(self.chat_thread.cache_key, SETTINGS['model'], response)
+                self.app.memory_handler.store.add_message(AIMessage(content=response, id=self.current_ai_message_id))
                 self.current_ai_message = None
+                self.current_ai_message_id = None
                 self.scroll_to_bottom()
                 self.save_chat()
+                self.cache_rendered([(reply_uid, response)])
+                self.schedule_summary()
+                self.update_cache_label()
+            self.finish_current_request()
+            if getattr(self.app, 'health_monitor', None):
+                self.app.health_monitor.clear_expected_model()
+            QTimer.singleShot(0, self.replay_queue)
         except Exception as e:
             app_logger.error(f"Error handling response: {str(e)}")
             QMessageBox.warning(self.app, "Warning", f"Failed to handle response: {str(e)}")
 
-    def handle_error(self, error_message):
+    def handle_metrics(self, metrics):
+        """Persist generation metrics and show them under the AI message"""
+        try:
+            sampler = getattr(self.app, 'resource_sampler', None)
+            if sampler:
+                metrics.update(sampler.summarize(metrics.get("message_id")))
+                sampler.set_generation(None)
+            self.metrics_handler.record(metrics)
+            if self.current_ai_message and self.current_ai_message.message_id == metrics.get("message_id"):
+                self.current_ai_message.set_footer(format_metrics_footer(metrics))
+            app_logger.info(f"Generation metrics: {metrics}")
+        except Exception as e:
+            app_logger.error(f"Error handling generation metrics: {str(e)}")
+
+    def export_metrics(self):
+        """Export stored generation metrics to a CSV file"""
+        try:
+            file_name, _ = QFileDialog.getSaveFileName(self.app, "Export Generation Metrics", "", "CSV Files (*.csv);;All Files (*)")
+            if file_name:
+                count = self.metrics_handler.export_csv(file_name)
+                self.app.ui_handler.add_system_message(f"Exported metrics for {count} generations. Open the CSV in your favourite tool to dig in!")
+        except Exception as e:
+            app_logger.error(f"Error exporting metrics: {str(e)}")
+            QMessageBox.critical(self.app, "Error", f"Failed to export metrics: {str(e)}")
+
+    def handle_error(self, error_kind, error_message):
         """Handle and display error messages"""
-        app_logger.error(f"Error in chat thread: {error_message}")
+        app_logger.error(f"Error in chat thread ({error_kind}): {error_message}")
+        if getattr(self.app, 'resource_sampler', None):
+            self.app.resource_sampler.set_generation(None)
+        health_monitor = getattr(self.app, 'health_monitor', None)
+        if health_monitor:
+            health_monitor.clear_expected_model()
         try:
-            if "404" in error_message and "pull the model" in error_message:
-                model_name = error_message.split("`ollama pull ")[-1].split("`")[0]
+            if error_kind == "model_not_found":
+                model_name = SETTINGS['model']
                 reply = QMessageBox.question(self.app, "Model Not Found", 
                                              f"The model {model_name} is not found. Do you want to pull it?",
                                              QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
                 if reply == QMessageBox.Yes:
                     self.app.model_handler.pull_model(model_name)
+            elif error_kind == "server_down" and health_monitor and not health_monitor.is_up:
+                # The server went away mid-request: keep the prompt and retry once it is back
+                self.discard_current_ai_message()
+                self.finish_current_request(requeue=True)
+                health_monitor.check_now()
+                self.app.ui_handler.add_system_message(f"Lost the connection to Ollama. Your message is queued ({len(self.request_queue)} waiting) and will be resent when the server is back.")
+            elif error_kind == "server_down":
+                QMessageBox.critical(self.app, "Error", "Oops! We couldn't connect to Ollama on your computer. This might be because of a VPN or proxy. Please try turning off any VPN or proxy you're using, and then try again.")
             else:
                 QMessageBox.critical(self.app, "Error", f"{error_message}")
+            if error_kind != "server_down" or health_monitor is None or health_monitor.is_up:
+                self.finish_current_request(error=error_message)
+                QTimer.singleShot(0, self.replay_queue)
         except Exception as e:
             app_logger.error(f"Error handling error message: {str(e)}")
             QMessageBox.critical(self.app, "Critical Error", f"Failed to handle error message: {str(e)}")
 
+    def finish_current_request(self, requeue=False, error=None):
+        """Settle the queue entry of the reply that just ended"""
+        request, self.current_request = self.current_request, None
+        if request is None or self.request_queue is None:
+            return
+        try:
+            if requeue:
+                self.request_queue.requeue(request.id)
+            elif error:
+                self.request_queue.mark_failed(request.id, error)
+            else:
+                self.request_queue.mark_done(request.id)
+        except Exception as e:
+            app_logger.error(f"Error updating queued request {request.id}: {str(e)}")
+
+    def discard_current_ai_message(self):
+        """Remove the placeholder bubble of a reply that never arrived"""
+        if self.current_ai_message:
+            self.chat_layout.removeWidget(self.current_ai_message)
+            self.message_widgets.pop(self.current_ai_message.message_id, None)
+            self.current_ai_message.deleteLater()
+        self.current_ai_message = None
+        self.current_ai_message_id = None
+
+    # Message Editing Methods
+    def edit_message(self, message_id, content):
+        """Apply an edit to memory, the saved chat and the message bubble in one step"""
+        try:
+            if message_id == self.current_ai_message_id:
+                self.app.ui_handler.add_system_message("Please wait for the reply to finish before editing it.")
+                return False
+            record = self.app.memory_handler.store.get(message_id)
+            if record is not None and record.is_user:
+                # An edited prompt is asked again as a new branch; the original stays reachable
+                if self.busy_with_reply():
+                    widget = self.message_widgets.get(message_id)
+                    if widget is not None:
+                        widget.set_markdown(record.content)
+                        self.highlight_code(widget)
+                    return False
+                self.branch_from_edit(message_id, content)
+                return True
+            summary_stale = self.app.memory_handler.summary_covers(message_id)
+            if not self.app.memory_handler.store.edit(message_id, content):
+                app_logger.warning(f"Message {message_id} is not in the current chat")
+                return False
+            widget = self.message_widgets.get(message_id)
+            if widget is not None and not widget.is_editing:
+                widget.set_markdown(content)
+                self.highlight_code(widget)
+            if self.current_chat_id is not None:
+                self.db_handler.update_message(self.current_chat_id, message_id, content)
+            self.after_message_changed(summary_stale)
+            app_logger.info(f"Message {message_id} edited")
+            return True
+        except Exception as e:
+            app_logger.error(f"Error editing message {message_id}: {str(e)}")
+            QMessageBox.critical(self.app, "Error", f"Failed to edit message: {str(e)}")
+            return False
+
+    def delete_message(self, message_id):
+        """Remove a message from memory, the saved chat and the chat view in one step"""
+        try:
+            if message_id == self.current_ai_message_id:
+                self.app.ui_handler.add_system_message("Please wait for the reply to finish before deleting it.")
+                return False
+            summary_stale = self.app.memory_handler.summary_covers(message_id)
+            if not self.app.memory_handler.store.delete(message_id):
+                app_logger.warning(f"Message {message_id} is not in the current chat")
+                return False
+            widget = self.message_widgets.pop(message_id, None)
+            if widget is not None:
+                self.chat_layout.removeWidget(widget)
+                widget.deleteLater()
+            if self.current_chat_id is not None:
+                self.db_handler.delete_message(self.current_chat_id, message_id)
+            self.after_message_changed(summary_stale)
+            app_logger.info(f"Message {message_id} deleted")
+            return True
+        except Exception as e:
+            app_logger.error(f"Error deleting message {message_id}: {str(e)}")
+            QMessageBox.critical(self.app, "Error", f"Failed to delete message: {str(e)}")
+            return False
+
+    def after_message_changed(self, summary_stale):
+        # A summary written from the old text would keep repeating it, so it is rebuilt after the next reply
+        if summary_stale:
+            self.app.memory_handler.apply_summary("", None)
+            if self.current_chat_id is not None:
+                self.db_handler.delete_chat_summary(self.current_chat_id)
+        self.update_chat_list()
+        self.refresh_branch_controls()
+        if self.history_indexer is not None:
+            self.history_indexer.schedule()
+
+    # Branching Methods
+    def busy_with_reply(self):
+        if self.chat_thread is not None and self.chat_thread.isRunning():
+            self.app.ui_handler.add_system_message("Please wait for the current reply to finish first.")
+            return True
+        return False
+
+    def cut_to(self, length):
+        """Drop every message after the first length ones from memory and the chat view"""
+        for message_id in self.app.memory_handler.store.truncate(length):
+            widget = self.message_widgets.pop(message_id, None)
+            if widget is not None:
+                self.chat_layout.removeWidget(widget)
+                widget.deleteLater()
+
+    def regenerate_message(self, message_id):
+        """Ask for a new reply to the prompt before message_id; the old reply stays as another branch"""
+        try:
+            store = self.app.memory_handler.store
+            position = store.index_of(message_id)
+            if not position or store.records[position].is_user or self.busy_with_reply():
+                return
+            prompt = store.records[position - 1]
+            self.cut_to(position)
+            self.regenerate_uids.add(prompt.id)
+            self.submit_prompt(prompt.content, prompt.id)
+        except Exception as e:
+            app_logger.error(f"Error regenerating message {message_id}: {str(e)}")
+            QMessageBox.critical(self.app, "Error", f"Failed to regenerate the reply: {str(e)}")
+
+    def branch_from_edit(self, message_id, content):
+        """Send an edited prompt as a sibling of the original, continuing from the same parent"""
+        self.cut_to(self.app.memory_handler.store.index_of(message_id))
+        new_message_id = uuid.uuid4().hex
+        self.app.ui_handler.add_message(content, is_user=True, message_id=new_message_id)
+        self.submit_prompt(content, new_message_id)
+
+    def switch_branch(self, message_id, step):
+        """Show the previous (-1) or next (+1) version of a message with the newest path below it"""
+        try:
+            store = self.app.memory_handler.store
+            position = store.index_of(message_id)
+            if self.current_chat_id is None or position is None or self.busy_with_reply():
+                return
+            parent_uid = store.records[position - 1].id if position else None
+            siblings = self.db_handler.get_message_children(self.current_chat_id).get(parent_uid, [])
+            if message_id not in siblings:
+                return
+            index = siblings.index(message_id) + step
+            if not 0 <= index < len(siblings):
+                return
+            leaf_uid = self.db_handler.get_branch_leaf(self.current_chat_id, siblings[index])
+            _, path = self.db_handler.load_chat(self.current_chat_id, leaf_uid)
+            # The prefix both branches share stays in memory and on screen; only the tail is swapped
+            self.cut_to(position)
+            self.show_saved_messages(path[position:])
+            self.db_handler.set_active_leaf(self.current_chat_id, leaf_uid)
+            self.refresh_branch_controls()
+        except Exception as e:
+            app_logger.error(f"Error switching branch: {str(e)}")
+            QMessageBox.critical(self.app, "Error", f"Failed to switch branch: {str(e)}")
+
+    def refresh_branch_controls(self):
+        """Show which version of each message is active on messages that have siblings"""
+        if self.current_chat_id is None or self.db_handler is None:
+            return
+        children = self.db_handler.get_message_children(self.current_chat_id)
+        parent_uid = None
+        for record in self.app.memory_handler.store.records:
+            siblings = children.get(parent_uid, [])
+            widget = self.message_widgets.get(record.id)
+            if widget is not None:
+                widget.set_branch_info(siblings.index(record.id) + 1 if record.id in siblings else 1, len(siblings))
+            parent_uid = record.id
+
+    def show_saved_messages(self, messages):
+        """Add saved messages to the chat view and memory, with their generation metrics"""
+        rendered = self.db_handler.get_rendered_html(message.id for message in messages if message.id)
+        misses = []
+        for message in messages:
+            is_user = isinstance(message, HumanMessage)
+            # Reuse the cached render while the text it was made from is unchanged
+            cached = rendered.get(message.id)
+            html = cached[1] if cached is not None and cached[0] == content_hash(message.content) else None
+            if html is None:
+                misses.append((message.id, message.content))
+            message_widget = self.app.ui_handler.add_message(message.content, is_user=is_user, message_id=message.id, add_to_memory=True, html=html)
+            if not is_user and message.id:
+                metrics = self.metrics_handler.get(message.id)
+                if metrics:
+                    message_widget.set_footer(format_metrics_footer(metrics))
+        self.cache_rendered(misses)
+
+    def cache_rendered(self, messages):
+        """Store renders of (uid, markdown) so reopening the chat skips parsing them"""
+        if self.current_chat_id is None:
+            return
+        try:
+            # Renders still waiting for highlighted code are stored once the highlighter is done with them
+            rows = [(uid, content_hash(markdown), render_markdown(markdown)) for uid, markdown in messages
+                    if uid and fully_highlighted(markdown)]
+            if rows:
+                self.db_handler.save_rendered_html(self.current_chat_id, rows)
+        except Exception as e:
+            app_logger.error(f"Error caching rendered messages: {str(e)}")
+
+    def highlight_code(self, message_widget):
+        """Queue a message's code blocks for background highlighting; the bubble is redrawn as they come back"""
+        try:
+            for code, language in code_blocks(message_widget.markdown):
+                if cached_highlight(code, language) is not None:
+                    continue
+                if self.highlight_thread is None:
+                    self.highlight_thread = HighlightThread()
+                    self.highlight_thread.highlighted.connect(self.on_code_highlighted)
+                    self.highlight_thread.start()
+                key = self.highlight_thread.submit(code, language)
+                self.highlight_waiting.setdefault(key, set()).add(message_widget.message_id)
+        except Exception as e:
+            app_logger.error(f"Error queueing code highlighting: {str(e)}")
+
+    def on_code_highlighted(self, key):
+        for message_id in self.highlight_waiting.pop(key, ()):
+            widget = self.message_widgets.get(message_id)
+            # A bubble that is streaming or being edited picks the highlighting up when it is next rendered
+            if widget is None or widget.stream is not None or widget.is_editing or message_id == self.current_ai_message_id:
+                continue
+            widget.set_markdown(widget.markdown)
+            self.cache_rendered([(message_id, widget.markdown)])
+
     # Chat Management Methods
     def new_chat(self):
         """Start a new chat session"""
         try:
-            self.app.memory_handler.memory = ConversationBufferMemory()
+            self.app.memory_handler.reset()
             self.clear_chat()
             self.current_chat_id = None
             self.app.ui_handler.add_system_message("Great! A new chat has been started. You can now begin your conversation.")
@@ -186,7 +867,7 @@ class ChatHandler(QObject):
             file_name, _ = QFileDialog.getSaveFileName(self.app, "Export Chat", "", "Text Files (*.txt);;All Files (*)")
             if file_name:
                 with open(file_name, 'w', encoding='utf-8') as file:
-                    for message in self.app.memory_handler.memory.chat_memory.messages:
+                    for message in self.app.memory_handler.store.messages:
                         role = "User" if isinstance(message, HumanMessage) else "AI"
                         file.write(f"{role}: {message.content}\n")
                 self.app.ui_handler.add_system_message("Your chat has been successfully exported to a file. You can find it in the location you selected.")
@@ -194,21 +875,24 @@ class ChatHandler(QObject):
             app_logger.error(f"Error exporting chat: {str(e)}")
             QMessageBox.critical(self.app, "Error", f"Failed to export chat: {str(e)}")
 
-    def save_chat(self):
+    def save_chat(self, notify=True):
         """Save current chat to database"""
         try:
-            if not self.app.memory_handler.memory.chat_memory.messages:
+            messages = self.app.memory_handler.store.messages
+            if not messages:
                 return
             
-            title = self.app.memory_handler.memory.chat_memory.messages[0].content[:50]  # Use first message as title
-            messages = self.app.memory_handler.memory.chat_memory.messages
-            
-            if self.current_chat_id:
-                self.db_handler.delete_chat(self.current_chat_id)
+            title = messages[0].content[:50]  # Use first message as title
             
-            self.current_chat_id = self.db_handler.save_chat(title, messages)
+            # Update in place: queued requests refer to the chat by id
+            if not (self.current_chat_id and self.db_handler.update_chat(self.current_chat_id, title, messages)):
+                self.current_chat_id = self.db_handler.save_chat(title, messages)
             self.update_chat_list()
-            self.app.ui_handler.add_system_message("Your chat has been saved successfully. You can access it later from the chat list.")
+            self.refresh_branch_controls()
+            if self.history_indexer is not None:
+                self.history_indexer.schedule()
+            if notify:
+                self.app.ui_handler.add_system_message("Your chat has been saved successfully. You can access it later from the chat list.")
         except Exception as e:
             app_logger.error(f"Error saving chat: {str(e)}")
             QMessageBox.critical(self.app, "Error", f"Failed to save chat: {str(e)}")
@@ -221,25 +905,26 @@ class ChatHandler(QObject):
             # Clear existing chat from UI and memory
             self.clear_chat()
             
-            # Add each message to the UI and memory only once
-            seen_messages = set()
-            for message in messages:
-                if message.content not in seen_messages:
-                    is_user = isinstance(message, HumanMessage)
-                    self.app.ui_handler.add_message(message.content, is_user=is_user, add_to_memory=True)
-                    seen_messages.add(message.content)
-            
+            # Only the active branch is shown; the others are reachable from the ‹ › controls
             self.current_chat_id = chat_id
+            self.show_saved_messages(messages)
+            
+            self.refresh_branch_controls()
+            self.app.memory_handler.apply_summary(*(self.db_handler.get_chat_summary(chat_id) or ("", None)))
             self.app.ui_handler.add_system_message(f"The chat '{title}' has been loaded successfully. You can now continue your conversation from where you left off.")
+            files, _ = self.db_handler.get_document_summary(chat_id)
+            if files:
+                self.app.ui_handler.add_system_message(f"This chat has {files} attached file(s); I'll answer from them where they're relevant.")
             self.app.ui.chatListWidget.setCurrentRow(self.get_chat_list_index(chat_id))
         except Exception as e:
             app_logger.error(f"Error loading chat: {str(e)}")
             QMessageBox.critical(self.app, "Error", f"Failed to load chat: {str(e)}")
 
     # Chat List Management Methods
-    def load_chat_list(self):
+    def load_chat_list(self, chat_list=None):
         try:
-            chat_list = self.db_handler.get_chat_list()
+            if chat_list is None:
+                chat_list = self.db_handler.get_chat_list()
             
             self.app.ui.chatListWidget.clear()
             
@@ -291,6 +976,8 @@ class ChatHandler(QObject):
             if reply == QMessageBox.Yes:
                 self.app.ui.chatListWidget.clear()
                 self.db_handler.clear_all_chats()
+                if self.history_indexer is not None:
+                    self.history_indexer.schedule()  # Lets it drop the deleted messages' vectors
                 self.current_chat_id = None
                 self.new_chat()
                 self.app.ui_handler.add_system_message("All your previous chats have been deleted. You're starting with a clean slate!")
@@ -307,10 +994,34 @@ class ChatHandler(QObject):
                 item = QtWidgets.QListWidgetItem(f"{chat[1]} - {chat[2]}")
                 item.setData(Qt.UserRole, chat[0])
                 self.app.ui.chatListWidget.addItem(item)
+            self.search_query = query
+            if query.strip() and self.history_index is not None and self.history_index.count:
+                self.start_semantic_search(query)
         except Exception as e:
             app_logger.error(f"Error searching chats: {str(e)}")
             QMessageBox.critical(self.app, "Error", f"Failed to search chats: {str(e)}")
 
+    def start_semantic_search(self, query):
+        """Look for chats by meaning in the background; keyword hits are already listed"""
+        from handlers.history_index import HistorySearchThread
+        thread = HistorySearchThread(self.history_index, query, self.db_handler.db_path)
+        thread.results_ready.connect(self.show_semantic_results)
+        thread.finished.connect(lambda: self.search_threads.remove(thread))
+        self.search_threads.append(thread)
+        thread.start()
+
+    def show_semantic_results(self, query, results):
+        if query != self.search_query:
+            return  # A newer search replaced this one
+        listed = {self.app.ui.chatListWidget.item(i).data(Qt.UserRole) for i in range(self.app.ui.chatListWidget.count())}
+        for chat_id, title, updated_at, score, snippet in results:
+            if chat_id in listed:
+                continue
+            item = QtWidgets.QListWidgetItem(f"≈ {title} - {updated_at}")
+            item.setData(Qt.UserRole, chat_id)
+            item.setToolTip(f"Similar message ({score:.2f}):\n{snippet}")
+            self.app.ui.chatListWidget.addItem(item)
+
     def delete_chat(self):
         """Delete the selected chat"""
         try:
@@ -322,6 +1033,8 @@ class ChatHandler(QObject):
                                              QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
                 if reply == QMessageBox.Yes:
                     self.db_handler.delete_chat(chat_id)
+                    if self.history_indexer is not None:
+                        self.history_indexer.schedule()  # Lets it drop the deleted messages' vectors
                     self.update_chat_list()
                     if self.current_chat_id == chat_id:
                         self.new_chat()
@@ -349,7 +1062,8 @@ class ChatHandler(QObject):
                     widget = item.widget()
                     if widget:
                         widget.deleteLater()
-            self.app.memory_handler.memory.chat_memory.clear()
+            self.message_widgets.clear()
+            self.app.memory_handler.store.clear()
             self.app.ui_handler.add_system_message("The chat has been cleared. You can start a fresh conversation now!")
         except Exception as e:
             app_logger.error(f"Error clearing chat: {str(e)}")
@@ -358,8 +1072,8 @@ class ChatHandler(QObject):
     def copy_last_message(self):
         """Copy the last message to clipboard"""
         try:
-            if self.app.memory_handler.memory.chat_memory.messages:
-                last_message = self.app.memory_handler.memory.chat_memory.messages[-1]
+            last_message = self.app.memory_handler.store.last()
+            if last_message is not None:
                 clipboard = QApplication.clipboard()
                 clipboard.setText(last_message.content)
                 self.app.ui_handler.add_system_message("The last message has been copied to your clipboard. You can now paste it anywhere you like!")
@@ -1,11 +1,36 @@
 import sqlite3
 import json
-from langchain_core.messages import HumanMessage, AIMessage
+import os
 from logger import app_logger
+
+# Bump whenever create_tables gains a table, column, index or backfill, so existing databases migrate once more
+SCHEMA_VERSION = 2
+
+
 class DatabaseHandler:
-    def __init__(self, db_path='chat_history.db'):
-        self.conn = sqlite3.connect(db_path)
-        self.create_tables()
+    def __init__(self, db_path='chat_history.db', check_same_thread=True):
+        # check_same_thread=False lets a startup worker open the database and hand it to the GUI thread
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+        # Workers open a connection per task; only the first open of a new schema pays for the migration
+        if self._schema_version() < SCHEMA_VERSION:
+            self.migrate()
+
+    def _schema_version(self):
+        return self.conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def migrate(self):
+        """Create missing tables and run the column backfills, then record the schema version."""
+        # The write lock keeps a second thread opening an old database from migrating it at the same time
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self._schema_version() < SCHEMA_VERSION:
+                self.create_tables()
+                self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
 
     def create_tables(self):
         cursor = self.conn.cursor()
@@ -27,32 +52,233 @@ class DatabaseHandler:
                 FOREIGN KEY (chat_id) REFERENCES chats (id)
             )
         ''')
-        self.conn.commit()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS generation_metrics (
+                message_id TEXT PRIMARY KEY,
+                model TEXT,
+                num_ctx INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ttft_ms REAL,
+                total_ms REAL,
+                stream_tokens INTEGER,
+                itl_p50_ms REAL,
+                itl_p90_ms REAL,
+                itl_p99_ms REAL,
+                prompt_eval_count INTEGER,
+                prompt_eval_ms REAL,
+                eval_count INTEGER,
+                eval_ms REAL,
+                load_ms REAL,
+                server_total_ms REAL,
+                tokens_per_second REAL,
+                prompt_tokens_per_second REAL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outbound_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id INTEGER,
+                content TEXT,
+                message_uid TEXT,
+                status TEXT DEFAULT 'pending',
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT,
+                size_bytes INTEGER,
+                hits INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_used_at REAL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache (last_used_at)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS semantic_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT,
+                question TEXT,
+                content TEXT,
+                hits INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_used_at REAL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_semantic_cache_namespace ON semantic_cache (namespace, last_used_at)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS message_vectors (
+                uid TEXT PRIMARY KEY,
+                row INTEGER
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_vectors_row ON message_vectors (row)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chat_documents (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id INTEGER,
+                path TEXT,
+                size INTEGER,
+                mtime REAL,
+                sha256 TEXT,
+                embedding_model TEXT,
+                indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (chat_id, path),
+                FOREIGN KEY (chat_id) REFERENCES chats (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS document_chunks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_id INTEGER,
+                chat_id INTEGER,
+                position INTEGER,
+                content TEXT,
+                vector BLOB,
+                FOREIGN KEY (document_id) REFERENCES chat_documents (id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_document_chunks_chat ON document_chunks (chat_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_document_chunks_document ON document_chunks (document_id)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chat_summaries (
+                chat_id INTEGER PRIMARY KEY,
+                summary TEXT,
+                covered_uid TEXT,
+                model TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (chat_id) REFERENCES chats (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rendered_messages (
+                uid TEXT PRIMARY KEY,
+                chat_id INTEGER,
+                content_hash TEXT,
+                html TEXT,
+                FOREIGN KEY (chat_id) REFERENCES chats (id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_rendered_messages_chat ON rendered_messages (chat_id)')
+        self._add_column_if_missing('messages', 'uid', 'TEXT')
+        # Messages saved before uids existed get one so the history index can refer to them
+        cursor.execute("UPDATE messages SET uid = lower(hex(randomblob(16))) WHERE uid IS NULL")
+        # Retrieval and the history index join their vector rows back to messages by uid
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_uid ON messages (uid)')
+        # Chats are trees of messages; the ones saved as flat lists become a single branch
+        if self._add_column_if_missing('messages', 'parent_uid', 'TEXT'):
+            cursor.execute('''
+                UPDATE messages SET parent_uid = (
+                    SELECT p.uid FROM messages p
+                    WHERE p.chat_id = messages.chat_id AND p.id < messages.id
+                    ORDER BY p.id DESC LIMIT 1
+                )
+            ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_parent ON messages (chat_id, parent_uid)')
+        self._add_column_if_missing('chats', 'active_leaf', 'TEXT')
+        for column in ['cpu_avg_percent', 'cpu_peak_percent', 'ram_peak_percent',
+                       'gpu_avg_percent', 'ollama_cpu_avg_percent', 'ollama_rss_peak_mb']:
+            self._add_column_if_missing('generation_metrics', column, 'REAL')
+
+    def _add_column_if_missing(self, table, column, column_type):
+        cursor = self.conn.cursor()
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+            return True
+        return False
 
     def save_chat(self, title, messages):
         cursor = self.conn.cursor()
-        cursor.execute('INSERT INTO chats (title) VALUES (?)', (title,))
+        cursor.execute('INSERT INTO chats (title, active_leaf) VALUES (?, ?)',
+                       (title, getattr(messages[-1], 'id', None) if messages else None))
         chat_id = cursor.lastrowid
-        for message in messages:
-            cursor.execute('INSERT INTO messages (chat_id, content, is_user) VALUES (?, ?, ?)',
-                           (chat_id, message.content, isinstance(message, HumanMessage)))
+        self._save_path(cursor, chat_id, messages)
         self.conn.commit()
         return chat_id
 
-    def load_chat(self, chat_id):
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT title FROM chats WHERE id = ?', (chat_id,))
-        title = cursor.fetchone()[0]
-        cursor.execute('SELECT DISTINCT content, is_user FROM messages WHERE chat_id = ? ORDER BY timestamp', (chat_id,))
-        messages = []
-        seen = set()
-        for row in cursor.fetchall():
-            content = row[0]
-            if content not in seen:
-                seen.add(content)
-                messages.append(HumanMessage(content=content) if row[1] else AIMessage(content=content))
+    def update_chat(self, chat_id, title, messages):
+        """Save the active path of a chat in place so its id stays stable; returns False if the chat is gone
+
+        Messages of other branches are left alone, so the tree keeps every earlier version.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('UPDATE chats SET title = ?, active_leaf = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                       (title, getattr(messages[-1], 'id', None) if messages else None, chat_id))
+        if cursor.rowcount == 0:
+            return False
+        self._save_path(cursor, chat_id, messages)
+        self.conn.commit()
+        return True
+
+    def _save_path(self, cursor, chat_id, messages):
+        """Insert new messages of a root-to-leaf path and update changed ones, each linked to the one before"""
+        from langchain_core.messages import HumanMessage
+        cursor.execute('SELECT uid, content, parent_uid FROM messages WHERE chat_id = ?', (chat_id,))
+        stored = {uid: (content, parent_uid) for uid, content, parent_uid in cursor.fetchall()}
+        parent_uid = None
+        for message in messages:
+            uid = getattr(message, 'id', None)
+            if uid not in stored:
+                cursor.execute('INSERT INTO messages (chat_id, content, is_user, uid, parent_uid) VALUES (?, ?, ?, ?, ?)',
+                               (chat_id, message.content, isinstance(message, HumanMessage), uid, parent_uid))
+            elif stored[uid] != (message.content, parent_uid):
+                cursor.execute('UPDATE messages SET content = ?, parent_uid = ? WHERE chat_id = ? AND uid = ?',
+                               (message.content, parent_uid, chat_id, uid))
+            parent_uid = uid
+
+    def load_chat(self, chat_id, leaf_uid=None):
+        """Title and messages of the path from the root to leaf_uid, the active leaf by default"""
+        from langchain_core.messages import HumanMessage, AIMessage
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT title, active_leaf FROM chats WHERE id = ?', (chat_id,))
+        title, active_leaf = cursor.fetchone()
+        leaf_uid = leaf_uid or active_leaf
+        if leaf_uid is None:
+            cursor.execute('SELECT uid FROM messages WHERE chat_id = ? ORDER BY id DESC LIMIT 1', (chat_id,))
+            row = cursor.fetchone()
+            leaf_uid = row[0] if row else None
+        cursor.execute('''
+            WITH RECURSIVE path (uid, parent_uid, content, is_user, depth) AS (
+                SELECT uid, parent_uid, content, is_user, 0 FROM messages WHERE chat_id = ? AND uid = ?
+                UNION ALL
+                SELECT m.uid, m.parent_uid, m.content, m.is_user, path.depth + 1
+                FROM messages m JOIN path ON m.uid = path.parent_uid
+                WHERE m.chat_id = ?
+            )
+            SELECT content, is_user, uid FROM path ORDER BY depth DESC
+        ''', (chat_id, leaf_uid, chat_id))
+        messages = [HumanMessage(content=content, id=uid) if is_user else AIMessage(content=content, id=uid)
+                    for content, is_user, uid in cursor.fetchall()]
         return title, messages
 
+    def get_message_children(self, chat_id):
+        """Map each parent uid (None for roots) to its children's uids, oldest first"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT parent_uid, uid FROM messages WHERE chat_id = ? ORDER BY id', (chat_id,))
+        children = {}
+        for parent_uid, uid in cursor.fetchall():
+            children.setdefault(parent_uid, []).append(uid)
+        return children
+
+    def get_branch_leaf(self, chat_id, uid):
+        """Follow the newest child from uid down to a leaf"""
+        cursor = self.conn.cursor()
+        while True:
+            cursor.execute('SELECT uid FROM messages WHERE chat_id = ? AND parent_uid = ? ORDER BY id DESC LIMIT 1', (chat_id, uid))
+            row = cursor.fetchone()
+            if row is None:
+                return uid
+            uid = row[0]
+
+    def set_active_leaf(self, chat_id, uid):
+        cursor = self.conn.cursor()
+        cursor.execute('UPDATE chats SET active_leaf = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?', (uid, chat_id))
+        self.conn.commit()
+
     def get_chat_list(self):
         cursor = self.conn.cursor()
         cursor.execute('SELECT id, title, updated_at FROM chats ORDER BY updated_at DESC')
@@ -71,15 +297,361 @@ class DatabaseHandler:
 
     def delete_chat(self, chat_id):
         cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM message_vectors WHERE uid IN (SELECT uid FROM messages WHERE chat_id = ?)', (chat_id,))
+        cursor.execute('DELETE FROM generation_metrics WHERE message_id IN (SELECT uid FROM messages WHERE chat_id = ?)', (chat_id,))
         cursor.execute('DELETE FROM messages WHERE chat_id = ?', (chat_id,))
+        cursor.execute('DELETE FROM outbound_queue WHERE chat_id = ?', (chat_id,))
+        cursor.execute('DELETE FROM document_chunks WHERE chat_id = ?', (chat_id,))
+        cursor.execute('DELETE FROM chat_documents WHERE chat_id = ?', (chat_id,))
+        cursor.execute('DELETE FROM chat_summaries WHERE chat_id = ?', (chat_id,))
+        cursor.execute('DELETE FROM rendered_messages WHERE chat_id = ?', (chat_id,))
         cursor.execute('DELETE FROM chats WHERE id = ?', (chat_id,))
         self.conn.commit()
 
     def clear_all_chats(self):
         cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM message_vectors')
+        cursor.execute('DELETE FROM generation_metrics')
         cursor.execute('DELETE FROM messages')
+        cursor.execute('DELETE FROM outbound_queue')
+        cursor.execute('DELETE FROM document_chunks')
+        cursor.execute('DELETE FROM chat_documents')
+        cursor.execute('DELETE FROM chat_summaries')
+        cursor.execute('DELETE FROM rendered_messages')
         cursor.execute('DELETE FROM chats')
         self.conn.commit()
 
+    def save_generation_metrics(self, metrics):
+        columns = list(metrics.keys())
+        placeholders = ', '.join('?' for _ in columns)
+        cursor = self.conn.cursor()
+        cursor.execute(f'INSERT OR REPLACE INTO generation_metrics ({", ".join(columns)}) VALUES ({placeholders})',
+                       [metrics[column] for column in columns])
+        self.conn.commit()
+
+    def get_generation_metrics(self, message_id):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT * FROM generation_metrics WHERE message_id = ?', (message_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def get_all_generation_metrics(self):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT * FROM generation_metrics ORDER BY created_at')
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def enqueue_request(self, chat_id, content, message_uid):
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT INTO outbound_queue (chat_id, content, message_uid) VALUES (?, ?, ?)',
+                       (chat_id, content, message_uid))
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def get_queued_requests(self, status='pending'):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id, chat_id, content, message_uid FROM outbound_queue WHERE status = ? ORDER BY id', (status,))
+        return cursor.fetchall()
+
+    def set_request_status(self, request_id, status, error=None):
+        cursor = self.conn.cursor()
+        cursor.execute('UPDATE outbound_queue SET status = ?, error = ? WHERE id = ?', (status, error, request_id))
+        self.conn.commit()
+
+    def reset_sending_requests(self):
+        """Return requests that were in flight when the app last exited to the queue"""
+        cursor = self.conn.cursor()
+        cursor.execute("UPDATE outbound_queue SET status = 'pending' WHERE status = 'sending'")
+        self.conn.commit()
+
+    def delete_request(self, request_id):
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM outbound_queue WHERE id = ?', (request_id,))
+        self.conn.commit()
+
+    def complete_request(self, request_id, chat_id, content, uid, parent_uid=None):
+        """Append a replayed reply to its chat and drop the request in one transaction"""
+        cursor = self.conn.cursor()
+        cursor.execute('UPDATE chats SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (chat_id,))
+        if cursor.rowcount:  # The chat may have been deleted while the request was in flight
+            cursor.execute('INSERT INTO messages (chat_id, content, is_user, uid, parent_uid) VALUES (?, ?, ?, ?, ?)',
+                           (chat_id, content, False, uid, parent_uid))
+            # The reply extends the active branch only if the prompt is still its last message
+            cursor.execute('UPDATE chats SET active_leaf = ? WHERE id = ? AND (active_leaf = ? OR active_leaf IS NULL)',
+                           (uid, chat_id, parent_uid))
+        cursor.execute('DELETE FROM outbound_queue WHERE id = ?', (request_id,))
+        self.conn.commit()
+
+    def get_cached_response(self, key, used_at):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT content FROM response_cache WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        cursor.execute('UPDATE response_cache SET hits = hits + 1, last_used_at = ? WHERE key = ?', (used_at, key))
+        self.conn.commit()
+        return row[0]
+
+    def save_cached_response(self, key, model, content, size_bytes, used_at):
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT OR REPLACE INTO response_cache (key, model, content, size_bytes, last_used_at) VALUES (?, ?, ?, ?, ?)',
+                       (key, model, content, size_bytes, used_at))
+        self.conn.commit()
+
+    def evict_cached_responses(self, max_bytes):
+        """Drop least recently used entries until the cache fits in max_bytes; returns how many were removed"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            DELETE FROM response_cache WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size_bytes) OVER (ORDER BY last_used_at DESC, key) AS running_bytes
+                    FROM response_cache
+                ) WHERE running_bytes > ?
+            )
+        ''', (max_bytes,))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def clear_cached_responses(self):
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM response_cache')
+        self.conn.commit()
+
+    def get_semantic_cache_entry(self, entry_id, used_at):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT content FROM semantic_cache WHERE id = ?', (entry_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        cursor.execute('UPDATE semantic_cache SET hits = hits + 1, last_used_at = ? WHERE id = ?', (used_at, entry_id))
+        self.conn.commit()
+        return row[0]
+
+    def save_semantic_cache_entry(self, namespace, question, content, used_at):
+        cursor = self.conn.cursor()
+        cursor.execute('INSERT INTO semantic_cache (namespace, question, content, last_used_at) VALUES (?, ?, ?, ?)',
+                       (namespace, question, content, used_at))
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def get_stale_semantic_cache_entries(self, namespace, max_entries):
+        """Ids of a namespace's entries beyond the max_entries most recently used"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id FROM semantic_cache WHERE namespace = ? ORDER BY last_used_at DESC, id DESC LIMIT -1 OFFSET ?',
+                       (namespace, max_entries))
+        return [row[0] for row in cursor.fetchall()]
+
+    def delete_semantic_cache_entries(self, entry_ids):
+        cursor = self.conn.cursor()
+        cursor.executemany('DELETE FROM semantic_cache WHERE id = ?', [(entry_id,) for entry_id in entry_ids])
+        self.conn.commit()
+
+    def clear_semantic_cache(self):
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM semantic_cache')
+        self.conn.commit()
+
+    def get_unindexed_messages(self, limit):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT m.uid, m.content FROM messages m
+            LEFT JOIN message_vectors v ON v.uid = m.uid
+            WHERE v.uid IS NULL AND m.uid IS NOT NULL
+            GROUP BY m.uid
+            ORDER BY MIN(m.id)
+            LIMIT ?
+        ''', (limit,))
+        return cursor.fetchall()
+
+    def save_message_vector_rows(self, mapping):
+        cursor = self.conn.cursor()
+        cursor.executemany('INSERT OR REPLACE INTO message_vectors (uid, row) VALUES (?, ?)', mapping)
+        self.conn.commit()
+
+    def delete_message_vectors_from(self, row):
+        """Forget id map entries pointing past the end of the vector file"""
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM message_vectors WHERE row >= ?', (row,))
+        self.conn.commit()
+
+    def clear_message_vectors(self):
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM message_vectors')
+        self.conn.commit()
+
+    def get_live_vector_rows(self):
+        """Vector rows still used by a saved message, in row order"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT v.row FROM message_vectors v
+            JOIN messages m ON m.uid = v.uid
+            WHERE v.row >= 0
+            ORDER BY v.row
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+
+    def renumber_message_vectors(self, live_rows):
+        """Point the id map at a compacted vector file, where live_rows[i] became row i; other rows are forgotten"""
+        cursor = self.conn.cursor()
+        # Through negative placeholders, so a new number never collides with a row not renumbered yet
+        cursor.executemany('UPDATE message_vectors SET row = ? WHERE row = ?', [(-2 - new, old) for new, old in enumerate(live_rows)])
+        cursor.execute('DELETE FROM message_vectors WHERE row >= 0')
+        cursor.execute('UPDATE message_vectors SET row = -2 - row WHERE row <= -2')
+        self.conn.commit()
+
+    def get_messages_for_vector_rows(self, rows):
+        """Map vector rows to (chat_id, title, updated_at, content, is_user, uid) of the messages they were built from"""
+        if not rows:
+            return {}
+        cursor = self.conn.cursor()
+        placeholders = ', '.join('?' for _ in rows)
+        cursor.execute(f'''
+            SELECT v.row, m.chat_id, c.title, c.updated_at, m.content, m.is_user, m.uid
+            FROM message_vectors v
+            JOIN messages m ON m.uid = v.uid
+            JOIN chats c ON c.id = m.chat_id
+            WHERE v.row IN ({placeholders})
+        ''', list(rows))
+        return {row[0]: row[1:] for row in cursor.fetchall()}
+
+    def get_chat_document(self, chat_id, path):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id, size, mtime, sha256, embedding_model FROM chat_documents WHERE chat_id = ? AND path = ?',
+                       (chat_id, path))
+        return cursor.fetchone()
+
+    def touch_chat_document(self, document_id, size, mtime):
+        """Record a new mtime for a file whose content hash did not change"""
+        cursor = self.conn.cursor()
+        cursor.execute('UPDATE chat_documents SET size = ?, mtime = ? WHERE id = ?', (size, mtime, document_id))
+        self.conn.commit()
+
+    def replace_chat_document(self, chat_id, path, size, mtime, sha256, embedding_model, chunks, vectors):
+        """Store a file's chunks and float32 vectors, replacing any earlier version in one transaction"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT INTO chat_documents (chat_id, path, size, mtime, sha256, embedding_model)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (chat_id, path) DO UPDATE SET
+                    size = excluded.size, mtime = excluded.mtime, sha256 = excluded.sha256,
+                    embedding_model = excluded.embedding_model, indexed_at = CURRENT_TIMESTAMP
+            ''', (chat_id, path, size, mtime, sha256, embedding_model))
+            cursor.execute('SELECT id FROM chat_documents WHERE chat_id = ? AND path = ?', (chat_id, path))
+            document_id = cursor.fetchone()[0]
+            cursor.execute('DELETE FROM document_chunks WHERE document_id = ?', (document_id,))
+            cursor.executemany('INSERT INTO document_chunks (document_id, chat_id, position, content, vector) VALUES (?, ?, ?, ?, ?)',
+                               [(document_id, chat_id, position, chunk, vectors[position].tobytes())
+                                for position, chunk in enumerate(chunks)])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def delete_documents_missing_from(self, chat_id, folder, present_paths):
+        """Drop documents under folder that are no longer on disk; returns how many were removed"""
+        present = set(present_paths)
+        prefix = os.path.join(folder, '')  # Trailing separator, so /docs does not match /docs2
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id, path FROM chat_documents WHERE chat_id = ? AND substr(path, 1, ?) = ?',
+                       (chat_id, len(prefix), prefix))
+        missing = [(document_id,) for document_id, path in cursor.fetchall() if path not in present]
+        cursor.executemany('DELETE FROM document_chunks WHERE document_id = ?', missing)
+        cursor.executemany('DELETE FROM chat_documents WHERE id = ?', missing)
+        self.conn.commit()
+        return len(missing)
+
+    def get_document_summary(self, chat_id):
+        """Number of attached files and stored chunks for a chat"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT (SELECT COUNT(*) FROM chat_documents WHERE chat_id = ?),
+                   (SELECT COUNT(*) FROM document_chunks WHERE chat_id = ?)
+        ''', (chat_id, chat_id))
+        return cursor.fetchone()
+
+    def get_document_chunks_version(self, chat_id):
+        """Changes whenever chunks of the chat are added or replaced"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT COUNT(*), MAX(id) FROM document_chunks WHERE chat_id = ?', (chat_id,))
+        return cursor.fetchone()
+
+    def get_document_chunks(self, chat_id, embedding_model):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT d.path, c.position, c.content, c.vector
+            FROM document_chunks c
+            JOIN chat_documents d ON d.id = c.document_id
+            WHERE c.chat_id = ? AND d.embedding_model = ?
+            ORDER BY c.id
+        ''', (chat_id, embedding_model))
+        return cursor.fetchall()
+
+    def update_message(self, chat_id, uid, content):
+        """Change one message's text; its embedding is dropped so the history index picks it up again"""
+        cursor = self.conn.cursor()
+        cursor.execute('UPDATE messages SET content = ? WHERE chat_id = ? AND uid = ?', (content, chat_id, uid))
+        cursor.execute('DELETE FROM message_vectors WHERE uid = ?', (uid,))
+        cursor.execute('UPDATE chats SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (chat_id,))
+        self.conn.commit()
+
+    def delete_message(self, chat_id, uid):
+        """Remove one message; its replies and branches move up to its parent"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE messages SET parent_uid = (SELECT parent_uid FROM messages WHERE chat_id = ? AND uid = ?)
+            WHERE chat_id = ? AND parent_uid = ?
+        ''', (chat_id, uid, chat_id, uid))
+        cursor.execute('''
+            UPDATE chats SET active_leaf = (SELECT parent_uid FROM messages WHERE chat_id = ? AND uid = ?)
+            WHERE id = ? AND active_leaf = ?
+        ''', (chat_id, uid, chat_id, uid))
+        cursor.execute('DELETE FROM messages WHERE chat_id = ? AND uid = ?', (chat_id, uid))
+        cursor.execute('DELETE FROM message_vectors WHERE uid = ?', (uid,))
+        cursor.execute('DELETE FROM generation_metrics WHERE message_id = ?', (uid,))
+        cursor.execute('DELETE FROM rendered_messages WHERE uid = ?', (uid,))
+        cursor.execute('UPDATE chats SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (chat_id,))
+        self.conn.commit()
+
+    def save_chat_summary(self, chat_id, summary, covered_uid, model):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO chat_summaries (chat_id, summary, covered_uid, model, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (chat_id, summary, covered_uid, model))
+        self.conn.commit()
+
+    def delete_chat_summary(self, chat_id):
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM chat_summaries WHERE chat_id = ?', (chat_id,))
+        self.conn.commit()
+
+    def get_chat_summary(self, chat_id):
+        """(summary, covered_uid) of a chat's rolling summary, or None"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT summary, covered_uid FROM chat_summaries WHERE chat_id = ?', (chat_id,))
+        return cursor.fetchone()
+
+    def get_rendered_html(self, uids):
+        """uid -> (content_hash, html) of cached message renders"""
+        cursor = self.conn.cursor()
+        rendered = {}
+        uids = list(uids)
+        for start in range(0, len(uids), 500):  # Stay under SQLite's bound-parameter limit
+            batch = uids[start:start + 500]
+            cursor.execute(f'SELECT uid, content_hash, html FROM rendered_messages WHERE uid IN ({",".join("?" * len(batch))})', batch)
+            rendered.update((uid, (content_hash, html)) for uid, content_hash, html in cursor.fetchall())
+        return rendered
+
+    def save_rendered_html(self, chat_id, rows):
+        """Cache message renders; rows are (uid, content_hash, html)"""
+        cursor = self.conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO rendered_messages (uid, chat_id, content_hash, html) VALUES (?, ?, ?, ?)
+        ''', [(uid, chat_id, content_hash, html) for uid, content_hash, html in rows])
+        self.conn.commit()
+
     def close(self):
         self.conn.close()
\ No newline at end of file
@@ -0,0 +1,259 @@
+# document_ingestion.py
+import hashlib
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from langchain_core.messages import SystemMessage
+from PyQt5.QtCore import QThread, pyqtSignal
+from handlers.database_handler import DatabaseHandler
+from handlers.embeddings import embed_texts, normalize, EMBED_BATCH_SIZE
+from handlers.retrieval_memory import estimate_tokens, CHARS_PER_TOKEN
+from logger import app_logger
+
+TEXT_EXTENSIONS = {
+    ".txt", ".md", ".markdown", ".rst", ".log", ".csv", ".tsv", ".json", ".yaml", ".yml", ".toml", ".ini", ".cfg",
+    ".html", ".htm", ".xml", ".css", ".scss", ".py", ".ipynb", ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".swift",
+    ".c", ".h", ".cpp", ".hpp", ".cs", ".go", ".rs", ".rb", ".php", ".sh", ".ps1", ".bat", ".sql", ".r", ".lua",
+}
+PDF_EXTENSION = ".pdf"
+SKIPPED_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".idea", ".vscode"}
+
+READ_BLOCK_CHARS = 64 * 1024
+HASH_BLOCK_BYTES = 1024 * 1024
+CHUNK_CHARS = 1500
+CHUNK_OVERLAP = 200
+EMBED_WORKERS = 2  # Concurrent /api/embed requests; Ollama queues anything beyond its parallel limit
+MAX_PENDING_BATCHES = 4  # Bounds memory while a large file streams through the pool
+DEFAULT_TOP_K = 6
+DEFAULT_TOKEN_BUDGET = 1024
+MIN_DOCUMENT_SCORE = 0.3
+
+StoredDocument = namedtuple("StoredDocument", ["id", "size", "mtime", "sha256", "embedding_model"])
+
+
+def is_supported(path):
+    extension = os.path.splitext(path)[1].lower()
+    return extension in TEXT_EXTENSIONS or extension == PDF_EXTENSION
+
+
+def collect_files(paths):
+    """Expand files and folders into the supported files below them."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = [name for name in dirs if name not in SKIPPED_DIRS]
+                for name in names:
+                    if is_supported(name):
+                        yield os.path.abspath(os.path.join(root, name))
+        elif os.path.isfile(path) and is_supported(path):
+            yield os.path.abspath(path)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_text_blocks(path):
+    """Yield a file's text in blocks so large files never sit in memory as a whole."""
+    if os.path.splitext(path)[1].lower() == PDF_EXTENSION:
+        yield from _read_pdf_pages(path)
+        return
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_CHARS), ''):
+            yield block
+
+
+def _read_pdf_pages(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("Reading PDF files needs the optional 'pypdf' package")
+    for page in PdfReader(path).pages:
+        yield (page.extract_text() or '') + "\n\n"
+
+
+def _boundary(text, size):
+    """Index to cut at: the last paragraph, line, sentence or word break in the second half of the window."""
+    window = text[:size]
+    for separator in ("\n\n", "\n", ". ", " "):
+        position = window.rfind(separator, size // 2)
+        if position != -1:
+            return position + len(separator)
+    return size
+
+
+def iter_chunks(blocks, size=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """Cut streamed text into overlapping chunks of about size characters."""
+    buffer = ''
+    emitted = False
+    for block in blocks:
+        buffer += block
+        while len(buffer) >= size + overlap:
+            cut = _boundary(buffer, size)
+            chunk = buffer[:cut].strip()
+            if chunk:
+                yield chunk
+                emitted = True
+            buffer = buffer[cut - overlap:]
+    # After the first chunk the buffer always starts with overlap already sent
+    if buffer.strip() and (not emitted or len(buffer) > overlap):
+        yield buffer.strip()
+
+
+class DocumentIngestThread(QThread):
+    """Chunks and embeds files for one chat, skipping files whose size, mtime or content hash are unchanged."""
+    progress = pyqtSignal(int, int, str)  # files done, files found, file being read
+    ingest_finished = pyqtSignal(dict)  # counts per outcome
+
+    def __init__(self, chat_id, paths, db_path='chat_history.db', embedding_model=None, embed_fn=None):
+        super().__init__()
+        self.chat_id = chat_id
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.db_path = db_path
+        self.embedding_model = embedding_model
+        self.embed_fn = embed_fn or (lambda texts: embed_texts(texts, self.embedding_model))
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        summary = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "failed": 0, "chunks": 0}
+        # SQLite connections can't cross threads, so the worker opens its own
+        db_handler = DatabaseHandler(self.db_path)
+        pool = ThreadPoolExecutor(max_workers=EMBED_WORKERS)
+        try:
+            self.progress.emit(0, 0, "")
+            files = sorted(set(collect_files(self.paths)))
+            # Files that disappeared from a re-attached folder are dropped from the index
+            for folder in (path for path in self.paths if os.path.isdir(path)):
+                summary["removed"] += db_handler.delete_documents_missing_from(self.chat_id, folder, files)
+            for done, path in enumerate(files):
+                if self._stop_event.is_set():
+                    break
+                self.progress.emit(done, len(files), path)
+                try:
+                    outcome, chunk_count = self.ingest_file(db_handler, pool, path)
+                    summary[outcome] += 1
+                    summary["chunks"] += chunk_count
+                except Exception as e:
+                    app_logger.error(f"Error ingesting {path}: {str(e)}")
+                    summary["failed"] += 1
+            self.progress.emit(len(files), len(files), "")
+        except Exception as e:
+            app_logger.error(f"Error ingesting documents: {str(e)}")
+            summary["failed"] += 1
+        finally:
+            pool.shutdown(wait=True)
+            db_handler.close()
+            self.ingest_finished.emit(summary)
+
+    def ingest_file(self, db_handler, pool, path):
+        stat = os.stat(path)
+        row = db_handler.get_chat_document(self.chat_id, path)
+        stored = StoredDocument(*row) if row else None
+        same_model = stored is not None and stored.embedding_model == self.embedding_model
+        if same_model and stored.size == stat.st_size and stored.mtime == stat.st_mtime:
+            return "unchanged", 0
+        digest = file_sha256(path)
+        if same_model and stored.sha256 == digest:
+            db_handler.touch_chat_document(stored.id, stat.st_size, stat.st_mtime)
+            return "unchanged", 0
+        # Embed everything before touching the stored chunks, so a failure keeps the previous version searchable
+        chunks, vectors = self.embed_file(pool, path)
+        db_handler.replace_chat_document(self.chat_id, path, stat.st_size, stat.st_mtime, digest,
+                                         self.embedding_model, chunks, vectors)
+        return ("updated" if stored else "added"), len(chunks)
+
+    def embed_file(self, pool, path):
+        chunks, pending, results = [], [], []
+        batch = []
+        for chunk in iter_chunks(read_text_blocks(path)):
+            if self._stop_event.is_set():
+                raise RuntimeError("Ingestion was cancelled")
+            chunks.append(chunk)
+            batch.append(chunk)
+            if len(batch) == EMBED_BATCH_SIZE:
+                pending.append(pool.submit(self.embed_fn, batch))
+                batch = []
+                if len(pending) >= MAX_PENDING_BATCHES:
+                    results.append(pending.pop(0).result())
+        if batch:
+            pending.append(pool.submit(self.embed_fn, batch))
+        results.extend(future.result() for future in pending)
+        vectors = normalize(np.vstack(results)) if results else np.empty((0, 0), dtype=np.float32)
+        return chunks, vectors
+
+
+class DocumentRetriever:
+    """Finds the chunks of a chat's attached files that are most relevant to a prompt."""
+    _cache = {}  # chat_id -> (version, matrix, chunk metadata); shared so repeat questions skip the reload
+    _cache_lock = threading.Lock()
+
+    def __init__(self, chat_id, db_path='chat_history.db', embedding_model=None, top_k=DEFAULT_TOP_K,
+                 token_budget=DEFAULT_TOKEN_BUDGET, embed_fn=None):
+        self.chat_id = chat_id
+        self.db_path = db_path
+        self.embedding_model = embedding_model
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.embed_fn = embed_fn or (lambda texts: embed_texts(texts, self.embedding_model))
+
+    def _load(self, db_handler):
+        version = (self.embedding_model,) + tuple(db_handler.get_document_chunks_version(self.chat_id))
+        with self._cache_lock:
+            cached = self._cache.get(self.chat_id)
+            if cached and cached[0] == version:
+                return cached[1], cached[2]
+        rows = db_handler.get_document_chunks(self.chat_id, self.embedding_model)
+        metadata = [(path, position, content) for path, position, content, _ in rows]
+        matrix = np.vstack([np.frombuffer(vector, dtype=np.float32) for _, _, _, vector in rows]) if rows else None
+        with self._cache_lock:
+            # Only the most recent chat is kept; matrices of large folders are big
+            self._cache.clear()
+            self._cache[self.chat_id] = (version, matrix, metadata)
+        return matrix, metadata
+
+    def retrieve(self, query, db_handler=None):
+        """Return [(path, position, content, score)], best first; db_handler is the calling thread's connection, if it has one."""
+        if db_handler is not None:
+            matrix, metadata = self._load(db_handler)
+        else:
+            db_handler = DatabaseHandler(self.db_path)
+            try:
+                matrix, metadata = self._load(db_handler)
+            finally:
+                db_handler.close()
+        if matrix is None:
+            return []
+        query_vector = normalize(self.embed_fn([query]))[0]
+        if matrix.shape[1] != query_vector.shape[0]:
+            return []
+        scores = matrix @ query_vector
+        top = np.argsort(-scores)[:self.top_k]
+        picked, used = [], 0
+        for index in top:
+            if scores[index] < MIN_DOCUMENT_SCORE or used >= self.token_budget:
+                break
+            path, position, content = metadata[index]
+            remaining = self.token_budget - used
+            if estimate_tokens(content) > remaining:
+                content = content[:remaining * CHARS_PER_TOKEN].rstrip() + "…"
+            used += estimate_tokens(content)
+            picked.append((path, position, content, float(scores[index])))
+        return picked
+
+    def context_message(self, query, exclude_uids=(), db_handler=None):
+        """System message with the best matching excerpts, or None when nothing relevant was found."""
+        picked = self.retrieve(query, db_handler)
+        if not picked:
+            return None
+        app_logger.info(f"Retrieved {len(picked)} document chunks (best score {picked[0][3]:.2f})")
+        excerpts = [f"[{os.path.basename(path)} #{position + 1}]\n{content}" for path, position, content, _ in picked]
+        return SystemMessage(content="Answer using these excerpts from files attached to this chat when they are relevant:\n\n" + "\n\n".join(excerpts))
@@ -0,0 +1,27 @@
+# embeddings.py
+import numpy as np
+from utility import Utility
+
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+EMBED_BATCH_SIZE = 32
+EMBED_TIMEOUT = 60  # The first call loads the embedding model
+
+
+def embed_texts(texts, model=DEFAULT_EMBEDDING_MODEL):
+    """Embed texts with Ollama's /api/embed and return a float32 matrix with one row per text."""
+    rows = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = list(texts[start:start + EMBED_BATCH_SIZE])
+        response = Utility.ollama_request('/api/embed', {"model": model, "input": batch}, timeout=EMBED_TIMEOUT)
+        rows.extend(response.get('embeddings') or [])
+    if len(rows) != len(texts):
+        raise RuntimeError(f"Expected {len(texts)} embeddings from {model}, got {len(rows)}")
+    return np.asarray(rows, dtype=np.float32).reshape(len(texts), -1)
+
+
+def normalize(vectors):
+    """Scale rows to unit length so a dot product is the cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
@@ -0,0 +1,201 @@
+# fit_estimator.py
+from PyQt5.QtCore import QThread, pyqtSignal
+from handlers.hardware_probe import probe_static, probe_volatile
+from handlers.metrics_handler import percentile
+from utility import Utility
+from logger import app_logger
+
+# Approximate bits per weight for the GGUF quantization levels Ollama reports
+QUANT_BITS = {
+    "Q2_K": 3.35, "Q3_K_S": 3.5, "Q3_K_M": 3.9, "Q3_K_L": 4.3,
+    "Q4_0": 4.55, "Q4_1": 5.0, "Q4_K_S": 4.6, "Q4_K_M": 4.85,
+    "Q5_0": 5.5, "Q5_1": 6.0, "Q5_K_S": 5.55, "Q5_K_M": 5.7,
+    "Q6_K": 6.6, "Q8_0": 8.5, "F16": 16.0, "BF16": 16.0, "F32": 32.0,
+}
+DEFAULT_QUANT = "Q4_K_M"
+
+# Memory bandwidth guesses (bytes/s) used until measured generations calibrate them
+DEFAULT_GPU_BANDWIDTH = 250e9
+DEFAULT_CPU_BANDWIDTH = 20e9
+
+RUNTIME_OVERHEAD_BYTES = 300 * 1024**2  # CUDA/Metal context, scratch buffers
+COMPUTE_OVERHEAD_FACTOR = 0.10  # Compute graph grows roughly with the weights
+VRAM_HEADROOM = 0.9  # Leave room for the desktop and other applications
+
+PLACEMENT_RANK = {"GPU": 0, "GPU + CPU": 1, "CPU": 2, "Won't fit": 3}
+
+
+def parse_parameter_size(text):
+    """Turn Ollama's parameter_size (e.g. '7.6B', '360M') into a parameter count."""
+    try:
+        text = text.strip().upper()
+        multiplier = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}.get(text[-1], 1)
+        return float(text.rstrip("KMBT")) * multiplier
+    except (AttributeError, ValueError, IndexError):
+        return None
+
+
+def fetch_model_specs():
+    """Collect size, quantization and architecture facts for every installed model via /api/tags and /api/show."""
+    specs = []
+    for model in Utility.ollama_request('/api/tags').get('models', []):
+        details = model.get('details') or {}
+        spec = {
+            "name": model.get('name'),
+            "file_bytes": model.get('size'),
+            "quantization": (details.get('quantization_level') or '').upper() or None,
+            "parameters": parse_parameter_size(details.get('parameter_size')),
+        }
+        try:
+            info = Utility.ollama_request('/api/show', {"model": spec["name"]}).get('model_info') or {}
+            arch = info.get('general.architecture', '')
+            spec.update({
+                "parameters": info.get('general.parameter_count') or spec["parameters"],
+                "block_count": info.get(f'{arch}.block_count'),
+                "embedding_length": info.get(f'{arch}.embedding_length'),
+                "head_count": info.get(f'{arch}.attention.head_count'),
+                "head_count_kv": info.get(f'{arch}.attention.head_count_kv'),
+                "context_length": info.get(f'{arch}.context_length'),
+            })
+        except Exception as e:
+            app_logger.error(f"Error reading /api/show for {spec['name']}: {str(e)}")
+        specs.append(spec)
+    return specs
+
+
+def weight_bytes(spec):
+    if spec.get("file_bytes"):
+        return float(spec["file_bytes"])
+    bits = QUANT_BITS.get(spec.get("quantization") or DEFAULT_QUANT, QUANT_BITS[DEFAULT_QUANT])
+    return (spec.get("parameters") or 0) * bits / 8
+
+
+def kv_cache_bytes(spec, num_ctx, f16_kv):
+    """K and V per layer: num_ctx × kv_heads × head_dim elements at 2 (f16) or 4 (f32) bytes."""
+    layers = spec.get("block_count")
+    embedding = spec.get("embedding_length")
+    heads = spec.get("head_count")
+    if not (layers and embedding and heads):
+        # Without architecture facts assume ~0.5 MB per token per 7B parameters at f16
+        return (spec.get("parameters") or 0) / 7e9 * 0.5 * 1024**2 * num_ctx * (1 if f16_kv else 2)
+    kv_heads = spec.get("head_count_kv") or heads
+    head_dim = embedding / heads
+    return 2 * layers * num_ctx * kv_heads * head_dim * (2 if f16_kv else 4)
+
+
+def measured_speeds(specs_by_name, metrics_rows):
+    """Median measured tokens/s per installed model."""
+    samples = {}
+    for row in metrics_rows:
+        spec = specs_by_name.get(row.get("model"))
+        if spec and row.get("tokens_per_second"):
+            samples.setdefault(row["model"], []).append(row["tokens_per_second"])
+    return {name: percentile(values, 50) for name, values in samples.items()}
+
+
+def estimate_fits(specs, hardware, num_ctx, f16_kv, metrics_rows=()):
+    """Rank models by how well they fit this host's VRAM/RAM and by expected tokens/s."""
+    vram = hardware.get("vram_available_bytes") or 0
+    ram = hardware.get("ram_available_bytes") or 0
+    specs_by_name = {spec["name"]: spec for spec in specs}
+    measured = measured_speeds(specs_by_name, metrics_rows)
+
+    estimates = []
+    for spec in specs:
+        weights = weight_bytes(spec)
+        kv = kv_cache_bytes(spec, num_ctx, f16_kv)
+        total = weights * (1 + COMPUTE_OVERHEAD_FACTOR) + kv + RUNTIME_OVERHEAD_BYTES
+        estimates.append({
+            "name": spec["name"],
+            "parameters": spec.get("parameters"),
+            "quantization": spec.get("quantization"),
+            "context_length": spec.get("context_length"),
+            "weights_bytes": weights,
+            "kv_cache_bytes": kv,
+            "total_bytes": total,
+            **_placement(total, weights, vram, ram),
+        })
+
+    # Calibrate per-placement bandwidth from models that have real measurements
+    bandwidths = {"GPU": [], "CPU": []}
+    for estimate in estimates:
+        tps = measured.get(estimate["name"])
+        if tps and estimate["placement"] in bandwidths:
+            bandwidths[estimate["placement"]].append(tps * estimate["weights_bytes"])
+    gpu_bw = percentile(bandwidths["GPU"], 50) or DEFAULT_GPU_BANDWIDTH
+    cpu_bw = percentile(bandwidths["CPU"], 50) or DEFAULT_CPU_BANDWIDTH
+
+    for estimate in estimates:
+        if estimate["name"] in measured:
+            estimate["tokens_per_second"] = measured[estimate["name"]]
+            estimate["speed_source"] = "measured"
+        elif estimate["placement"] == "Won't fit":
+            estimate["tokens_per_second"] = None
+            estimate["speed_source"] = "–"
+        else:
+            gpu_part = estimate["weights_bytes"] * estimate["gpu_fraction"]
+            cpu_part = estimate["weights_bytes"] - gpu_part
+            seconds_per_token = gpu_part / gpu_bw + cpu_part / cpu_bw
+            estimate["tokens_per_second"] = 1 / seconds_per_token if seconds_per_token else None
+            estimate["speed_source"] = "calibrated" if bandwidths["GPU"] or bandwidths["CPU"] else "estimated"
+
+    estimates.sort(key=lambda e: (PLACEMENT_RANK[e["placement"]], -(e["tokens_per_second"] or 0)))
+    return estimates
+
+
+def _placement(total, weights, vram, ram):
+    usable_vram = vram * VRAM_HEADROOM
+    if usable_vram and total <= usable_vram:
+        return {"placement": "GPU", "gpu_fraction": 1.0}
+    if usable_vram and total <= usable_vram + ram:
+        # Ollama offloads whole layers, so the GPU share tracks the fraction of weights that fit
+        return {"placement": "GPU + CPU", "gpu_fraction": max(0.0, min(1.0, (usable_vram - RUNTIME_OVERHEAD_BYTES) / weights))}
+    if total <= ram:
+        return {"placement": "CPU", "gpu_fraction": 0.0}
+    return {"placement": "Won't fit", "gpu_fraction": 0.0}
+
+
+def max_parameters(memory_bytes, num_ctx, f16_kv, quantization=DEFAULT_QUANT):
+    """Largest parameter count whose weights, KV cache and overhead fit in memory_bytes."""
+    bytes_per_param = QUANT_BITS[quantization] / 8 * (1 + COMPUTE_OVERHEAD_FACTOR)
+    # KV cache of the fallback formula also scales with parameter count
+    kv_per_param = 0.5 * 1024**2 * num_ctx * (1 if f16_kv else 2) / 7e9
+    usable = memory_bytes - RUNTIME_OVERHEAD_BYTES
+    return max(0.0, usable / (bytes_per_param + kv_per_param))
+
+
+def current_hardware():
+    static = probe_static()
+    volatile = probe_volatile(cpu_interval=None)
+    vram_free = sum(gpu["vram_free_mb"] for gpu in volatile.get("gpus", []))
+    vram_mb = vram_free or static.get("total_vram_mb") or 0
+    return {
+        "vram_available_bytes": vram_mb * 1024**2,
+        "ram_available_bytes": volatile["ram_available"],
+        "ram_total_bytes": static["ram_total"],
+    }
+
+
+class FitEstimatorThread(QThread):
+    estimates_ready = pyqtSignal(list, dict)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, num_ctx, f16_kv, metrics_rows=()):
+        super().__init__()
+        self.num_ctx = num_ctx
+        self.f16_kv = f16_kv
+        self.metrics_rows = list(metrics_rows)
+
+    def run(self):
+        try:
+            hardware = current_hardware()
+            try:
+                specs = fetch_model_specs()
+            except Exception as e:
+                app_logger.error(f"Error listing installed models: {str(e)}")
+                specs = []
+            estimates = estimate_fits(specs, hardware, self.num_ctx, self.f16_kv, self.metrics_rows)
+            self.estimates_ready.emit(estimates, hardware)
+        except Exception as e:
+            app_logger.error(f"Error estimating model fit: {str(e)}")
+            self.error_occurred.emit(str(e))
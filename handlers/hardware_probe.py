@@ -0,0 +1,149 @@
+# hardware_probe.py
+import platform
+import sys
+import threading
+import psutil
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from logger import app_logger
+
+# Static facts (CPU model, core count, total RAM, GPU list) never change during a session
+_STATIC_CACHE = None
+_STATIC_LOCK = threading.Lock()
+
+
+def _cpu_model():
+    try:
+        if sys.platform.startswith('linux'):
+            with open('/proc/cpuinfo', 'r') as f:
+                for line in f:
+                    if line.startswith('model name'):
+                        return line.split(':', 1)[1].strip()
+        return platform.processor() or platform.machine()
+    except Exception as e:
+        app_logger.error(f"Error reading CPU model: {str(e)}")
+        return platform.machine()
+
+
+def _probe_nvidia_gpus():
+    try:
+        import GPUtil
+        return [{"vendor": "NVIDIA", "name": gpu.name, "vram_total_mb": float(gpu.memoryTotal)} for gpu in GPUtil.getGPUs()]
+    except Exception as e:
+        app_logger.error(f"Error retrieving NVIDIA GPU info: {str(e)}")
+        return []
+
+
+def _probe_amd_gpus():
+    # WMI only exists on Windows; importing it elsewhere always fails
+    if not sys.platform.startswith('win'):
+        return []
+    try:
+        import wmi
+        gpus = []
+        for gpu in wmi.WMI().Win32_VideoController(AdapterCompatibility="Advanced Micro Devices, Inc."):
+            vram = int(gpu.AdapterRAM) / (1024**2) if gpu.AdapterRAM else None
+            gpus.append({"vendor": "AMD", "name": gpu.Name, "vram_total_mb": vram})
+        return gpus
+    except Exception as e:
+        app_logger.error(f"Error retrieving AMD GPU info: {str(e)}")
+        return []
+
+
+def probe_static():
+    """Return the session-cached static hardware facts, probing them on first use."""
+    global _STATIC_CACHE
+    with _STATIC_LOCK:
+        if _STATIC_CACHE is None:
+            cpu_freq = None
+            try:
+                cpu_freq = psutil.cpu_freq()
+            except Exception as e:
+                app_logger.error(f"Error reading CPU frequency: {str(e)}")
+            gpus = _probe_nvidia_gpus() + _probe_amd_gpus()
+            _STATIC_CACHE = {
+                "cpu_model": _cpu_model(),
+                "physical_cores": psutil.cpu_count(logical=False),
+                "logical_cores": psutil.cpu_count(logical=True),
+                "cpu_max_mhz": cpu_freq.max if cpu_freq and cpu_freq.max else None,
+                "ram_total": psutil.virtual_memory().total,
+                "gpus": gpus,
+                "total_vram_mb": sum(gpu["vram_total_mb"] or 0 for gpu in gpus),
+            }
+        return _STATIC_CACHE
+
+
+def probe_volatile(cpu_interval=0.5):
+    """Return the current utilisation figures; these are never cached."""
+    memory = psutil.virtual_memory()
+    volatile = {
+        "cpu_percent": psutil.cpu_percent(interval=cpu_interval),
+        "cpu_current_mhz": None,
+        "ram_available": memory.available,
+        "ram_percent": memory.percent,
+        "gpus": [],
+    }
+    try:
+        cpu_freq = psutil.cpu_freq()
+        volatile["cpu_current_mhz"] = cpu_freq.current if cpu_freq else None
+    except Exception:
+        pass
+    try:
+        import GPUtil
+        volatile["gpus"] = [{"name": gpu.name, "vram_free_mb": float(gpu.memoryFree), "load_percent": gpu.load * 100}
+                            for gpu in GPUtil.getGPUs()]
+    except Exception:
+        pass
+    return volatile
+
+
+class HardwareProbeThread(QThread):
+    static_ready = pyqtSignal(dict)
+    volatile_ready = pyqtSignal(dict)
+
+    def __init__(self, include_static=True):
+        super().__init__()
+        self.include_static = include_static
+
+    def run(self):
+        try:
+            if self.include_static:
+                self.static_ready.emit(probe_static())
+            self.volatile_ready.emit(probe_volatile())
+        except Exception as e:
+            app_logger.error(f"Error probing hardware: {str(e)}")
+
+
+class HardwareProbe(QObject):
+    """Session-wide probe service: runs probes off the GUI thread and re-emits their results."""
+    static_ready = pyqtSignal(dict)
+    volatile_ready = pyqtSignal(dict)
+
+    def __init__(self):
+        super().__init__()
+        self.thread = None
+
+    @property
+    def static_info(self):
+        return _STATIC_CACHE
+
+    def refresh(self, include_static=True):
+        # Static facts come straight from the cache once known; only volatile metrics are re-probed
+        if include_static and _STATIC_CACHE is not None:
+            self.static_ready.emit(_STATIC_CACHE)
+            include_static = False
+        if self.thread is not None and self.thread.isRunning():
+            return
+        self.thread = HardwareProbeThread(include_static)
+        self.thread.static_ready.connect(self.static_ready.emit)
+        self.thread.volatile_ready.connect(self.volatile_ready.emit)
+        self.thread.start()
+
+
+_PROBE = None
+
+
+def get_hardware_probe():
+    global _PROBE
+    if _PROBE is None:
+        _PROBE = HardwareProbe()
+    return _PROBE
@@ -0,0 +1,107 @@
+# health_monitor.py
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+from utility import Utility
+from logger import app_logger
+
+SERVER_UP = "up"
+SERVER_LOADING = "loading"  # Server answers but the requested model is not resident yet
+SERVER_DOWN = "down"
+
+POLL_INTERVAL_UP = 5.0
+POLL_INTERVAL_LOADING = 1.0
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 30.0
+REQUEST_TIMEOUT = 2
+
+
+def tagged_model_name(name):
+    """Ollama reports loaded models with their tag, so a bare name means :latest"""
+    return name if ':' in name else f"{name}:latest"
+
+
+class HealthMonitor(QThread):
+    """Polls the Ollama /api/version and /api/ps endpoints, backing off exponentially while the server is down."""
+    state_changed = pyqtSignal(str, dict)
+
+    def __init__(self):
+        super().__init__()
+        self.state = None
+        self.details = {}
+        self.expected_model = None
+        self._backoff = BACKOFF_INITIAL
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def expect_model(self, model):
+        """Report 'loading' until model shows up in /api/ps (set while a request or warm-up is pending)."""
+        self.expected_model = model
+        self.check_now()
+
+    def clear_expected_model(self):
+        self.expected_model = None
+
+    def check_now(self):
+        self._backoff = BACKOFF_INITIAL
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    @property
+    def is_up(self):
+        return self.state in (SERVER_UP, SERVER_LOADING)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            state, details = self.poll()
+            if state != self.state or details != self.details:
+                self.state, self.details = state, details
+                app_logger.info(f"Ollama health: {state} {details}")
+                self.state_changed.emit(state, details)
+            self._wake_event.wait(self.next_interval(state))
+            self._wake_event.clear()
+
+    def next_interval(self, state):
+        if state == SERVER_DOWN:
+            interval = self._backoff
+            self._backoff = min(self._backoff * 2, BACKOFF_MAX)
+            return interval
+        self._backoff = BACKOFF_INITIAL
+        return POLL_INTERVAL_LOADING if state == SERVER_LOADING else POLL_INTERVAL_UP
+
+    def poll(self):
+        try:
+            version = Utility.ollama_request('/api/version', timeout=REQUEST_TIMEOUT).get('version')
+        except Exception as e:
+            return SERVER_DOWN, {"error": str(e), "retry_in": self._backoff}
+        loaded = []
+        try:
+            loaded = [model.get('name') for model in Utility.ollama_request('/api/ps', timeout=REQUEST_TIMEOUT).get('models', [])]
+        except Exception as e:
+            app_logger.error(f"Error reading /api/ps: {str(e)}")
+        details = {"version": version, "loaded_models": loaded}
+        loaded_names = {tagged_model_name(name) for name in loaded if name}
+        if self.expected_model and tagged_model_name(self.expected_model) not in loaded_names:
+            return SERVER_LOADING, dict(details, loading_model=self.expected_model)
+        return SERVER_UP, details
+
+
+def classify_chat_error(error):
+    """Map an exception from ChatOllama to 'model_not_found', 'server_down' or 'error' without parsing its text."""
+    try:
+        from langchain_community.llms.ollama import OllamaEndpointNotFoundError
+        if isinstance(error, OllamaEndpointNotFoundError):
+            return "model_not_found"
+    except ImportError:
+        pass
+    try:
+        import requests
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return "server_down"
+    except ImportError:
+        pass
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return "server_down"
+    return "error"
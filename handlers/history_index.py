@@ -0,0 +1,259 @@
+# history_index.py
+import json
+import os
+import threading
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+from handlers.database_handler import DatabaseHandler
+from handlers.embeddings import embed_texts, normalize, DEFAULT_EMBEDDING_MODEL
+from logger import app_logger
+
+INDEX_BATCH_SIZE = 64  # Messages embedded per pass of the indexer
+EMBED_MAX_CHARS = 4000  # Long messages are embedded by their beginning
+SEARCH_BLOCK_ROWS = 8192  # Rows scored per NumPy dot product
+SEARCH_TOP_K = 50
+MIN_SEARCH_SCORE = 0.5
+RETRY_INITIAL = 5.0
+RETRY_MAX = 300.0
+SKIPPED_ROW = -1  # Id map entry for messages with nothing to embed
+COMPACT_DEAD_SHARE = 0.25  # The vector file is rewritten once this share of its rows belongs to deleted messages
+COMPACT_MIN_ROWS = 256  # Smaller files are only compacted when nothing in them is used any more
+
+
+class HistoryIndex:
+    """Append-only float32 matrix of message embeddings in a memory-mapped file.
+
+    Row numbers map to message uids through the message_vectors table; meta.json records how
+    many rows are valid, so a write interrupted before the metadata update is simply ignored.
+    Rows of deleted messages stay in the file until compact() rewrites it without them.
+    """
+
+    def __init__(self, db_path='chat_history.db', embedding_model=DEFAULT_EMBEDDING_MODEL):
+        self.index_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'history_index')
+        self.vectors_path = os.path.join(self.index_dir, 'vectors.f32')
+        self.compact_path = f"{self.vectors_path}.compact"
+        self.meta_path = os.path.join(self.index_dir, 'meta.json')
+        self.lock = threading.Lock()
+        self._matrix = None
+        self.meta = self._load_meta()
+        if os.path.exists(self.compact_path):
+            # A compaction was interrupted, so the id map may not match the file; index everything again
+            app_logger.warning("Interrupted history index compaction; rebuilding the index")
+            os.remove(self.compact_path)
+            self.reset(embedding_model)
+        elif self.meta.get('embedding_model') != embedding_model:
+            self.reset(embedding_model)
+
+    def _load_meta(self):
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            # Drop rows appended after the last metadata update
+            expected = meta['count'] * meta['dim'] * 4
+            if os.path.getsize(self.vectors_path) > expected:
+                with open(self.vectors_path, 'r+b') as f:
+                    f.truncate(expected)
+            return meta
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save_meta(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        temp_path = f"{self.meta_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(temp_path, self.meta_path)
+
+    @property
+    def count(self):
+        return self.meta.get('count', 0)
+
+    @property
+    def embedding_model(self):
+        return self.meta.get('embedding_model')
+
+    def reset(self, embedding_model):
+        """Start over, e.g. after the embedding model changed; the caller clears the id map."""
+        with self.lock:
+            self._matrix = None
+            os.makedirs(self.index_dir, exist_ok=True)
+            open(self.vectors_path, 'wb').close()
+            self.meta = {"embedding_model": embedding_model, "dim": 0, "count": 0}
+            self._save_meta()
+
+    def append(self, vectors):
+        """Append unit-length rows and return the row number of the first one."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self.lock:
+            if self.meta.get('dim') and vectors.shape[1] != self.meta['dim']:
+                raise ValueError(f"Embedding size changed from {self.meta['dim']} to {vectors.shape[1]}")
+            first_row = self.meta.get('count', 0)
+            with open(self.vectors_path, 'ab') as f:
+                f.write(vectors.tobytes())
+            self.meta.update(dim=int(vectors.shape[1]), count=first_row + len(vectors))
+            self._save_meta()
+            self._matrix = None
+        return first_row
+
+    def needs_compaction(self, live_count):
+        dead = self.count - live_count
+        if dead <= 0:
+            return False
+        return live_count == 0 or (self.count >= COMPACT_MIN_ROWS and dead / self.count > COMPACT_DEAD_SHARE)
+
+    def compact(self, live_rows, renumber):
+        """Rewrite the file with only live_rows (ascending), so live_rows[i] becomes row i.
+
+        renumber(live_rows) updates the id map; it runs after the new file is complete and before
+        it replaces the old one. If the process dies in between, the leftover .compact file makes
+        the next start rebuild the index instead of trusting a mismatched id map.
+        """
+        with self.lock:
+            matrix = self._memmap()
+            rows = np.asarray(live_rows, dtype=np.int64)
+            with open(self.compact_path, 'wb') as f:
+                for start in range(0, len(rows), SEARCH_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(matrix[rows[start:start + SEARCH_BLOCK_ROWS]]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self._matrix = matrix = None  # The memmap has to be closed before the file is replaced
+            try:
+                renumber(live_rows)
+            except BaseException:
+                os.remove(self.compact_path)
+                raise
+            os.replace(self.compact_path, self.vectors_path)
+            self.meta['count'] = len(rows)
+            self._save_meta()
+
+    def _memmap(self):
+        if self._matrix is None and self.count:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(self.count, self.meta['dim']))
+        return self._matrix
+
+    def search(self, query_vector, k=SEARCH_TOP_K):
+        """Top-k (row, score) pairs by cosine similarity, scanning the memmap block by block."""
+        with self.lock:
+            matrix = self._memmap()
+            if matrix is None or matrix.shape[1] != query_vector.shape[0]:
+                return []
+            best_rows = np.empty(0, dtype=np.int64)
+            best_scores = np.empty(0, dtype=np.float32)
+            for start in range(0, matrix.shape[0], SEARCH_BLOCK_ROWS):
+                scores = matrix[start:start + SEARCH_BLOCK_ROWS] @ query_vector
+                rows = np.arange(start, start + len(scores), dtype=np.int64)
+                best_rows = np.concatenate([best_rows, rows])
+                best_scores = np.concatenate([best_scores, scores])
+                if len(best_scores) > k:
+                    keep = np.argpartition(-best_scores, k)[:k]
+                    best_rows, best_scores = best_rows[keep], best_scores[keep]
+        order = np.argsort(-best_scores)
+        return [(int(best_rows[i]), float(best_scores[i])) for i in order]
+
+
+class HistoryIndexer(QThread):
+    """Embeds saved messages that are not in the index yet, waking up whenever a chat is saved."""
+    progress = pyqtSignal(int, int)  # messages indexed in this pass, rows in the index
+
+    def __init__(self, index, db_path='chat_history.db', embed_fn=None):
+        super().__init__()
+        self.index = index
+        self.db_path = db_path
+        self.embed_fn = embed_fn or (lambda texts: embed_texts(texts, self.index.embedding_model))
+        self._retry = RETRY_INITIAL
+        self._last_error = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def schedule(self):
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        # SQLite connections can't cross threads, so the worker opens its own
+        db_handler = DatabaseHandler(self.db_path)
+        try:
+            if self.index.count == 0:
+                db_handler.clear_message_vectors()
+            else:
+                db_handler.delete_message_vectors_from(self.index.count)
+            while not self._stop_event.is_set():
+                timeout = None
+                try:
+                    self.compact_if_needed(db_handler)
+                    if self.index_pending(db_handler):
+                        continue
+                    self._retry = RETRY_INITIAL
+                    self._last_error = None
+                except Exception as e:
+                    if str(e) != self._last_error:
+                        app_logger.error(f"Error indexing chat history: {str(e)}")
+                        self._last_error = str(e)
+                    timeout = self._retry
+                    self._retry = min(self._retry * 2, RETRY_MAX)
+                self._wake_event.wait(timeout)
+                self._wake_event.clear()
+        finally:
+            db_handler.close()
+
+    def compact_if_needed(self, db_handler):
+        """Drop the vectors of deleted messages once they take up too much of the file"""
+        live_rows = db_handler.get_live_vector_rows()
+        if not self.index.needs_compaction(len(live_rows)):
+            return
+        dead = self.index.count - len(live_rows)
+        self.index.compact(live_rows, db_handler.renumber_message_vectors)
+        app_logger.info(f"Compacted the history index: dropped {dead} rows of deleted messages, {len(live_rows)} left")
+
+    def index_pending(self, db_handler):
+        """Embed one batch of unindexed messages; returns how many were handled."""
+        rows = db_handler.get_unindexed_messages(INDEX_BATCH_SIZE)
+        if not rows:
+            return 0
+        texts = [(uid, content.strip()[:EMBED_MAX_CHARS]) for uid, content in rows]
+        to_embed = [(uid, text) for uid, text in texts if text]
+        mapping = [(uid, SKIPPED_ROW) for uid, text in texts if not text]
+        if to_embed:
+            vectors = normalize(self.embed_fn([text for _, text in to_embed]))
+            first_row = self.index.append(vectors)
+            mapping.extend((uid, first_row + i) for i, (uid, _) in enumerate(to_embed))
+        db_handler.save_message_vector_rows(mapping)
+        self.progress.emit(len(rows), self.index.count)
+        return len(rows)
+
+
+class HistorySearchThread(QThread):
+    """Embeds a search query and ranks chats by their most similar message."""
+    results_ready = pyqtSignal(str, list)  # query, [(chat_id, title, updated_at, score, snippet)]
+
+    def __init__(self, index, query, db_path='chat_history.db', embed_fn=None):
+        super().__init__()
+        self.index = index
+        self.query = query
+        self.db_path = db_path
+        self.embed_fn = embed_fn or (lambda texts: embed_texts(texts, self.index.embedding_model))
+
+    def run(self):
+        db_handler = None
+        try:
+            query_vector = normalize(self.embed_fn([self.query]))[0]
+            matches = [(row, score) for row, score in self.index.search(query_vector) if score >= MIN_SEARCH_SCORE]
+            db_handler = DatabaseHandler(self.db_path)
+            messages = db_handler.get_messages_for_vector_rows([row for row, _ in matches])
+            chats = {}
+            for row, score in matches:
+                if row not in messages:
+                    continue  # Message was deleted or rewritten since it was indexed
+                chat_id, title, updated_at, content = messages[row][:4]
+                if chat_id not in chats:
+                    chats[chat_id] = (chat_id, title, updated_at, score, content[:200])
+            self.results_ready.emit(self.query, list(chats.values()))
+        except Exception as e:
+            app_logger.error(f"Error searching chat history: {str(e)}")
+            self.results_ready.emit(self.query, [])
+        finally:
+            if db_handler is not None:
+                db_handler.close()
@@ -0,0 +1,79 @@
+# icon_cache.py
+import os
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QGuiApplication, QIcon, QImage, QPainter, QPixmap
+from logger import app_logger
+
+try:
+    from PyQt5.QtSvg import QSvgRenderer
+except ImportError:  # QtSvg is packaged separately on some Linux distributions
+    QSvgRenderer = None
+
+ASSETS_DIR = "assets"
+REQUIRED_ASSETS = ("ollama.ico", "pencil-50.svg", "check-50.svg", "send-62.svg")
+
+_renderers = {}  # SVG name -> parsed QSvgRenderer
+_icons = {}  # (name, width, height, device pixel ratio) -> QIcon
+_reported_missing = set()
+
+
+def asset_path(name):
+    return os.path.join(ASSETS_DIR, name)
+
+
+def missing_assets():
+    """Required assets that aren't on disk"""
+    return [name for name in REQUIRED_ASSETS if not os.path.exists(asset_path(name))]
+
+
+def check_assets():
+    """Log every missing asset once at startup; returns their names"""
+    missing = missing_assets()
+    for name in missing:
+        app_logger.warning(f"Asset file not found: {asset_path(name)}")
+    _reported_missing.update(missing)
+    return missing
+
+
+def _device_pixel_ratio():
+    app = QGuiApplication.instance()
+    return app.devicePixelRatio() if app is not None else 1.0
+
+
+def _render_svg(name, size, ratio):
+    renderer = _renderers.get(name)
+    if renderer is None:
+        renderer = _renderers[name] = QSvgRenderer(asset_path(name))
+    image = QImage(int(size.width() * ratio), int(size.height() * ratio), QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    renderer.render(painter)
+    painter.end()
+    pixmap = QPixmap.fromImage(image)
+    pixmap.setDevicePixelRatio(ratio)
+    return pixmap
+
+
+def icon(name, size=QSize(16, 16)):
+    """Shared QIcon of an asset, pre-rendered once per size and device pixel ratio.
+
+    QIcon("file.svg") parses the file again for every icon created from it; this parses each
+    SVG once per process and hands every widget the same pixmap.
+    """
+    ratio = _device_pixel_ratio()
+    key = (name, size.width(), size.height(), ratio)
+    cached = _icons.get(key)
+    if cached is not None:
+        return cached
+    path = asset_path(name)
+    if not os.path.exists(path):
+        if name not in _reported_missing:
+            app_logger.warning(f"Asset file not found: {path}")
+            _reported_missing.add(name)
+        cached = QIcon()
+    elif name.endswith(".svg") and QSvgRenderer is not None:
+        cached = QIcon(_render_svg(name, size, ratio))
+    else:
+        cached = QIcon(path)
+    _icons[key] = cached
+    return cached
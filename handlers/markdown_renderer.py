@@ -0,0 +1,190 @@
+# markdown_renderer.py
+import hashlib
+import html
+import re
+from functools import lru_cache
+from handlers.syntax_highlighter import cached_highlight, resolve_language
+
+RENDERER_VERSION = 2  # Bump when the HTML output changes so cached renders are rebuilt
+BLOCK_CACHE_SIZE = 4096
+
+FENCE_RE = re.compile(r'^\s{0,3}(```|~~~)\s*([\w+#.-]*)')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+RULE_RE = re.compile(r'^\s{0,3}([-*_])(\s*\1){2,}\s*$')
+BULLET_RE = re.compile(r'^(\s*)[-*+]\s+(.*)$')
+ORDERED_RE = re.compile(r'^(\s*)\d+[.)]\s+(.*)$')
+QUOTE_RE = re.compile(r'^\s{0,3}>\s?(.*)$')
+TABLE_RULE_RE = re.compile(r'^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$')
+
+INLINE_CODE_RE = re.compile(r'`([^`\n]+)`')
+LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+BOLD_RE = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+ITALIC_RE = re.compile(r'(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])')
+STRIKE_RE = re.compile(r'~~(?=\S)(.+?)(?<=\S)~~')
+
+
+def content_hash(text):
+    """Key for cached renders: changes with the text and with the renderer"""
+    return hashlib.sha1(f"{RENDERER_VERSION}\n{text}".encode('utf-8')).hexdigest()
+
+
+def render_inline(text):
+    """Escape text and apply code spans, links, bold, italic and strikethrough"""
+    # Code spans are cut out first so nothing inside them is formatted
+    spans = []
+
+    def keep_code(match):
+        spans.append(f"<code>{html.escape(match.group(1))}</code>")
+        return f"\x00{len(spans) - 1}\x00"
+
+    text = html.escape(INLINE_CODE_RE.sub(keep_code, text), quote=False)
+    text = LINK_RE.sub(lambda m: f'<a href="{html.escape(m.group(2))}">{m.group(1)}</a>', text)
+    text = BOLD_RE.sub(r'<b>\2</b>', text)
+    text = ITALIC_RE.sub(r'<i>\2</i>', text)
+    text = STRIKE_RE.sub(r'<s>\1</s>', text)
+    text = text.replace('\n', '<br>')
+    return re.sub('\x00(\\d+)\x00', lambda m: spans[int(m.group(1))], text)
+
+
+def render_code(code, language):
+    """Highlighted code once the highlight worker has been through it, plain until then"""
+    return cached_highlight(code, language) or f'<pre><code>{html.escape(code)}</code></pre>'
+
+
+def _fence_parts(block):
+    """(code, language) of a fenced code block"""
+    lines = block.split('\n')
+    fence = FENCE_RE.match(lines[0])
+    body = lines[1:]
+    if body and body[-1].strip().startswith(fence.group(1)):
+        body = body[:-1]
+    return '\n'.join(body), fence.group(2).lower()
+
+
+def _render_list(lines):
+    ordered = ORDERED_RE.match(lines[0]) is not None
+    items = []
+    for line in lines:
+        match = (ORDERED_RE if ordered else BULLET_RE).match(line) or BULLET_RE.match(line) or ORDERED_RE.match(line)
+        if match and len(match.group(1)) < 2:
+            items.append(match.group(2))
+        elif items:
+            items[-1] += "\n" + line.strip()  # Continuation or nested line
+        else:
+            items.append(line.strip())
+    tag = 'ol' if ordered else 'ul'
+    return f"<{tag}>" + "".join(f"<li>{render_inline(item)}</li>" for item in items) + f"</{tag}>"
+
+
+def _render_table(lines):
+    rows = [[cell.strip() for cell in line.strip().strip('|').split('|')] for line in lines if not TABLE_RULE_RE.match(line)]
+    header, body = rows[0], rows[1:]
+    out = '<table border="1" cellspacing="0" cellpadding="4"><tr>' + "".join(f"<th>{render_inline(cell)}</th>" for cell in header) + "</tr>"
+    for row in body:
+        out += "<tr>" + "".join(f"<td>{render_inline(cell)}</td>" for cell in row) + "</tr>"
+    return out + "</table>"
+
+
+def render_block(block):
+    """HTML of one complete block"""
+    if FENCE_RE.match(block):
+        # Not kept in the block cache: the highlighted version replaces the plain one when it's ready
+        return render_code(*_fence_parts(block))
+    return _render_text_block(block)
+
+
+@lru_cache(maxsize=BLOCK_CACHE_SIZE)
+def _render_text_block(block):
+    """Cached, so a finished block is parsed once however often it is shown"""
+    lines = block.split('\n')
+    heading = HEADING_RE.match(lines[0])
+    if heading and len(lines) == 1:
+        level = len(heading.group(1))
+        return f"<h{level}>{render_inline(heading.group(2))}</h{level}>"
+    if RULE_RE.match(lines[0]):
+        return "<hr>" + (render_block('\n'.join(lines[1:])) if len(lines) > 1 else "")
+    if all(QUOTE_RE.match(line) for line in lines):
+        inner = '\n'.join(QUOTE_RE.match(line).group(1) for line in lines)
+        return f"<blockquote>{render_markdown(inner)}</blockquote>"
+    if BULLET_RE.match(lines[0]) or ORDERED_RE.match(lines[0]):
+        return _render_list(lines)
+    if len(lines) > 1 and '|' in lines[0] and TABLE_RULE_RE.match(lines[1]):
+        return _render_table(lines)
+    if heading:
+        # A heading directly followed by text without a blank line
+        return render_block(lines[0]) + render_block('\n'.join(lines[1:]))
+    return f"<p>{render_inline(block)}</p>"
+
+
+def split_blocks(text):
+    """Split text into blocks at blank lines outside code fences.
+
+    Returns (complete blocks, unfinished tail); the tail is everything after the last
+    blank line or open fence, which may still change while a reply streams in.
+    """
+    blocks, current, fence = [], [], None
+    lines = text.split('\n')
+    # The last line may be half a line while streaming, so it always stays in the tail
+    for line in lines[:-1]:
+        if fence is not None:
+            current.append(line)
+            if line.strip().startswith(fence):
+                blocks.append('\n'.join(current))
+                current, fence = [], None
+            continue
+        match = FENCE_RE.match(line)
+        if match:
+            if current:
+                blocks.append('\n'.join(current))
+            current, fence = [line], match.group(1)
+        elif not line.strip():
+            if current:
+                blocks.append('\n'.join(current))
+                current = []
+        else:
+            current.append(line)
+    current.append(lines[-1])
+    return blocks, '\n'.join(current)
+
+
+def render_markdown(text):
+    blocks, tail = split_blocks(text)
+    if tail.strip():
+        blocks.append(tail)
+    return "".join(render_block(block) for block in blocks)
+
+
+def code_blocks(text):
+    """(code, language) of the fenced code blocks in text that the highlighter supports"""
+    blocks, tail = split_blocks(text)
+    return [_fence_parts(block) for block in blocks + [tail]
+            if FENCE_RE.match(block) and resolve_language(FENCE_RE.match(block).group(2))]
+
+
+def fully_highlighted(text):
+    return all(cached_highlight(code, language) is not None for code, language in code_blocks(text))
+
+
+class IncrementalMarkdown:
+    """Renders a streaming reply: completed blocks are rendered once and kept, only the tail is re-rendered."""
+
+    def __init__(self):
+        self.text = ""
+        self.offset = 0  # Start of the unfinished tail in text
+        self.done_html = ""
+
+    def append(self, chunk):
+        self.text += chunk
+
+    def html(self):
+        blocks, tail = split_blocks(self.text[self.offset:])
+        if blocks:
+            self.done_html += "".join(render_block(block) for block in blocks)
+            self.offset = len(self.text) - len(tail)
+        if not tail.strip():
+            return self.done_html
+        if FENCE_RE.match(tail):
+            # An open code fence is shown as code right away instead of waiting for it to close
+            return self.done_html + f'<pre><code>{html.escape(_fence_parts(tail)[0])}</code></pre>'
+        # The tail changes with every token, so it bypasses the block cache instead of flooding it
+        return self.done_html + _render_text_block.__wrapped__(tail)
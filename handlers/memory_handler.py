@@ -1,43 +1,121 @@
 # memory_handler.py
 from langchain.memory import ConversationBufferMemory, ConversationBufferWindowMemory, ConversationSummaryMemory
 from widgets.settings import SETTINGS
+from handlers.retrieval_memory import HistoryRetriever, RETRIEVAL_MEMORY
+from handlers.summary_memory import ROLLING_SUMMARY_MEMORY, MIN_MESSAGES_TO_FOLD, summary_message
+from handlers.message_store import MessageStore
 from logger import app_logger
 
 class CustomConversationBufferMemory(ConversationBufferMemory):
     def edit_message(self, message_id, new_content):
         try:
-            for msg in self.chat_memory.messages:
-                if getattr(msg, 'id', None) == message_id:
-                    msg.content = new_content
-                    break
-            app_logger.info(f"Message {message_id} edited successfully")
+            if self.chat_memory.edit(message_id, new_content):
+                app_logger.info(f"Message {message_id} edited successfully")
+            else:
+                app_logger.warning(f"Message {message_id} is not in the current chat")
         except Exception as e:
             app_logger.error(f"Error editing message {message_id}: {str(e)}")
 
+class RetrievalMemory(CustomConversationBufferMemory):
+    """Keeps the whole chat like buffer memory, but prompts carry only the last k turns plus retrieved past messages."""
+    k: int = 5
+
+class RollingSummaryMemory(CustomConversationBufferMemory):
+    """Keeps the whole chat, but prompts carry a summary of older turns plus everything after it.
+
+    The summary is written in the background after replies, so it may lag behind the window;
+    turns it doesn't cover yet are sent verbatim rather than dropped.
+    """
+    k: int = 5
+
 class MemoryHandler:
     def __init__(self, app):
         self.app = app
-        self.memory = CustomConversationBufferMemory()
+        # The open chat's messages live here once; every memory type is a view over this store
+        self.store = MessageStore()
+        self.memory = CustomConversationBufferMemory(chat_memory=self.store)
+        # Rolling summary of the open chat and the uid of the last message it covers; kept here so
+        # switching memory types back and forth doesn't lose it
+        self.summary = ""
+        self.summary_uid = None
 
     def update_memory_settings(self):
         try:
             memory_type = SETTINGS['memory_type']
             memory_k = SETTINGS['memory_k']
             
-            # $ Create memory based on settings
+            # $ Create memory based on settings; sharing the store keeps the conversation without copying it
             if memory_type == "ConversationBufferMemory":
-                self.memory = CustomConversationBufferMemory()
+                self.memory = CustomConversationBufferMemory(chat_memory=self.store)
             elif memory_type == "ConversationBufferWindowMemory":
-                self.memory = ConversationBufferWindowMemory(k=memory_k)
+                self.memory = ConversationBufferWindowMemory(chat_memory=self.store, k=memory_k)
             elif memory_type == "ConversationSummaryMemory":
-                self.memory = ConversationSummaryMemory(llm=self.app.llm)
+                self.memory = ConversationSummaryMemory(chat_memory=self.store, llm=self.app.llm)
+            elif memory_type == RETRIEVAL_MEMORY:
+                self.memory = RetrievalMemory(chat_memory=self.store, k=memory_k)
+            elif memory_type == ROLLING_SUMMARY_MEMORY:
+                self.memory = RollingSummaryMemory(chat_memory=self.store, k=memory_k)
             else:
                 raise ValueError(f"Unsupported memory type: {memory_type}")
             
-            # Transfer existing messages to new memory
-            for message in self.memory.chat_memory.messages:
-                self.memory.chat_memory.add_message(message)
-            
             app_logger.info(f"Memory settings updated to {memory_type}")
         except Exception as e:
-            app_logger.error(f"Error updating memory settings: {str(e)}")
\ No newline at end of file
+            app_logger.error(f"Error updating memory settings: {str(e)}")
+
+    def update_memory_window(self):
+        """Apply a new memory_k to the current memory in place; the conversation and summary are untouched"""
+        if hasattr(self.memory, 'k'):
+            self.memory.k = SETTINGS['memory_k']
+            app_logger.info(f"Memory window set to {self.memory.k} turns")
+
+    def prompt_history(self, messages):
+        """The part of the current chat that goes into the prompt"""
+        if isinstance(self.memory, (ConversationBufferWindowMemory, RetrievalMemory)):
+            return messages[-2 * self.memory.k:]
+        if isinstance(self.memory, RollingSummaryMemory):
+            start = self.summary_start(messages)
+            if start:
+                return [summary_message(self.summary)] + messages[start:]
+        return messages
+
+    def summary_start(self, messages):
+        """Index of the first message the summary doesn't cover; 0 if it doesn't apply to these messages"""
+        # messages is always the store or a prefix of it, so store positions apply
+        position = self.store.index_of(self.summary_uid) if self.summary else None
+        if position is None or position >= len(messages):
+            return 0
+        return position + 1
+
+    def summary_covers(self, message_id):
+        """Whether the rolling summary was written from this message, so editing it makes the summary stale"""
+        position = self.store.index_of(message_id)
+        covered = self.store.index_of(self.summary_uid) if self.summary else None
+        return position is not None and covered is not None and position <= covered
+
+    def pending_summary(self, messages):
+        """(previous summary, messages to fold in) once whole turns have left the window, else None"""
+        if not isinstance(self.memory, RollingSummaryMemory):
+            return None
+        start = self.summary_start(messages)
+        cutoff = len(messages) - 2 * self.memory.k
+        if cutoff - start < MIN_MESSAGES_TO_FOLD:
+            return None
+        return (self.summary if start else ""), messages[start:cutoff]
+
+    def apply_summary(self, summary, covered_uid):
+        self.summary = summary
+        self.summary_uid = covered_uid
+
+    def reset(self):
+        """Empty the store for a new chat; the memory type stays as configured"""
+        self.store.clear()
+        self.apply_summary("", None)
+
+    def create_retriever(self, history_index, db_path):
+        """Retriever for RetrievalMemory; None for other memory types or while the history index is empty"""
+        if not isinstance(self.memory, RetrievalMemory):
+            return None
+        if history_index is None or not history_index.count:
+            app_logger.info("Retrieval memory has no history index yet; using recent turns only")
+            return None
+        return HistoryRetriever(history_index, db_path, SETTINGS['retrieval_top_k'], SETTINGS['retrieval_token_budget'])
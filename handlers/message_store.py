@@ -0,0 +1,87 @@
+# message_store.py
+import uuid
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import HumanMessage, AIMessage
+
+
+class MessageRecord:
+    """One stored message; a slotted record is far smaller than a pydantic message object."""
+    __slots__ = ("id", "is_user", "content")
+
+    def __init__(self, message_id, is_user, content):
+        self.id = message_id
+        self.is_user = is_user
+        self.content = content
+
+    def to_message(self):
+        message_class = HumanMessage if self.is_user else AIMessage
+        return message_class(content=self.content, id=self.id)
+
+
+class MessageStore(BaseChatMessageHistory):
+    """The open chat's messages: the single list every memory strategy reads from.
+
+    Records sit in an array with an id -> position index, so lookups and edits by id are O(1).
+    LangChain message objects are only built when a prompt or the database needs them.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.positions = {}  # message id -> index in records
+
+    @property
+    def messages(self):
+        return [record.to_message() for record in self.records]
+
+    def __len__(self):
+        return len(self.records)
+
+    def add_message(self, message):
+        message_id = getattr(message, 'id', None) or uuid.uuid4().hex
+        self.positions[message_id] = len(self.records)
+        self.records.append(MessageRecord(message_id, isinstance(message, HumanMessage), message.content))
+
+    def add_messages(self, messages):
+        for message in messages:
+            self.add_message(message)
+
+    def get(self, message_id):
+        position = self.positions.get(message_id)
+        return None if position is None else self.records[position]
+
+    def index_of(self, message_id):
+        return self.positions.get(message_id)
+
+    def last(self):
+        return self.records[-1] if self.records else None
+
+    def edit(self, message_id, content):
+        """Replace a message's text; returns False if the id isn't in the store"""
+        record = self.get(message_id)
+        if record is None:
+            return False
+        record.content = content
+        return True
+
+    def delete(self, message_id):
+        """Remove a message; later messages shift down one position"""
+        position = self.positions.pop(message_id, None)
+        if position is None:
+            return False
+        del self.records[position]
+        for record in self.records[position:]:
+            self.positions[record.id] = self.positions[record.id] - 1
+        return True
+
+    def truncate(self, length):
+        """Keep the first length records, e.g. the prefix shared with another branch; returns the dropped ids"""
+        removed = [record.id for record in self.records[length:]]
+        del self.records[length:]
+        for message_id in removed:
+            del self.positions[message_id]
+        return removed
+
+    def clear(self):
+        # Emptied in place, so every memory sharing the store sees the same list
+        del self.records[:]
+        self.positions.clear()
@@ -0,0 +1,162 @@
+# metrics_handler.py
+import csv
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from logger import app_logger
+
+# Server-side timing fields reported by Ollama at the end of a generation (durations in nanoseconds)
+SERVER_FIELDS = ["total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration"]
+
+# Per-generation resource summary produced by ResourceSampler.summarize
+RESOURCE_COLUMNS = [
+    "cpu_avg_percent", "cpu_peak_percent", "ram_peak_percent",
+    "gpu_avg_percent", "ollama_cpu_avg_percent", "ollama_rss_peak_mb",
+]
+
+# Column order used for the database and for CSV exports
+METRIC_COLUMNS = [
+    "message_id", "model", "num_ctx", "created_at",
+    "ttft_ms", "total_ms", "stream_tokens",
+    "itl_p50_ms", "itl_p90_ms", "itl_p99_ms",
+    "prompt_eval_count", "prompt_eval_ms", "eval_count", "eval_ms", "load_ms", "server_total_ms",
+    "tokens_per_second", "prompt_tokens_per_second",
+] + RESOURCE_COLUMNS
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers, None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _ns_to_ms(value):
+    return round(value / 1e6, 2) if value else None
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+class GenerationMetrics(BaseCallbackHandler):
+    """Records client-side token timing for one generation and merges in the server's counters."""
+
+    def __init__(self, message_id, model=None, num_ctx=None):
+        super().__init__()
+        self.message_id = message_id
+        self.model = model
+        self.num_ctx = num_ctx
+        self.start_time = None
+        self.token_times = []
+        self.end_time = None
+        self.server = {}
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.token_times = []
+        self.end_time = None
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        # Runs on the worker thread, so the timestamp is taken before any Qt queueing
+        self.token_times.append(time.perf_counter())
+
+    def finish(self, response_metadata=None):
+        self.end_time = time.perf_counter()
+        response_metadata = response_metadata or {}
+        self.server = {field: response_metadata.get(field) for field in SERVER_FIELDS}
+
+    def to_dict(self):
+        """Flatten the recorded timings into a row matching METRIC_COLUMNS."""
+        start = self.start_time or 0.0
+        end = self.end_time or (self.token_times[-1] if self.token_times else start)
+        intervals = [(b - a) * 1000 for a, b in zip(self.token_times, self.token_times[1:])]
+        eval_count = self.server.get("eval_count")
+        eval_duration = self.server.get("eval_duration")
+        prompt_eval_count = self.server.get("prompt_eval_count")
+        prompt_eval_duration = self.server.get("prompt_eval_duration")
+
+        tokens_per_second = None
+        if eval_count and eval_duration:
+            tokens_per_second = round(eval_count / (eval_duration / 1e9), 2)
+        elif len(self.token_times) > 1:
+            # Fall back to the client-side view when the server did not report counters
+            span = self.token_times[-1] - self.token_times[0]
+            tokens_per_second = round((len(self.token_times) - 1) / span, 2) if span > 0 else None
+
+        prompt_tokens_per_second = None
+        if prompt_eval_count and prompt_eval_duration:
+            prompt_tokens_per_second = round(prompt_eval_count / (prompt_eval_duration / 1e9), 2)
+
+        return {
+            "message_id": self.message_id,
+            "model": self.model,
+            "num_ctx": self.num_ctx,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ttft_ms": round((self.token_times[0] - start) * 1000, 2) if self.token_times else None,
+            "total_ms": round((end - start) * 1000, 2),
+            "stream_tokens": len(self.token_times),
+            "itl_p50_ms": _round(percentile(intervals, 50)),
+            "itl_p90_ms": _round(percentile(intervals, 90)),
+            "itl_p99_ms": _round(percentile(intervals, 99)),
+            "prompt_eval_count": prompt_eval_count,
+            "prompt_eval_ms": _ns_to_ms(prompt_eval_duration),
+            "eval_count": eval_count,
+            "eval_ms": _ns_to_ms(eval_duration),
+            "load_ms": _ns_to_ms(self.server.get("load_duration")),
+            "server_total_ms": _ns_to_ms(self.server.get("total_duration")),
+            "tokens_per_second": tokens_per_second,
+            "prompt_tokens_per_second": prompt_tokens_per_second,
+        }
+
+
+def format_metrics_footer(metrics):
+    """Build the short footer text shown under an AI message."""
+    parts = []
+    if metrics.get("tokens_per_second"):
+        parts.append(f"⚡ {metrics['tokens_per_second']:.1f} tok/s")
+    if metrics.get("ttft_ms") is not None:
+        parts.append(f"TTFT {metrics['ttft_ms']:.0f} ms")
+    if metrics.get("prompt_eval_count"):
+        prompt_ms = metrics.get("prompt_eval_ms") or 0
+        parts.append(f"prompt {metrics['prompt_eval_count']} tok in {prompt_ms:.0f} ms")
+    if metrics.get("itl_p90_ms") is not None:
+        parts.append(f"p90 gap {metrics['itl_p90_ms']:.0f} ms")
+    if metrics.get("cpu_avg_percent") is not None:
+        parts.append(f"CPU {metrics['cpu_avg_percent']:.0f}%")
+    if metrics.get("gpu_avg_percent") is not None:
+        parts.append(f"GPU {metrics['gpu_avg_percent']:.0f}%")
+    if metrics.get("total_ms") is not None:
+        parts.append(f"{metrics['total_ms'] / 1000:.1f} s")
+    if metrics.get("model"):
+        parts.append(metrics["model"])
+    return " · ".join(parts)
+
+
+class MetricsHandler:
+    def __init__(self, db_handler):
+        self.db_handler = db_handler
+
+    def record(self, metrics):
+        try:
+            self.db_handler.save_generation_metrics(metrics)
+        except Exception as e:
+            app_logger.error(f"Error saving generation metrics: {str(e)}")
+
+    def get(self, message_id):
+        try:
+            return self.db_handler.get_generation_metrics(message_id)
+        except Exception as e:
+            app_logger.error(f"Error loading generation metrics: {str(e)}")
+            return None
+
+    def export_csv(self, file_name):
+        """Write every stored generation's metrics to a CSV file."""
+        rows = self.db_handler.get_all_generation_metrics()
+        with open(file_name, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=METRIC_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+        return len(rows)
@@ -1,33 +1,85 @@
 # model_handler.py
 import logging
-import json
 from PyQt5.QtWidgets import QMessageBox
-from langchain_community.chat_models import ChatOllama
+from PyQt5.QtCore import QThread, pyqtSignal
 from utility import Utility
 import sys
 import subprocess
-from handlers.settings_handler import SETTINGS, save_settings
+from handlers.settings_handler import SETTINGS, save_settings, model_settings
 from logger import app_logger
 
+SHOW_TIMEOUT = 2  # Seconds to wait for /api/show when checking a model's limits
+
+
+def load_options(settings):
+    """Ollama options that decide how a model is loaded; a request with different values reloads it"""
+    options = {
+        "num_ctx": settings['num_ctx'],
+        "num_batch": settings['num_batch'],
+        "use_mmap": settings['use_mmap'],
+        "f16_kv": settings['f16_kv'],
+    }
+    # 0 threads and -1 GPU layers mean "let Ollama decide", which it only does when they're left out
+    if settings['num_thread'] > 0:
+        options['num_thread'] = settings['num_thread']
+    if settings['num_gpu'] >= 0:
+        options['num_gpu'] = settings['num_gpu']
+    return options
+
+
+def fetch_context_length(model, timeout=SHOW_TIMEOUT):
+    """Context length the model was trained with, from /api/show (blocking; None if it isn't reported)"""
+    info = Utility.ollama_request('/api/show', {"model": model}, timeout=timeout).get('model_info') or {}
+    return info.get(f"{info.get('general.architecture')}.context_length")
+
+
+class ContextLengthThread(QThread):
+    """Reads a model's context length off the GUI thread."""
+    fetched = pyqtSignal(str, object)  # Model name, context length or None if it couldn't be read
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def run(self):
+        try:
+            context_length = fetch_context_length(self.model)
+        except Exception as e:
+            app_logger.error(f"Error reading /api/show for {self.model}: {str(e)}")
+            context_length = None
+        self.fetched.emit(self.model, context_length)
+
+
+def keep_alive_value(keep_alive):
+    """keep_alive as Ollama expects it: a plain number is seconds, anything else a duration string"""
+    return int(keep_alive) if keep_alive.lstrip('-').isdigit() else keep_alive
+
+
 class ModelHandler:
     def __init__(self, app):
         self.app = app
-        self.load_models_from_json()
+        self.context_lengths = {}  # Model name -> context length it was trained with (None if unknown), from /api/show
+        self.context_threads = {}  # Lookups in progress, by model name
+        self.reported_limits = set()  # (model, num_ctx) pairs the user was already told about
         self.app.ui.model_selector_lineEdit.setVisible(False)  # Hide lineEdit initially
+
+    def populate_models(self, models):
+        """Fill the model selector from the catalog loaded by the startup pipeline."""
+        self.load_models(models)
         self.set_current_model_from_settings()  # Add this line
         self.app.ui_handler.add_system_message("Welcome! I'm ready to chat using the default model. You can change the model anytime from the dropdown menu.")
 
-    def load_models_from_json(self):
+    def load_models(self, models):
         try:
-            with open('data\\models.json', 'r') as f:
-                models = json.load(f)
-            models.append("MANUAL ENTRY")
+            if models is None:
+                raise ValueError("Model catalog is unavailable")
+            models = list(models) + ["MANUAL ENTRY"]
             self.app.ui.model_selector_comboBox.clear()
             self.app.ui.model_selector_comboBox.addItems(models)
             self.app.ui.model_selector_comboBox.currentTextChanged.connect(self._on_model_changed)
             self.app.ui_handler.add_system_message("Available models have been loaded. You can select one from the dropdown menu.")
         except Exception as e:
-            app_logger.error(f"Error loading models from JSON: {str(e)}")
+            app_logger.error(f"Error loading model catalog: {str(e)}")
             self.app.ui.model_selector_comboBox.addItem("MANUAL ENTRY")
             self.app.ui_handler.add_system_message("Oops! I couldn't load the list of models. You can still enter a model name manually.")
 
@@ -58,23 +110,95 @@ class ModelHandler:
         except Exception as e:
             self._handle_model_change_error(e)
 
+    def runtime_options(self, model=None):
+        """load_options of a model (the current one by default), with its profile and limits applied"""
+        settings = model_settings(model)
+        options = load_options(settings)
+        context_length = self.context_lengths.get(settings['model'])
+        if context_length and options['num_ctx'] > context_length:
+            options['num_ctx'] = context_length
+        return options
+
+    def llm_options(self, model=None):
+        """Options passed to TunedChatOllama for a model (the current one by default); also what the response cache keys on"""
+        settings = model_settings(model)
+        options = {
+            **self.runtime_options(settings['model']),
+            "presence_penalty": settings['presence_penalty'],
+            "frequency_penalty": settings['frequency_penalty'],
+        }
+        if settings['seed'] >= 0:
+            options['seed'] = settings['seed']
+        stop = [sequence.strip() for sequence in settings['stop_sequences'].split(',') if sequence.strip()]
+        return {
+            "model": settings['model'],
+            "temperature": settings['temperature'],
+            "top_k": settings['top_k'],
+            "top_p": settings['top_p'],
+            "repeat_penalty": settings['repeat_penalty'],
+            "repeat_last_n": settings['repeat_last_n'],
+            "num_predict": settings['max_tokens'],
+            "stop": stop or None,
+            "keep_alive": keep_alive_value(settings['keep_alive']),
+            "extra_options": options,
+        }
+
+    def create_llm(self, callbacks=None):
+        """Build a chat client from the current settings"""
+        # Imported on first use; langchain_community is the slowest import in the app
+        from handlers.ollama_chat import TunedChatOllama
+        return TunedChatOllama(
+            **self.llm_options(),
+            streaming=callbacks is not None,
+            callbacks=callbacks,
+        )
+
+    def create_summary_llm(self):
+        """Non-streaming client for background summaries; uses the smaller summary model when one is set"""
+        from handlers.ollama_chat import TunedChatOllama
+        return TunedChatOllama(**self.llm_options(SETTINGS['summary_model'] or None))
+
+    def request_context_length(self, model):
+        """Look up the model's context length in the background unless it's known or already being looked up"""
+        if model in self.context_lengths or model in self.context_threads:
+            return
+        monitor = getattr(self.app, 'health_monitor', None)
+        if monitor is not None and not monitor.is_up:
+            return  # Not recorded, so it's looked up on the next model change once the server is back
+        thread = ContextLengthThread(model)
+        thread.fetched.connect(self.set_context_length)
+        # Kept until the thread has finished, so it isn't destroyed while still running
+        thread.finished.connect(lambda: self.context_threads.pop(model, None))
+        self.context_threads[model] = thread
+        thread.start()
+
+    def set_context_length(self, model, context_length):
+        """Record a model's context length; rebuilds the client if the current model's context has to be capped"""
+        self.context_lengths[model] = context_length  # A failed lookup is recorded too, so it isn't retried on every switch
+        if model != SETTINGS['model'] or not context_length or model_settings()['num_ctx'] <= context_length:
+            return
+        self.check_model_limits()
+        if self.app.llm is not None:
+            try:
+                self.app.llm = self.create_llm(callbacks=[self.app.chat_handler.stream_handler])
+            except Exception as e:
+                app_logger.error(f"Error configuring LLM: {str(e)}")
+
+    def check_model_limits(self):
+        """Tell the user when the context size asked for is more than the current model supports"""
+        settings = model_settings()
+        context_length = self.context_lengths.get(settings['model'])
+        if context_length and settings['num_ctx'] > context_length and (settings['model'], settings['num_ctx']) not in self.reported_limits:
+            self.reported_limits.add((settings['model'], settings['num_ctx']))
+            app_logger.warning(f"num_ctx {settings['num_ctx']} exceeds the {context_length}-token context of {settings['model']}")
+            self.app.ui_handler.add_system_message(
+                f"{settings['model']} supports a context of up to {context_length} tokens, so I'm using {context_length} instead of {settings['num_ctx']}.")
+
     def _configure_llm(self):
         try:
-            self.app.llm = ChatOllama(
-                model=SETTINGS['model'],
-                temperature=SETTINGS['temperature'],
-                num_ctx=SETTINGS['num_ctx'],
-                top_k=SETTINGS['top_k'],
-                top_p=SETTINGS['top_p'],
-                repeat_penalty=SETTINGS['repeat_penalty'],
-                repeat_last_n=SETTINGS['repeat_last_n'],
-                seed=SETTINGS['seed'],
-                f16_kv=SETTINGS['f16_kv'],
-                logits_all=SETTINGS['logits_all'],
-                vocab_only=SETTINGS['vocab_only'],
-                streaming=True,
-                callbacks=[self.app.chat_handler.stream_handler],  # Use chat_handler's stream_handler
-            )
+            self.request_context_length(SETTINGS['model'])
+            self.check_model_limits()
+            self.app.llm = self.create_llm(callbacks=[self.app.chat_handler.stream_handler])  # Use chat_handler's stream_handler
             self.app.ui_handler.add_system_message("Great! I've updated my settings with the new model. We're ready to chat!")
         except Exception as e:
             app_logger.error(f"Error configuring LLM: {str(e)}")
@@ -0,0 +1,19 @@
+# ollama_chat.py
+from typing import Any, Dict
+from langchain_community.chat_models import ChatOllama
+
+
+class TunedChatOllama(ChatOllama):
+    """ChatOllama that also sends Ollama options it has no field for.
+
+    ChatOllama silently ignores unknown keyword arguments, so options like num_batch, use_mmap
+    or seed would never reach the server; they're passed in extra_options instead.
+    """
+
+    extra_options: Dict[str, Any] = {}
+
+    @property
+    def _default_params(self) -> Dict[str, Any]:
+        params = super()._default_params
+        params["options"] = {**params["options"], **self.extra_options}
+        return params
@@ -0,0 +1,95 @@
+# request_queue.py
+import uuid
+from collections import namedtuple
+from PyQt5.QtCore import QThread, pyqtSignal
+from handlers.database_handler import DatabaseHandler
+from handlers.health_monitor import classify_chat_error
+from logger import app_logger
+
+MAX_CONCURRENT_REQUESTS = 2  # Prompts in flight at once while the queue drains, across all chats
+
+QueuedRequest = namedtuple("QueuedRequest", ["id", "chat_id", "content", "message_uid"])
+
+
+def history_until(messages, message_uid):
+    """Chat history up to and including the queued user message, so later queued prompts don't leak into its context."""
+    for index, message in enumerate(messages):
+        if message_uid and getattr(message, 'id', None) == message_uid:
+            return messages[:index + 1]
+    return list(messages)
+
+
+class RequestQueue:
+    """Durable FIFO of prompts waiting for Ollama, stored in the outbound_queue table so it survives restarts."""
+
+    def __init__(self, db_handler):
+        self.db_handler = db_handler
+        self.db_handler.reset_sending_requests()
+
+    def enqueue(self, chat_id, content, message_uid):
+        request_id = self.db_handler.enqueue_request(chat_id, content, message_uid)
+        return QueuedRequest(request_id, chat_id, content, message_uid)
+
+    def pending(self):
+        return [QueuedRequest(*row) for row in self.db_handler.get_queued_requests()]
+
+    def next_batch(self, busy_chat_ids, limit):
+        """Oldest pending request of each idle chat, oldest first; a chat's requests replay strictly one after another."""
+        batch = []
+        skipped = set(busy_chat_ids)
+        for request in self.pending():
+            if len(batch) >= limit:
+                break
+            if request.chat_id in skipped:
+                continue
+            skipped.add(request.chat_id)
+            batch.append(request)
+        return batch
+
+    def mark_sending(self, request_id):
+        self.db_handler.set_request_status(request_id, 'sending')
+
+    def requeue(self, request_id):
+        self.db_handler.set_request_status(request_id, 'pending')
+
+    def mark_failed(self, request_id, error):
+        self.db_handler.set_request_status(request_id, 'failed', error)
+
+    def mark_done(self, request_id):
+        self.db_handler.delete_request(request_id)
+
+    def __len__(self):
+        return len(self.db_handler.get_queued_requests())
+
+
+class ReplayThread(QThread):
+    """Sends a queued prompt for a chat that isn't open and appends the reply to that chat in the database."""
+    reply_ready = pyqtSignal(int, str, str)  # request id, reply, reply uid
+    error_occurred = pyqtSignal(int, str, str)  # request id, error kind, message
+
+    def __init__(self, request, llm, prompt_template, db_path='chat_history.db'):
+        super().__init__()
+        self.request = request
+        self.llm = llm
+        self.prompt_template = prompt_template
+        self.db_path = db_path
+
+    def run(self):
+        db_handler = None
+        try:
+            from langchain_core.messages import HumanMessage
+            # SQLite connections can't cross threads, so the worker opens its own
+            db_handler = DatabaseHandler(self.db_path)
+            _, history = db_handler.load_chat(self.request.chat_id)
+            messages = [HumanMessage(content=self.prompt_template.format(input=self.request.content))]
+            messages.extend(history_until(history, self.request.message_uid))
+            response = self.llm.invoke(messages)
+            reply_uid = uuid.uuid4().hex
+            db_handler.complete_request(self.request.id, self.request.chat_id, response.content, reply_uid, self.request.message_uid)
+            self.reply_ready.emit(self.request.id, response.content, reply_uid)
+        except Exception as e:
+            app_logger.error(f"Error replaying queued request {self.request.id}: {str(e)}")
+            self.error_occurred.emit(self.request.id, classify_chat_error(e), str(e))
+        finally:
+            if db_handler is not None:
+                db_handler.close()
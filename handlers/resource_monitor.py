@@ -0,0 +1,217 @@
+# resource_monitor.py
+import threading
+import time
+from collections import namedtuple
+import psutil
+from PyQt5.QtCore import QThread, pyqtSignal
+from logger import app_logger
+
+ResourceSample = namedtuple("ResourceSample", [
+    "timestamp", "generation_id", "cpu_percent", "ram_percent", "gpu_percent", "ollama_cpu_percent", "ollama_rss_mb",
+])
+
+IDLE_INTERVAL = 2.0  # Seconds between samples when nothing is generating
+GENERATION_INTERVAL = 0.5  # Seconds between samples while a reply streams
+BUFFER_SIZE = 600  # Roughly five minutes of generation-rate samples
+PROCESS_RESCAN_INTERVAL = 30.0  # Seconds between process-table scans while no Ollama process is known
+
+
+class RingBuffer:
+    """Fixed-size, preallocated buffer that overwrites its oldest entry when full."""
+    __slots__ = ("capacity", "items", "head", "count", "lock")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = [None] * capacity
+        self.head = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def append(self, item):
+        with self.lock:
+            self.items[self.head] = item
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def snapshot(self):
+        """Return the buffered items, oldest first."""
+        with self.lock:
+            if self.count < self.capacity:
+                return self.items[:self.count]
+            return self.items[self.head:] + self.items[:self.head]
+
+    def __len__(self):
+        return self.count
+
+
+def _mean(values):
+    return round(sum(values) / len(values), 1) if values else None
+
+
+def _peak(values):
+    return round(max(values), 1) if values else None
+
+
+class ResourceSampler(QThread):
+    """Samples machine and Ollama process utilisation into a ring buffer, tagged with the active generation.
+
+    Sampling only runs while the panel is on screen or a reply is being generated; otherwise the
+    thread sleeps until one of them changes.
+    """
+    sample_ready = pyqtSignal(object)
+
+    def __init__(self, capacity=BUFFER_SIZE):
+        super().__init__()
+        self.buffer = RingBuffer(capacity)
+        self.generation_id = None
+        self.panel_visible = False
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._ollama_processes = {}
+        self._rescan_processes = True
+        self._last_process_scan = 0.0
+        self._gpu_reader = None  # Set on the first GPU sample; None after that means no GPU reading is possible
+        self._gpu_checked = False
+
+    def set_generation(self, generation_id):
+        """Tag subsequent samples with generation_id (None when idle) and switch sampling rate."""
+        if generation_id is not None:
+            self._rescan_processes = True  # Ollama starts a runner process when it loads a model
+        self.generation_id = generation_id
+        self._wake_event.set()
+
+    def set_panel_visible(self, visible):
+        self.panel_visible = visible
+        self._wake_event.set()
+
+    @property
+    def active(self):
+        return self.panel_visible or self.generation_id is not None
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        psutil.cpu_percent(interval=None)  # Prime the system-wide counter
+        while not self._stop_event.is_set():
+            if not self.active:
+                self._wake_event.wait()  # Nobody is looking and nothing is generating
+                self._wake_event.clear()
+                continue
+            try:
+                sample = self.take_sample()
+                self.buffer.append(sample)
+                self.sample_ready.emit(sample)
+            except Exception as e:
+                app_logger.error(f"Error sampling resources: {str(e)}")
+            self._wake_event.wait(GENERATION_INTERVAL if self.generation_id else IDLE_INTERVAL)
+            self._wake_event.clear()
+
+    def take_sample(self):
+        ollama_cpu, ollama_rss = self._sample_ollama()
+        return ResourceSample(
+            timestamp=time.time(),
+            generation_id=self.generation_id,
+            cpu_percent=psutil.cpu_percent(interval=None),
+            ram_percent=psutil.virtual_memory().percent,
+            gpu_percent=self._sample_gpu(),
+            ollama_cpu_percent=ollama_cpu,
+            ollama_rss_mb=ollama_rss,
+        )
+
+    def _scan_ollama_processes(self):
+        """Walk the process table for the Ollama server and its model runners"""
+        self._last_process_scan = time.monotonic()
+        self._rescan_processes = False
+        found = {}
+        for proc in psutil.process_iter(['name']):
+            name = (proc.info.get('name') or '').lower()
+            if name.startswith('ollama'):
+                found[proc.pid] = self._ollama_processes.get(proc.pid)
+                if found[proc.pid] is None:
+                    proc.cpu_percent(interval=None)  # Prime; the first reading is always 0
+                    found[proc.pid] = proc
+        self._ollama_processes = found
+
+    def _sample_ollama(self):
+        """Sum CPU and resident memory over the Ollama server and its model runners."""
+        # The process handles are kept; the process table is only walked again when one of them
+        # has exited, a generation starts, or (while none is known) every PROCESS_RESCAN_INTERVAL
+        if self._rescan_processes or (not self._ollama_processes
+                                      and time.monotonic() - self._last_process_scan > PROCESS_RESCAN_INTERVAL):
+            self._scan_ollama_processes()
+        if not self._ollama_processes:
+            return None, None
+        cpu, rss = 0.0, 0.0
+        for pid, proc in list(self._ollama_processes.items()):
+            try:
+                with proc.oneshot():
+                    cpu += proc.cpu_percent(interval=None)
+                    rss += proc.memory_info().rss / (1024 ** 2)
+            except psutil.NoSuchProcess:
+                del self._ollama_processes[pid]
+                self._rescan_processes = True
+            except psutil.AccessDenied:
+                pass
+        return round(cpu, 1), round(rss, 1)
+
+    def _open_gpu_reader(self):
+        """A function returning the mean GPU load in percent, or None if no NVIDIA GPU can be read.
+
+        NVML is queried in-process; GPUtil, the fallback, starts nvidia-smi for every reading.
+        """
+        try:
+            import pynvml
+            pynvml.nvmlInit()
+            handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+            if handles:
+                def read_nvml():
+                    return sum(pynvml.nvmlDeviceGetUtilizationRates(handle).gpu for handle in handles) / len(handles)
+                return read_nvml
+        except Exception:
+            pass
+        try:
+            import GPUtil
+            if GPUtil.getGPUs():
+                def read_gputil():
+                    gpus = GPUtil.getGPUs()
+                    return sum(gpu.load for gpu in gpus) / len(gpus) * 100 if gpus else None
+                return read_gputil
+        except Exception:
+            pass
+        app_logger.info("No GPU utilisation source available; GPU sampling is off")
+        return None
+
+    def _sample_gpu(self):
+        if not self._gpu_checked:
+            self._gpu_checked = True
+            self._gpu_reader = self._open_gpu_reader()
+        if self._gpu_reader is None:
+            return None
+        try:
+            load = self._gpu_reader()
+            return round(load, 1) if load is not None else None
+        except Exception as e:
+            app_logger.error(f"Error reading GPU utilisation; GPU sampling is off: {str(e)}")
+            self._gpu_reader = None
+            return None
+
+    def samples_for_generation(self, generation_id):
+        return [sample for sample in self.buffer.snapshot() if sample.generation_id == generation_id]
+
+    def summarize(self, generation_id):
+        """Aggregate the samples taken during one generation."""
+        samples = self.samples_for_generation(generation_id)
+
+        def values(field):
+            return [getattr(sample, field) for sample in samples if getattr(sample, field) is not None]
+
+        return {
+            "cpu_avg_percent": _mean(values("cpu_percent")),
+            "cpu_peak_percent": _peak(values("cpu_percent")),
+            "ram_peak_percent": _peak(values("ram_percent")),
+            "gpu_avg_percent": _mean(values("gpu_percent")),
+            "ollama_cpu_avg_percent": _mean(values("ollama_cpu_percent")),
+            "ollama_rss_peak_mb": _peak(values("ollama_rss_mb")),
+        }
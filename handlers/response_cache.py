@@ -0,0 +1,74 @@
+# response_cache.py
+import hashlib
+import json
+import re
+import time
+from logger import app_logger
+
+DEFAULT_MAX_MB = 50
+REPLAY_CHUNK = re.compile(r'\s*\S+\s*')  # Word-sized pieces, like the tokens Ollama streams
+
+
+def cache_key(llm_options, messages):
+    """sha256 over the model, its sampling options and the exact message context."""
+    payload = {
+        "options": llm_options,
+        "messages": [[message.type, message.content] for message in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def replay_chunks(text):
+    """Split a cached reply into stream-sized pieces that concatenate back to the original."""
+    chunks = REPLAY_CHUNK.findall(text)
+    if ''.join(chunks) != text:
+        return [text]
+    return chunks
+
+
+class ResponseCache:
+    """Exact-match reply cache stored in SQLite, evicting least recently used entries beyond max_mb."""
+
+    def __init__(self, db_handler, max_mb=DEFAULT_MAX_MB):
+        self.db_handler = db_handler
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+    def set_max_mb(self, max_mb):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.evict()
+
+    def get(self, key):
+        try:
+            content = self.db_handler.get_cached_response(key, time.time())
+        except Exception as e:
+            app_logger.error(f"Error reading response cache: {str(e)}")
+            content = None
+        if content is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return content
+
+    def put(self, key, model, content):
+        try:
+            self.db_handler.save_cached_response(key, model, content, len(content.encode('utf-8')), time.time())
+            self.evict()
+        except Exception as e:
+            app_logger.error(f"Error writing response cache: {str(e)}")
+
+    def evict(self):
+        removed = self.db_handler.evict_cached_responses(self.max_bytes)
+        if removed:
+            app_logger.info(f"Evicted {removed} cached responses to stay under {self.max_bytes / 1024**2:.0f} MB")
+
+    def clear(self):
+        self.db_handler.clear_cached_responses()
+        self.hits = 0
+        self.misses = 0
+
+    def stats_text(self):
+        total = self.hits + self.misses
+        rate = f" ({self.hits / total:.0%})" if total else ""
+        return f"Cache: {self.hits} hits / {self.misses} misses{rate}"
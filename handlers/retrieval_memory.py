@@ -0,0 +1,70 @@
+# retrieval_memory.py
+from langchain_core.messages import SystemMessage
+from handlers.database_handler import DatabaseHandler
+from handlers.embeddings import embed_texts, normalize
+from handlers.history_index import MIN_SEARCH_SCORE
+from logger import app_logger
+
+RETRIEVAL_MEMORY = "RetrievalMemory"
+DEFAULT_TOP_K = 5
+DEFAULT_TOKEN_BUDGET = 512
+CHARS_PER_TOKEN = 4  # Rough average for English text; good enough to keep the budget honest
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class HistoryRetriever:
+    """Finds the saved messages most relevant to a prompt across every chat, within a token budget."""
+
+    def __init__(self, index, db_path='chat_history.db', top_k=DEFAULT_TOP_K, token_budget=DEFAULT_TOKEN_BUDGET, embed_fn=None):
+        self.index = index
+        self.db_path = db_path
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.embed_fn = embed_fn or (lambda texts: embed_texts(texts, self.index.embedding_model))
+
+    def retrieve(self, query, exclude_uids=(), db_handler=None):
+        """Return [(title, is_user, content, score)], best first; messages already in the prompt are skipped.
+
+        db_handler is the calling thread's connection; without one a connection is opened for this lookup.
+        """
+        query_vector = normalize(self.embed_fn([query]))[0]
+        # Ask for extra candidates: some belong to the current chat or no longer exist
+        matches = [(row, score) for row, score in self.index.search(query_vector, k=self.top_k * 4) if score >= MIN_SEARCH_SCORE]
+        rows = [row for row, _ in matches]
+        if db_handler is not None:
+            messages = db_handler.get_messages_for_vector_rows(rows)
+        else:
+            db_handler = DatabaseHandler(self.db_path)
+            try:
+                messages = db_handler.get_messages_for_vector_rows(rows)
+            finally:
+                db_handler.close()
+
+        picked, seen, used = [], set(), 0
+        for row, score in matches:
+            if len(picked) >= self.top_k or used >= self.token_budget:
+                break
+            if row not in messages:
+                continue
+            _, title, _, content, is_user, uid = messages[row]
+            if uid in exclude_uids or content in seen:
+                continue
+            seen.add(content)
+            remaining = self.token_budget - used
+            if estimate_tokens(content) > remaining:
+                content = content[:remaining * CHARS_PER_TOKEN].rstrip() + "…"
+            used += estimate_tokens(content)
+            picked.append((title, bool(is_user), content, score))
+        return picked
+
+    def context_message(self, query, exclude_uids=(), db_handler=None):
+        """System message listing the retrieved messages, or None when nothing relevant was found."""
+        picked = self.retrieve(query, exclude_uids, db_handler)
+        if not picked:
+            return None
+        app_logger.info(f"Retrieved {len(picked)} past messages (best score {picked[0][3]:.2f})")
+        lines = [f"[{title}] {'User' if is_user else 'Assistant'}: {content}" for title, is_user, content, _ in picked]
+        return SystemMessage(content="Relevant messages from earlier conversations:\n" + "\n".join(lines))
@@ -0,0 +1,138 @@
+# semantic_cache.py
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+from handlers.database_handler import DatabaseHandler
+from handlers.embeddings import embed_texts, normalize, DEFAULT_EMBEDDING_MODEL
+from logger import app_logger
+
+DEFAULT_THRESHOLD = 0.92  # Cosine similarity a stored question needs to count as a paraphrase
+DEFAULT_MAX_ENTRIES = 1000  # Per namespace; least recently used entries are evicted beyond this
+
+SemanticHit = namedtuple("SemanticHit", ["content", "score", "vector"])  # content is None on a miss
+
+
+def namespace_key(model, embedding_model):
+    """Answers and vectors are only comparable within one chat model and one embedding model."""
+    return hashlib.sha1(f"{model}\n{embedding_model}".encode('utf-8')).hexdigest()[:16]
+
+
+class VectorNamespace:
+    """Unit-length question vectors of one namespace, persisted as a single .npz file."""
+    __slots__ = ("path", "ids", "vectors")
+
+    def __init__(self, path):
+        self.path = path
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = None
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    self.ids = data['ids']
+                    self.vectors = data['vectors']
+            except Exception as e:
+                app_logger.error(f"Error loading semantic cache index {path}: {str(e)}")
+
+    def search(self, vector):
+        """Best matching entry id and its cosine similarity, or (None, 0.0) when empty."""
+        if self.vectors is None or not len(self.ids) or self.vectors.shape[1] != vector.shape[0]:
+            return None, 0.0
+        scores = self.vectors @ vector
+        best = int(np.argmax(scores))
+        return int(self.ids[best]), float(scores[best])
+
+    def add(self, entry_id, vector):
+        if self.vectors is None or self.vectors.shape[1] != vector.shape[0]:
+            self.ids = np.empty(0, dtype=np.int64)
+            self.vectors = np.empty((0, vector.shape[0]), dtype=np.float32)
+        self.ids = np.append(self.ids, np.int64(entry_id))
+        self.vectors = np.vstack([self.vectors, vector[np.newaxis, :]])
+
+    def remove(self, entry_ids):
+        if self.vectors is None or not entry_ids:
+            return
+        keep = ~np.isin(self.ids, np.asarray(entry_ids, dtype=np.int64))
+        self.ids = self.ids[keep]
+        self.vectors = self.vectors[keep]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, ids=self.ids, vectors=self.vectors if self.vectors is not None else np.empty((0, 0), dtype=np.float32))
+        os.replace(temp_path, self.path)
+
+
+class SemanticCache:
+    """Answers questions that paraphrase earlier ones, matched by embedding similarity per model namespace."""
+
+    def __init__(self, db_path='chat_history.db', threshold=DEFAULT_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES,
+                 embedding_model=DEFAULT_EMBEDDING_MODEL, embed_fn=None):
+        self.index_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'semantic_cache')
+        # Used from ChatThread, so it keeps its own connection next to the GUI's
+        self.db_handler = DatabaseHandler(db_path, check_same_thread=False)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        # Injectable so the cache can run against a fake embedder
+        self.embed_fn = embed_fn or (lambda texts: embed_texts(texts, self.embedding_model))
+        self.namespaces = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, threshold, max_entries, embedding_model):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+
+    def namespace_for(self, model):
+        return namespace_key(model, self.embedding_model)
+
+    def _namespace(self, namespace):
+        if namespace not in self.namespaces:
+            self.namespaces[namespace] = VectorNamespace(os.path.join(self.index_dir, f"{namespace}.npz"))
+        return self.namespaces[namespace]
+
+    def lookup(self, namespace, text):
+        """Embed text and return the stored answer of the most similar question if it clears the threshold."""
+        vector = normalize(self.embed_fn([text]))[0]
+        with self.lock:
+            entry_id, score = self._namespace(namespace).search(vector)
+            content = None
+            if entry_id is not None and score >= self.threshold:
+                content = self.db_handler.get_semantic_cache_entry(entry_id, time.time())
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return SemanticHit(content, score, vector)
+
+    def add(self, namespace, text, content, vector):
+        with self.lock:
+            index = self._namespace(namespace)
+            entry_id = self.db_handler.save_semantic_cache_entry(namespace, text, content, time.time())
+            index.add(entry_id, vector)
+            stale = self.db_handler.get_stale_semantic_cache_entries(namespace, self.max_entries)
+            if stale:
+                self.db_handler.delete_semantic_cache_entries(stale)
+                index.remove(stale)
+            index.save()
+
+    def clear(self):
+        with self.lock:
+            self.db_handler.clear_semantic_cache()
+            for index in self.namespaces.values():
+                index.remove(index.ids.tolist())
+                index.save()
+            self.hits = 0
+            self.misses = 0
+
+    def stats_text(self):
+        return f"Semantic: {self.hits} hits / {self.misses} misses"
+
+    def close(self):
+        self.db_handler.close()
@@ -2,7 +2,12 @@
 import logging
 from PyQt5.QtWidgets import QMessageBox
 import os
+import copy
 import json
+import re
+import atexit
+import tempfile
+import threading
 import appdirs
 from logger import app_logger  # Import the custom logger
 from PyQt5.QtGui import QPalette, QColor
@@ -27,70 +32,383 @@ DEFAULT_SETTINGS = {
     "f16_kv": False,  # Use half-precision for key/value cache
     "logits_all": False,  # Return logits for all tokens
     "vocab_only": False,  # Only return vocabulary
-    "font_size": 12,  # UI font size
+    "num_thread": 0,  # CPU threads used for generation (0 lets Ollama decide)
+    "num_gpu": -1,  # Model layers offloaded to the GPU (-1 lets Ollama decide, 0 runs on the CPU only)
+    "num_batch": 512,  # Prompt tokens processed per batch
+    "use_mmap": True,  # Memory-map the model file instead of reading all of it into RAM
+    "keep_alive": "5m",  # How long Ollama keeps the model loaded after a request
+    "model_profiles": {},  # Per-model values of PROFILE_SETTINGS, by model name
+    "font_size": 13,  # Chat message text size in points
     "theme": "Light",  # UI theme (Light or Dark)
     "max_tokens": 2048,  # Maximum number of tokens to generate
     "stop_sequences": "",  # Sequences to stop generation
     "presence_penalty": 0.0,  # Penalty for token presence in context
     "frequency_penalty": 0.0,  # Penalty for token frequency in context
     "memory_type": "ConversationBufferMemory",  # Type of conversation memory to use
-    "memory_k": 5  # Number of recent conversations to remember
+    "memory_k": 5,  # Number of recent conversations to remember
+    "response_cache_enabled": False,  # Reuse stored replies for identical requests
+    "response_cache_max_mb": 50,  # Size limit of the response cache before old entries are evicted
+    "semantic_cache_enabled": False,  # Answer paraphrased opening questions from earlier replies
+    "semantic_cache_threshold": 0.92,  # Cosine similarity needed for a semantic cache hit
+    "semantic_cache_max_entries": 1000,  # Entries kept per model before old ones are evicted
+    "embedding_model": "nomic-embed-text",  # Ollama model used to embed text
+    "semantic_search_enabled": True,  # Index saved messages so chat search also matches by meaning
+    "retrieval_top_k": 5,  # Past messages RetrievalMemory adds to the prompt
+    "retrieval_token_budget": 512,  # Token limit for the retrieved messages
+    "documents_top_k": 6,  # Excerpts from attached files added to the prompt
+    "documents_token_budget": 1024,  # Token limit for the attached file excerpts
+    "summary_model": ""  # Smaller model for RollingSummaryMemory; empty uses the chat model
 }
 
 
+# Allowed values of settings; the type of every setting is the type of its default
+SETTINGS_SCHEMA = {
+    "temperature": {"min": 0.0, "max": 2.0},
+    "num_ctx": {"min": 1},
+    "top_k": {"min": 1},
+    "top_p": {"min": 0.0, "max": 1.0},
+    "repeat_penalty": {"min": 0.0, "max": 2.0},
+    "repeat_last_n": {"min": 0},
+    "seed": {"min": -1},
+    "num_thread": {"min": 0},
+    "num_gpu": {"min": -1},
+    "num_batch": {"min": 1},
+    # A Go duration ("30s", "10m", "1h30m") or a number of seconds; negative keeps the model loaded
+    "keep_alive": {"pattern": re.compile(r'^-?(\d+|(\d+(\.\d+)?(ms|s|m|h))+)$')},
+    "font_size": {"min": 8, "max": 24},
+    "theme": {"choices": ["Light", "Dark", "System"]},
+    "max_tokens": {"min": 1},
+    "presence_penalty": {"min": -2.0, "max": 2.0},
+    "frequency_penalty": {"min": -2.0, "max": 2.0},
+    "memory_type": {"choices": ["ConversationBufferMemory", "ConversationBufferWindowMemory", "ConversationSummaryMemory",
+                                "RetrievalMemory", "RollingSummaryMemory"]},
+    "memory_k": {"min": 1},
+    "response_cache_max_mb": {"min": 1},
+    "semantic_cache_threshold": {"min": 0.5, "max": 1.0},
+    "semantic_cache_max_entries": {"min": 10},
+    "retrieval_top_k": {"min": 1},
+    "retrieval_token_budget": {"min": 64},
+    "documents_top_k": {"min": 1},
+    "documents_token_budget": {"min": 128},
+}
+
+# Settings a model profile can override: the context size and the runtime options that decide
+# how fast a model runs and how much memory it takes, which differ from model to model
+PROFILE_SETTINGS = ("num_ctx", "max_tokens", "num_thread", "num_gpu", "num_batch", "use_mmap", "keep_alive")
+
+SAVE_DEBOUNCE_SECONDS = 0.5  # Changes within this window are written to disk together
+
+
+def _validate_setting(key, value):
+    """value if it fits the schema, clamped into range if it's a number, else the default"""
+    default = DEFAULT_SETTINGS[key]
+    rules = SETTINGS_SCHEMA.get(key, {})
+    if isinstance(default, bool):
+        valid = isinstance(value, bool)
+    elif isinstance(default, float):
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        value = float(value) if valid else value
+    elif isinstance(default, int):
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, type(default))
+    if valid and "pattern" in rules:
+        valid = rules["pattern"].match(value) is not None
+    if not valid or ("choices" in rules and value not in rules["choices"]):
+        app_logger.warning(f"Invalid value {value!r} for setting '{key}'; using the default {default!r}")
+        return copy.deepcopy(default)
+    if "min" in rules and value < rules["min"]:
+        return rules["min"]
+    if "max" in rules and value > rules["max"]:
+        return rules["max"]
+    return value
+
+
+def validate_settings(settings):
+    """Settings with defaults filled in for missing keys and invalid values replaced.
+
+    Keys this version doesn't know are kept, so a config written by a newer version survives.
+    """
+    validated = dict(settings)
+    for key, default in DEFAULT_SETTINGS.items():
+        # Nested defaults like model_profiles are copied, or editing them would edit DEFAULT_SETTINGS
+        validated[key] = _validate_setting(key, settings[key]) if key in settings else copy.deepcopy(default)
+    validated["model_profiles"] = validate_profiles(validated["model_profiles"])
+    return validated
+
+
+def validate_profiles(profiles):
+    """Model profiles with unknown keys dropped and invalid values replaced"""
+    validated = {}
+    for model, profile in profiles.items():
+        if not isinstance(profile, dict):
+            app_logger.warning(f"Ignoring invalid settings profile for model '{model}'")
+            continue
+        validated[model] = {key: _validate_setting(key, value) for key, value in profile.items() if key in PROFILE_SETTINGS}
+    return validated
+
+
+def model_settings(model=None):
+    """SETTINGS as they apply to model (the current model by default): its profile overrides the global values"""
+    model = model or SETTINGS['model']
+    return {**SETTINGS, **SETTINGS['model_profiles'].get(model, {}), 'model': model}
+
+
 def load_settings():
     """Load settings from the config file or return default settings."""
     try:
         if os.path.exists(CONFIG_FILE):
             with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        return DEFAULT_SETTINGS.copy()
+                settings = json.load(f)
+            if not isinstance(settings, dict):
+                raise ValueError("config file does not hold a settings object")
+            return validate_settings(settings)
+        return copy.deepcopy(DEFAULT_SETTINGS)
     except Exception as e:
         app_logger.error(f"Error loading settings: {str(e)}")
-        return DEFAULT_SETTINGS.copy()
+        return copy.deepcopy(DEFAULT_SETTINGS)
 
-def save_settings(settings):
-    """Save settings to the config file."""
+
+def write_settings_file(path, settings):
+    """Write settings to a temporary file and move it over path, so the file is never half-written"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix="config.", suffix=".tmp", dir=directory)
     try:
-        os.makedirs(CONFIG_DIR, exist_ok=True)
-        with open(CONFIG_FILE, 'w') as f:
+        with os.fdopen(fd, 'w') as f:
             json.dump(settings, f, indent=4)
-        app_logger.info("Settings saved successfully")
-    except Exception as e:
-        app_logger.error(f"Error saving settings: {str(e)}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class SettingsStore:
+    """Writes the config file from a background thread.
+
+    A burst of changes (e.g. scrolling through the model list) becomes one write once changes
+    have stopped for SAVE_DEBOUNCE_SECONDS.
+    """
+
+    def __init__(self, path, debounce=SAVE_DEBOUNCE_SECONDS):
+        self.path = path
+        self.debounce = debounce
+        self._pending = None  # Snapshot waiting to be written
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._changed = threading.Event()
+        self._thread = None
+
+    def save(self, settings):
+        with self._lock:
+            # A deep copy, so later edits on the GUI thread, model_profiles included, can't change what is being written
+            self._pending = copy.deepcopy(settings)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="settings-writer", daemon=True)
+                self._thread.start()
+        self._changed.set()
+
+    def flush(self):
+        """Write pending changes now, e.g. on exit"""
+        self._write_pending()
+
+    def _run(self):
+        while True:
+            self._changed.wait()
+            # Wait for the changes to stop before writing
+            self._changed.clear()
+            while self._changed.wait(self.debounce):
+                self._changed.clear()
+            self._write_pending()
+
+    def _write_pending(self):
+        with self._write_lock:
+            with self._lock:
+                settings, self._pending = self._pending, None
+            if settings is None:
+                return
+            try:
+                write_settings_file(self.path, settings)
+                app_logger.info("Settings saved successfully")
+            except Exception as e:
+                app_logger.error(f"Error saving settings: {str(e)}")
+
+
+# What has to happen for a changed setting to take effect. Settings that are read each time
+# they're used (token budgets, top-k values, the summary model) need nothing.
+RESTYLE = "restyle"
+REBUILD_LLM = "rebuild_llm"
+REBUILD_MEMORY = "rebuild_memory"
+CONTEXT_BUDGET = "context_budget"
+CACHES = "caches"
+HISTORY_INDEX = "history_index"
+ALL_EFFECTS = (RESTYLE, REBUILD_LLM, REBUILD_MEMORY, CONTEXT_BUDGET, CACHES, HISTORY_INDEX)  # In the order they're applied
+
+SETTING_EFFECTS = {
+    "theme": {RESTYLE},
+    "font_size": {RESTYLE},
+    "model": {REBUILD_LLM},
+    "temperature": {REBUILD_LLM},
+    "num_ctx": {REBUILD_LLM},
+    "top_k": {REBUILD_LLM},
+    "top_p": {REBUILD_LLM},
+    "repeat_penalty": {REBUILD_LLM},
+    "repeat_last_n": {REBUILD_LLM},
+    "seed": {REBUILD_LLM},
+    "f16_kv": {REBUILD_LLM},
+    "logits_all": {REBUILD_LLM},
+    "vocab_only": {REBUILD_LLM},
+    "num_thread": {REBUILD_LLM},
+    "num_gpu": {REBUILD_LLM},
+    "num_batch": {REBUILD_LLM},
+    "use_mmap": {REBUILD_LLM},
+    "keep_alive": {REBUILD_LLM},
+    "model_profiles": {REBUILD_LLM},
+    "max_tokens": {REBUILD_LLM},
+    "stop_sequences": {REBUILD_LLM},
+    "presence_penalty": {REBUILD_LLM},
+    "frequency_penalty": {REBUILD_LLM},
+    "memory_type": {REBUILD_MEMORY},
+    "memory_k": {CONTEXT_BUDGET},
+    "response_cache_enabled": {CACHES},
+    "response_cache_max_mb": {CACHES},
+    "semantic_cache_enabled": {CACHES},
+    "semantic_cache_threshold": {CACHES},
+    "semantic_cache_max_entries": {CACHES},
+    "embedding_model": {CACHES, HISTORY_INDEX},
+    "semantic_search_enabled": {HISTORY_INDEX},
+    "retrieval_top_k": set(),
+    "retrieval_token_budget": set(),
+    "documents_top_k": set(),
+    "documents_token_budget": set(),
+    "summary_model": set(),
+}
+
+
+def changed_settings(previous, current):
+    """Keys whose value differs between two settings snapshots"""
+    return {key for key in previous.keys() | current.keys() if previous.get(key) != current.get(key)}
+
+
+def settings_effects(changed):
+    """The effects needed for the changed keys; a key without a mapping gets every effect, to be safe"""
+    effects = set()
+    for key in changed:
+        effects |= SETTING_EFFECTS.get(key, set(ALL_EFFECTS))
+    # ConversationSummaryMemory holds the chat client, so a new client means a new memory
+    if REBUILD_LLM in effects and SETTINGS['memory_type'] == "ConversationSummaryMemory":
+        effects.add(REBUILD_MEMORY)
+    return effects
+
+
+settings_store = SettingsStore(CONFIG_FILE)
+# The writer thread is a daemon, so anything still pending is written on the way out
+atexit.register(settings_store.flush)
+
+
+def save_settings(settings):
+    """Save settings to the config file; the write happens shortly after in the background."""
+    settings_store.save(settings)
+
+
+def flush_settings():
+    settings_store.flush()
 
 # Global settings variable
 SETTINGS = load_settings()
 
+THEME_FILES = {"Light": "styles/light.qss", "Dark": "styles/dark.qss"}
+
+# Window frame rules the dark theme adds on top of its stylesheet
+DARK_FRAME_RULES = """
+QMainWindow {
+    border: 1px solid #45474a;
+}
+QMainWindow::title {
+    background-color: #2d2d2d;
+    color: white;
+}
+"""
+
+_theme_sources = {}  # theme -> stylesheet read from disk
+_compiled_stylesheets = {}  # (theme, font size) -> complete stylesheet
+
+# Message text size; part of the compiled stylesheet so a size change is one restyle like a theme change
+FONT_SIZE_RULE = """
+QTextEdit#messageText {{
+    font-size: {font_size}pt;
+}}
+"""
+
+
+def preload_themes():
+    """Read every theme's stylesheet once, so switching themes never touches the disk"""
+    for theme, path in THEME_FILES.items():
+        if theme not in _theme_sources:
+            with open(path, 'r') as f:
+                _theme_sources[theme] = f.read()
+
+
+def compile_stylesheet(theme, font_size=DEFAULT_SETTINGS['font_size']):
+    """The complete stylesheet of a theme at a message font size, built once"""
+    key = (theme, font_size)
+    if key not in _compiled_stylesheets:
+        preload_themes()
+        stylesheet = _theme_sources[theme]
+        if theme == 'Dark':
+            stylesheet += DARK_FRAME_RULES
+        _compiled_stylesheets[key] = stylesheet + FONT_SIZE_RULE.format(font_size=font_size)
+    return _compiled_stylesheets[key]
+
 class SettingsHandler:
     def __init__(self, app):
         self.app = app
 
     def load_stylesheet(self):
-        """Load the appropriate stylesheet based on the current theme."""
+        """Apply the current theme: its precompiled stylesheet plus the matching window palette."""
         try:
             theme = 'dark' if SETTINGS['theme'] == 'Dark' else 'light'
-            with open(f'styles/{theme}.qss', 'r') as f:
-                stylesheet = f.read()
-            self.app.setStyleSheet(stylesheet)
+            stylesheet = compile_stylesheet(theme.capitalize(), SETTINGS['font_size'])
+            # Every setStyleSheet call re-polishes every widget in the transcript, so the whole
+            # theme goes in with one call, and none at all when it's unchanged
+            if self.app.styleSheet() != stylesheet:
+                self.app.setStyleSheet(stylesheet)
+            self.set_window_frame_color()
             app_logger.info(f"Loaded {theme} stylesheet")
             self.add_system_message(f"Theme changed to {theme} mode. Your eyes will thank you!")
         except Exception as e:
             app_logger.error(f"Error loading stylesheet: {str(e)}")
             self.add_system_message("Oops! We couldn't change the theme. Don't worry, the app will still work fine!")
 
-    def apply_settings(self):
-        """Apply the current settings to the application."""
+    def apply_settings(self, previous=None):
+        """Apply the settings that changed since previous (a snapshot of SETTINGS); everything if it's None."""
         try:
-            self.app.setStyleSheet(f"font-size: {SETTINGS['font_size']}px;")
-            self.load_stylesheet()
-            self.set_window_frame_color()
-            if hasattr(self.app, 'model_handler'):
+            if previous is None:
+                effects = set(ALL_EFFECTS)
+            else:
+                changed = changed_settings(previous, SETTINGS)
+                effects = settings_effects(changed)
+                app_logger.info(f"Changed settings: {', '.join(sorted(changed)) or 'none'}; effects: {', '.join(sorted(effects)) or 'none'}")
+            if RESTYLE in effects:
+                self.load_stylesheet()
+            if REBUILD_LLM in effects and hasattr(self.app, 'model_handler'):
                 self.app.model_handler.change_model()
-            if hasattr(self.app, 'memory_handler'):
+                self.add_system_message(f"Great news! We're now using the {SETTINGS['model']} model. It's like upgrading your brain!")
+            if REBUILD_MEMORY in effects and hasattr(self.app, 'memory_handler'):
                 self.app.memory_handler.update_memory_settings()
-            self.add_system_message(f"Great news! We're now using the {SETTINGS['model']} model. It's like upgrading your brain!")
-            self.add_system_message(f"Font size is set to {SETTINGS['font_size']}. If it's too small, you can change it in the settings!")
+            elif CONTEXT_BUDGET in effects and hasattr(self.app, 'memory_handler'):
+                self.app.memory_handler.update_memory_window()
+            if hasattr(self.app, 'chat_handler'):
+                if CACHES in effects:
+                    self.app.chat_handler.update_cache_settings()
+                if HISTORY_INDEX in effects:
+                    self.app.chat_handler.update_history_index_settings()
+                if REBUILD_MEMORY in effects or CONTEXT_BUDGET in effects:
+                    # A smaller window may leave turns for the rolling summary to fold in
+                    self.app.chat_handler.schedule_summary()
             app_logger.info("Settings applied successfully")
             self.add_system_message("All your settings have been applied successfully. Happy chatting!")
         except Exception as e:
@@ -106,17 +424,8 @@ class SettingsHandler:
             app_logger.info(f"System message (not displayed): {message}")
 
     def set_window_frame_color(self):
-        """Set the window frame color based on the current theme."""
+        """Set the window frame color based on the current theme; the frame rules are part of the compiled stylesheet."""
         if SETTINGS['theme'] == 'Dark':
-            self.app.setStyleSheet(self.app.styleSheet() + """
-                QMainWindow {
-                    border: 1px solid #45474a;
-                }
-                QMainWindow::title {
-                    background-color: #2d2d2d;
-                    color: white;
-                }
-            """)
             # Set the window frame to dark
             palette = QPalette()
             palette.setColor(QPalette.Window, QColor(45, 45, 45))
@@ -124,15 +433,6 @@ class SettingsHandler:
             self.app.setPalette(palette)
         else:
             # Reset to default light theme
-            self.app.setStyleSheet(self.app.styleSheet().replace("""
-                QMainWindow {
-                    border: 1px solid #45474a;
-                }
-                QMainWindow::title {
-                    background-color: #2d2d2d;
-                    color: white;
-                }
-            """, ""))
             self.app.setPalette(self.app.style().standardPalette())
         
         app_logger.info(f"Window frame color set to {SETTINGS['theme']} mode")
@@ -141,9 +441,10 @@ class SettingsHandler:
     def toggle_dark_mode(self):
         """Toggle between light and dark mode."""
         try:
+            previous = copy.deepcopy(SETTINGS)
             SETTINGS['theme'] = 'Light' if SETTINGS['theme'] == 'Dark' else 'Dark'
             save_settings(SETTINGS)
-            self.apply_settings()
+            self.apply_settings(previous)
             app_logger.info(f"Toggled to {SETTINGS['theme']} mode")
             self.add_system_message(f"Switched to {SETTINGS['theme']} mode. How's the view?")
         except Exception as e:
@@ -156,8 +457,8 @@ class SettingsHandler:
         try:
             from widgets.settings import SettingsDialog
             settings_dialog = SettingsDialog(self.app)
-            if settings_dialog.exec_():
-                self.apply_settings()
+            # The dialog applies what changed when it is accepted
+            settings_dialog.exec_()
             app_logger.info("Settings dialog opened and closed")
             self.add_system_message("Settings updated! Feel free to tweak them anytime to make the app work best for you.")
         except Exception as e:
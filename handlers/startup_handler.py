@@ -0,0 +1,136 @@
+# startup_handler.py
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+from utility import Utility
+from logger import app_logger
+
+# Modules that dominate cold start; they are imported off the GUI thread after the window is shown
+HEAVY_MODULES = [
+    "langchain_core.messages",
+    "langchain_core.callbacks",
+    "langchain_core.prompts",
+    "langchain.memory",
+    "langchain_community.chat_models",
+    "numpy",
+]
+
+# Stages run in this order; each one reports started/finished/failed to the GUI
+STAGES = ["imports", "database", "server", "catalog", "warmup"]
+
+STAGE_LABELS = {
+    "imports": "Loading chat engine...",
+    "database": "Opening chat history...",
+    "server": "Connecting to Ollama...",
+    "catalog": "Loading model catalog...",
+    "warmup": "Warming up the model...",
+}
+
+MODELS_FILE = os.path.join('data', 'models.json')
+SERVER_START_TIMEOUT = 15  # Seconds to wait for a freshly spawned Ollama service (Windows)
+WARMUP_TIMEOUT = 300  # Loading a large model from disk can take minutes
+
+
+class StartupPipeline(QThread):
+    """Runs slow startup work in the background and reports staged readiness to the GUI."""
+    stage_started = pyqtSignal(str)
+    stage_finished = pyqtSignal(str, object)
+    stage_failed = pyqtSignal(str, str)
+    model_reachable = pyqtSignal(str)
+
+    def __init__(self, model, db_path='chat_history.db', options=None, keep_alive=None):
+        super().__init__()
+        self.model = model
+        self.options = options  # Load options; warming up with other values than chat requests use would load the model twice
+        self.keep_alive = keep_alive
+        self.db_path = db_path
+        self.server_up = False
+        self.installed_models = []
+
+    def run(self):
+        for stage in STAGES:
+            self.stage_started.emit(stage)
+            try:
+                result = getattr(self, f"_stage_{stage}")()
+                self.stage_finished.emit(stage, result)
+            except Exception as e:
+                app_logger.error(f"Startup stage '{stage}' failed: {str(e)}")
+                self.stage_failed.emit(stage, str(e))
+
+    def _stage_imports(self):
+        start = time.perf_counter()
+        for module in HEAVY_MODULES:
+            importlib.import_module(module)
+        elapsed = time.perf_counter() - start
+        app_logger.info(f"Background imports finished in {elapsed:.2f}s")
+        return elapsed
+
+    def _stage_database(self):
+        from handlers.database_handler import DatabaseHandler
+        db_handler = DatabaseHandler(self.db_path, check_same_thread=False)
+        return {"db_handler": db_handler, "chat_list": db_handler.get_chat_list()}
+
+    def _stage_server(self):
+        try:
+            version = Utility.ollama_request('/api/version', timeout=2).get('version')
+        except Exception:
+            if not sys.platform.startswith('win'):
+                raise
+            version = self._start_windows_service()
+        self.server_up = True
+        self.model_reachable.emit(self.model)
+        return version
+
+    def _start_windows_service(self):
+        # `ollama list` starts the background service on Windows if it is not running yet
+        subprocess.Popen(['powershell', '-Command', 'ollama list'], creationflags=subprocess.CREATE_NO_WINDOW)
+        deadline = time.time() + SERVER_START_TIMEOUT
+        while True:
+            try:
+                return Utility.ollama_request('/api/version', timeout=2).get('version')
+            except Exception:
+                if time.time() > deadline:
+                    raise
+                time.sleep(1)
+
+    def _stage_catalog(self):
+        with open(MODELS_FILE, 'r') as f:
+            models = json.load(f)
+        if self.server_up:
+            try:
+                self.installed_models = [model['name'] for model in Utility.ollama_request('/api/tags').get('models', [])]
+            except Exception as e:
+                app_logger.error(f"Error listing installed models: {str(e)}")
+            # Installed models the bundled catalog doesn't know about go first
+            models = [name for name in self.installed_models if name not in models] + models
+        return {"models": models, "installed": self.installed_models, "context_length": self._context_length()}
+
+    def _context_length(self):
+        """The startup model's context length, read here so the GUI thread never waits for /api/show"""
+        if not self.server_up or (self.installed_models and self.model not in self.installed_models):
+            return None
+        from handlers.model_handler import fetch_context_length
+        try:
+            return fetch_context_length(self.model)
+        except Exception as e:
+            app_logger.error(f"Error reading /api/show for {self.model}: {str(e)}")
+            return None
+
+    def _stage_warmup(self):
+        if not self.server_up:
+            raise RuntimeError("Ollama server is not reachable")
+        if self.installed_models and self.model not in self.installed_models:
+            raise RuntimeError(f"Model {self.model} is not installed")
+        start = time.perf_counter()
+        # A generate request without a prompt just loads the model into memory
+        request = {"model": self.model}
+        if self.options:
+            request["options"] = self.options
+        if self.keep_alive is not None:
+            request["keep_alive"] = self.keep_alive
+        Utility.ollama_request('/api/generate', request, timeout=WARMUP_TIMEOUT)
+        return time.perf_counter() - start
@@ -0,0 +1,57 @@
+# summary_memory.py
+from langchain_core.messages import HumanMessage, SystemMessage
+from PyQt5.QtCore import QThread, pyqtSignal
+from handlers.database_handler import DatabaseHandler
+from logger import app_logger
+
+ROLLING_SUMMARY_MEMORY = "RollingSummaryMemory"
+MIN_MESSAGES_TO_FOLD = 2  # Summarize once at least a whole turn has left the window
+
+SUMMARY_PROMPT = """Progressively summarize the conversation, adding onto the previous summary and returning a new summary.
+Keep names, numbers, decisions and open questions; drop pleasantries. Reply with the summary only.
+
+Previous summary:
+{summary}
+
+New lines of conversation:
+{lines}
+
+New summary:"""
+
+
+def format_lines(messages):
+    return "\n".join(f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}" for message in messages)
+
+
+def summary_message(summary):
+    return SystemMessage(content=f"Summary of the earlier part of this conversation:\n{summary}")
+
+
+class SummaryThread(QThread):
+    """Folds messages that left the memory window into a chat's rolling summary and caches it in SQLite."""
+    summary_ready = pyqtSignal(int, str, str)  # chat id, summary, uid of the last message it covers
+    summary_failed = pyqtSignal(int, str)
+
+    def __init__(self, chat_id, previous_summary, messages, llm, db_path='chat_history.db'):
+        super().__init__()
+        self.chat_id = chat_id
+        self.previous_summary = previous_summary
+        self.messages = list(messages)
+        self.llm = llm
+        self.db_path = db_path
+
+    def run(self):
+        try:
+            prompt = SUMMARY_PROMPT.format(summary=self.previous_summary or "(none yet)", lines=format_lines(self.messages))
+            summary = self.llm.invoke([HumanMessage(content=prompt)]).content.strip()
+            covered_uid = self.messages[-1].id
+            # SQLite connections can't cross threads, so the worker opens its own
+            db_handler = DatabaseHandler(self.db_path)
+            try:
+                db_handler.save_chat_summary(self.chat_id, summary, covered_uid, getattr(self.llm, 'model', None))
+            finally:
+                db_handler.close()
+            self.summary_ready.emit(self.chat_id, summary, covered_uid)
+        except Exception as e:
+            app_logger.error(f"Error summarizing chat {self.chat_id}: {str(e)}")
+            self.summary_failed.emit(self.chat_id, str(e))
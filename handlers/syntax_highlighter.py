@@ -0,0 +1,231 @@
+# syntax_highlighter.py
+import hashlib
+import html
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from PyQt5.QtCore import QThread, pyqtSignal
+from logger import app_logger
+
+HIGHLIGHT_CACHE_SIZE = 512  # Highlighted code blocks kept in memory
+TOKENS_PER_CHUNK = 2000  # The worker yields to the GUI thread between chunks of this many tokens
+
+# Colours read on both the light and the dark theme
+TOKEN_COLORS = {
+    'comment': '#6a9955',
+    'string': '#ce9178',
+    'number': '#b5a33a',
+    'keyword': '#569cd6',
+    'builtin': '#4ec9b0',
+}
+
+C_FAMILY_KEYWORDS = """
+    auto break case catch class const continue default delete do else enum extern false final for friend goto if
+    import include inline interface namespace new null nullptr override package private protected public return
+    sizeof static struct super switch template this throw true try typedef typename union using virtual void
+    volatile while int long short char float double bool boolean byte signed unsigned string var let fn func mut
+    impl trait pub use mod match loop where self Self go defer chan map range select type struct async await
+    yield extends implements instanceof abstract synchronized lambda val fun when object in is as out ref
+""".split()
+
+LANGUAGES = {
+    'python': {
+        'keywords': """False None True and as assert async await break class continue def del elif else except finally
+            for from global if import in is lambda nonlocal not or pass raise return try while with yield match case""".split(),
+        'builtins': """print len range dict list set tuple str int float bool open enumerate zip map filter sorted
+            isinstance super self cls min max sum any all type object Exception""".split(),
+        'line_comment': '#',
+        'block_comment': None,
+        'strings': r'[rbfuRBFU]{0,2}(?:"""[\s\S]*?(?:"""|\Z)|\'\'\'[\s\S]*?(?:\'\'\'|\Z)|"(?:\\.|[^"\\\n])*"?|\'(?:\\.|[^\'\\\n])*\'?)',
+    },
+    'javascript': {
+        'keywords': """async await break case catch class const continue debugger default delete do else export extends
+            false finally for from function if import in instanceof let new null of return static super switch this
+            throw true try typeof undefined var void while with yield interface type enum implements readonly""".split(),
+        'builtins': "console window document Array Object String Number Promise JSON Math Map Set Error".split(),
+        'line_comment': '//',
+        'block_comment': ('/*', '*/'),
+        'strings': r'"(?:\\.|[^"\\\n])*"?|\'(?:\\.|[^\'\\\n])*\'?|`(?:\\.|[^`\\])*`?',
+    },
+    'c': {
+        'keywords': C_FAMILY_KEYWORDS,
+        'builtins': "printf std cout cin endl vector String System println Println fmt main".split(),
+        'line_comment': '//',
+        'block_comment': ('/*', '*/'),
+        'strings': r'"(?:\\.|[^"\\\n])*"?|\'(?:\\.|[^\'\\\n])*\'?',
+    },
+    'shell': {
+        'keywords': """if then else elif fi for while until do done case esac function in return export local
+            echo exit source alias unset set shift""".split(),
+        'builtins': "cd ls grep sed awk cat pip python git sudo apt mkdir rm cp mv curl chmod".split(),
+        'line_comment': '#',
+        'block_comment': None,
+        'strings': r'"(?:\\.|[^"\\])*"?|\'[^\']*\'?',
+    },
+    'sql': {
+        'keywords': """select from where insert into values update set delete create table drop alter index join left right
+            inner outer on group by order having limit offset as and or not null is in exists distinct union all
+            primary key foreign references default case when then else end begin commit""".split(),
+        'builtins': "count sum avg min max coalesce integer text real blob varchar".split(),
+        'line_comment': '--',
+        'block_comment': ('/*', '*/'),
+        'strings': r"'(?:''|[^'])*'?",
+        'ignore_case': True,
+    },
+    'json': {
+        'keywords': "true false null".split(),
+        'builtins': [],
+        'line_comment': None,
+        'block_comment': None,
+        'strings': r'"(?:\\.|[^"\\\n])*"?',
+    },
+}
+
+LANGUAGE_ALIASES = {
+    'py': 'python', 'python3': 'python',
+    'js': 'javascript', 'jsx': 'javascript', 'ts': 'javascript', 'tsx': 'javascript', 'typescript': 'javascript',
+    'cpp': 'c', 'c++': 'c', 'h': 'c', 'hpp': 'c', 'java': 'c', 'cs': 'c', 'csharp': 'c', 'c#': 'c', 'go': 'c',
+    'rust': 'c', 'rs': 'c', 'kotlin': 'c', 'swift': 'c', 'dart': 'c', 'php': 'c',
+    'sh': 'shell', 'bash': 'shell', 'zsh': 'shell', 'console': 'shell',
+}
+
+
+def resolve_language(language):
+    """Name of the tokenizer for a code fence's language tag, or None if it isn't supported"""
+    language = (language or '').lower()
+    language = LANGUAGE_ALIASES.get(language, language)
+    return language if language in LANGUAGES else None
+
+
+def _compile(spec):
+    parts, comments = [], []
+    if spec['block_comment']:
+        start, end = (re.escape(mark) for mark in spec['block_comment'])
+        comments.append(rf'{start}[\s\S]*?(?:{end}|\Z)')
+    if spec['line_comment']:
+        comments.append(rf'{re.escape(spec["line_comment"])}[^\n]*')
+    if comments:
+        parts.append(f'(?P<comment>{"|".join(comments)})')
+    parts.append(rf'(?P<string>{spec["strings"]})')
+    parts.append(r'(?P<number>\b(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)\b)')
+    parts.append(r'(?P<word>[A-Za-z_]\w*)')
+    return re.compile('|'.join(parts), re.MULTILINE)
+
+
+_PATTERNS = {}
+
+
+def _pattern(language):
+    if language not in _PATTERNS:
+        spec = LANGUAGES[language]
+        fold = str.lower if spec.get('ignore_case') else (lambda word: word)
+        _PATTERNS[language] = (_compile(spec), fold, {fold(w) for w in spec['keywords']}, {fold(w) for w in spec['builtins']})
+    return _PATTERNS[language]
+
+
+def highlight_key(language, code):
+    return language, hashlib.sha1(code.encode('utf-8')).hexdigest()
+
+
+def iter_highlighted(code, language):
+    """Yields escaped HTML pieces of highlighted code, one chunk of tokens at a time"""
+    pattern, fold, keywords, builtins = _pattern(language)
+    pieces, position, tokens = [], 0, 0
+    for match in pattern.finditer(code):
+        kind = match.lastgroup
+        if kind == 'word':
+            word = fold(match.group())
+            kind = 'keyword' if word in keywords else 'builtin' if word in builtins else None
+            if kind is None:
+                continue
+        pieces.append(html.escape(code[position:match.start()]))
+        pieces.append(f'<span style="color: {TOKEN_COLORS[kind]};">{html.escape(match.group())}</span>')
+        position = match.end()
+        tokens += 1
+        if tokens % TOKENS_PER_CHUNK == 0:
+            yield "".join(pieces)
+            pieces = []
+    pieces.append(html.escape(code[position:]))
+    yield "".join(pieces)
+
+
+class HighlightCache:
+    """Highlighted code blocks by (language, content hash); shared by the GUI thread and the worker."""
+
+    def __init__(self, max_entries=HIGHLIGHT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+highlight_cache = HighlightCache()
+
+
+def cached_highlight(code, language):
+    """Highlighted HTML of a code block if it is ready, else None"""
+    language = resolve_language(language)
+    if language is None:
+        return None
+    return highlight_cache.get(highlight_key(language, code))
+
+
+class HighlightThread(QThread):
+    """Tokenizes code blocks off the GUI thread and fills the highlight cache."""
+    highlighted = pyqtSignal(object)  # (language, content hash) now in the cache
+
+    def __init__(self):
+        super().__init__()
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._stop_event = threading.Event()
+
+    def submit(self, code, language):
+        """Queue a block for highlighting; returns its cache key, or None if the language isn't supported"""
+        language = resolve_language(language)
+        if language is None:
+            return None
+        key = highlight_key(language, code)
+        if key not in self._queued and highlight_cache.get(key) is None:
+            self._queued.add(key)
+            self._queue.put((key, code))
+        return key
+
+    def stop(self):
+        self._stop_event.set()
+        self._queue.put(None)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            item = self._queue.get()
+            if item is None:
+                break
+            key, code = item
+            try:
+                pieces = []
+                for piece in iter_highlighted(code, key[0]):
+                    if self._stop_event.is_set():
+                        return
+                    pieces.append(piece)
+                    time.sleep(0)  # Let the GUI thread have the interpreter between chunks
+                highlight_cache.put(key, f'<pre><code>{"".join(pieces)}</code></pre>')
+                self.highlighted.emit(key)
+            except Exception as e:
+                app_logger.error(f"Error highlighting {key[0]} code: {str(e)}")
+            finally:
+                self._queued.discard(key)
@@ -1,9 +1,7 @@
 # ui_handler.py
 import logging
 from PyQt5.QtWidgets import QDesktopWidget, QMessageBox, QHBoxLayout, QWidget, QSizePolicy
-from handlers.settings_handler import SETTINGS
 from widgets.message_widget import MessageWidget
-from langchain_core.messages import HumanMessage, AIMessage
 from logger import app_logger
 
 class UIHandler:
@@ -38,6 +36,16 @@ class UIHandler:
             app_logger.error(f"Error showing system info: {str(e)}")
             self._show_error_message("Failed to show system info", str(e))
 
+    def show_performance_dashboard(self):
+        try:
+            from widgets.performance_dashboard import PerformanceDashboardDialog
+            dashboard = PerformanceDashboardDialog(self.app.chat_handler.db_handler, self.app)
+            dashboard.exec_()
+            app_logger.info("Performance dashboard displayed")
+        except Exception as e:
+            app_logger.error(f"Error showing performance dashboard: {str(e)}")
+            self._show_error_message("Failed to show performance dashboard", str(e))
+
     def show_about(self):
         try:
             about_text = (
@@ -59,15 +67,18 @@ class UIHandler:
             app_logger.error(f"Error showing about dialog: {str(e)}")
             self._show_error_message("Failed to show about dialog", str(e))
 
-    def add_message(self, content, is_user=True, message_id=None, add_to_memory=True):
-        message_widget = MessageWidget(content, is_user, self.app, message_id)
+    def add_message(self, content, is_user=True, message_id=None, add_to_memory=True, html=None):
+        message_widget = MessageWidget(content, is_user, self.app, message_id, html)
         self.app.chat_handler.add_message_widget(message_widget)
+        if html is None:
+            # A cached render already has its code highlighted
+            self.app.chat_handler.highlight_code(message_widget)
         if add_to_memory:
-            if is_user:
-                self.app.memory_handler.memory.chat_memory.add_user_message(content)
-            else:
-                self.app.memory_handler.memory.chat_memory.add_ai_message(content)
+            message = self._create_message_object(content, is_user)
+            message.id = message_widget.message_id
+            self.app.memory_handler.store.add_message(message)
         self.app.chat_handler.scroll_to_bottom()
+        return message_widget
 
     def _create_message_container(self, msg_widget, is_user):
         hbox = QHBoxLayout()
@@ -85,6 +96,7 @@ class UIHandler:
         return container
 
     def _create_message_object(self, message, is_user):
+        from langchain_core.messages import HumanMessage, AIMessage
         return HumanMessage(content=message) if is_user else AIMessage(content=message)
 
     def _scroll_to_bottom(self):
@@ -92,9 +104,5 @@ class UIHandler:
         scrollbar = self.app.ui.chatScrollArea.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
-    def _update_message_font_size(self, msg_widget):
-        # $ Stylesheet: Message font size
-        msg_widget.text.setStyleSheet(f"font-size: {SETTINGS['font_size']}px;")
-
     def _show_error_message(self, title, error_message):
         QMessageBox.critical(self.app, "Error", f"{title}: {error_message}")
\ No newline at end of file
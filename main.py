@@ -1,59 +1,205 @@
 # main.py
 import sys
-from PyQt5.QtWidgets import QApplication, QMessageBox
-from handlers.settings_handler import SettingsHandler
-from PyQt5.QtWidgets import QMainWindow, QMessageBox
+from PyQt5.QtWidgets import QApplication, QMessageBox, QSplashScreen
+from handlers.settings_handler import SettingsHandler, SETTINGS, flush_settings, model_settings
+from PyQt5.QtWidgets import QMainWindow, QMessageBox, QLabel
 from PyQt5 import QtCore
-from PyQt5.QtCore import Qt, QEvent
+from PyQt5.QtCore import Qt, QEvent, QTimer
 from views.main_window_ui import Ui_MainWindow
-from handlers.settings_handler import SettingsHandler
-from handlers.model_handler import ModelHandler
-from handlers.memory_handler import MemoryHandler
-from handlers.chat_handler import ChatHandler, StreamHandler
 from handlers.ui_handler import UIHandler
-from utility import Utility
-from langchain.prompts import PromptTemplate
+from handlers.startup_handler import StartupPipeline, STAGE_LABELS
 from logger import app_logger
 import os
-import subprocess
-from PyQt5.QtGui import QIcon
+from PyQt5.QtGui import QIcon, QPixmap, QColor
 
-if sys.platform.startswith('win'):
-    try:
-        subprocess.Popen(['powershell', '-Command', 'ollama list'], creationflags=subprocess.CREATE_NO_WINDOW)
-    except Exception as e:
-        app_logger.error(f"Failed to start Ollama: {str(e)}")
-        QMessageBox.warning(None, "Warning", f"Failed to start Ollama: {str(e)}\nPlease ensure Ollama is installed and accessible from PowerShell.")
+# LangChain, the Ollama client and the chat/model/memory handlers are imported lazily in
+# ChatbotApp.initialize_deferred_handlers, after the main window is on screen.
 
 class ChatbotApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
+        self.llm = None
+        self.handlers_ready = False
+        self.db_ready = False  # Set once the chat handler has the database and its request queue
         self.initialize_handlers()
-        self.initialize_prompt_template()
         self.initUI()
         self.set_app_icon()  # Add this line
+        # Slow startup work runs once the event loop is running and the window has painted
+        QTimer.singleShot(0, self.start_startup_pipeline)
 
     def initialize_handlers(self):
+        """Build the handlers needed to paint the window; everything else is deferred."""
         try:
             self.settings_handler = SettingsHandler(self)
+            # The theme lives on the main window (dialogs inherit it); restyling the window is much
+            # cheaper than restyling the whole application when the theme changes
+            self.settings_handler.load_stylesheet()
             self.ui_handler = UIHandler(self)
+            self.setup_input_field()
+            self.set_input_enabled(False)
+            self.ui_handler.add_system_message("Starting up... the chat will be ready in a moment.")
+            app_logger.info("Core handlers initialized successfully")
+        except Exception as e:
+            app_logger.error(f"Error initializing handlers: {str(e)}", exc_info=True)
+            self.show_error_message("Failed to initialize handlers", str(e))
+
+    def start_startup_pipeline(self):
+        self.splash = self.create_splash()
+        from handlers.model_handler import load_options, keep_alive_value
+        settings = model_settings()
+        self.startup_pipeline = StartupPipeline(SETTINGS['model'], options=load_options(settings),
+                                                keep_alive=keep_alive_value(settings['keep_alive']))
+        self.startup_pipeline.stage_started.connect(self.on_startup_stage_started)
+        self.startup_pipeline.stage_finished.connect(self.on_startup_stage_finished)
+        self.startup_pipeline.stage_failed.connect(self.on_startup_stage_failed)
+        self.startup_pipeline.model_reachable.connect(self.on_model_reachable)
+        self.startup_pipeline.finished.connect(self.close_splash)
+        self.startup_pipeline.start()
+
+    def create_splash(self):
+        pixmap = QPixmap(360, 120)
+        pixmap.fill(QColor("#2d2d2d") if SETTINGS['theme'] == 'Dark' else QColor("#f5f5f5"))
+        splash = QSplashScreen(pixmap, Qt.WindowStaysOnTopHint)
+        splash.show()
+        return splash
+
+    def show_startup_message(self, message):
+        if self.splash is not None:
+            color = Qt.white if SETTINGS['theme'] == 'Dark' else Qt.black
+            self.splash.showMessage(f"Ollama Chatbot\n\n{message}", Qt.AlignCenter, color)
+        self.ui_handler.add_system_message(message)
+
+    def close_splash(self):
+        if self.splash is not None:
+            self.splash.finish(self)
+            self.splash = None
+
+    def on_startup_stage_started(self, stage):
+        self.show_startup_message(STAGE_LABELS[stage])
+        if stage == "warmup" and getattr(self, 'health_monitor', None):
+            self.health_monitor.expect_model(SETTINGS['model'])
+
+    def on_startup_stage_finished(self, stage, result):
+        app_logger.info(f"Startup stage '{stage}' finished")
+        if stage == "warmup" and getattr(self, 'health_monitor', None):
+            self.health_monitor.clear_expected_model()
+        if stage == "imports":
+            self.initialize_deferred_handlers()
+        elif not self.handlers_ready:
+            return
+        elif stage == "database":
+            self.chat_handler.attach_database(result["db_handler"], result["chat_list"])
+            self.db_ready = True
+            # The server may already have been reported up while the database was still opening
+            if getattr(self, 'health_monitor', None) and self.health_monitor.is_up:
+                self.set_input_enabled(True)
+        elif stage == "catalog":
+            if result["context_length"] is not None:
+                self.model_handler.set_context_length(self.startup_pipeline.model, result["context_length"])
+            self.model_handler.populate_models(result["models"])
+        elif stage == "warmup":
+            self.ui_handler.add_system_message(f"{SETTINGS['model']} is loaded and warmed up ({result:.1f}s). Fire away!")
+
+    def on_startup_stage_failed(self, stage, error):
+        if stage == "warmup" and getattr(self, 'health_monitor', None):
+            self.health_monitor.clear_expected_model()
+        if stage == "imports":
+            self.close_splash()
+            self.show_error_message("Failed to load the chat engine", error)
+        elif stage == "server":
+            self.close_splash()
+            self.ui_handler.add_system_message("I can't reach Ollama yet. Please make sure it's installed and running.")
+        elif stage == "catalog" and self.handlers_ready:
+            self.model_handler.populate_models(None)
+        elif stage == "database":
+            self.show_error_message("Failed to open chat history", error)
+
+    def on_model_reachable(self, model):
+        if self.handlers_ready and self.db_ready:
+            self.set_input_enabled(True)
+            self.ui.inputField.setFocus()
+        self.close_splash()
+        app_logger.info(f"Ollama is reachable; input enabled for {model}")
+
+    def initialize_deferred_handlers(self):
+        """Construct the LangChain-backed handlers; their imports are cache hits by now."""
+        try:
+            from handlers.chat_handler import ChatHandler
+            from handlers.model_handler import ModelHandler
+            from handlers.memory_handler import MemoryHandler
+
             self.chat_handler = ChatHandler(self)  # Move this up
             self.model_handler = ModelHandler(self)
             self.memory_handler = MemoryHandler(self)
-            self.setup_input_field()
+            self.setup_resource_monitor()
+            self.setup_health_monitor()
+            self.initialize_prompt_template()
+            self.connect_ui_elements()
+
+            # Initialize the model
+            self.model_handler.change_model()
+
+            self.handlers_ready = True
             app_logger.info("Handlers initialized successfully")
         except Exception as e:
             app_logger.error(f"Error initializing handlers: {str(e)}", exc_info=True)
             self.show_error_message("Failed to initialize handlers", str(e))
 
+    def set_input_enabled(self, enabled):
+        self.ui.inputField.setEnabled(enabled)
+        self.ui.sendButton.setEnabled(enabled)
+
+    def setup_resource_monitor(self):
+        from handlers.resource_monitor import ResourceSampler
+        from widgets.resource_monitor import ResourceMonitorPanel
+
+        self.resource_sampler = ResourceSampler()
+        self.resource_monitor_panel = ResourceMonitorPanel(self.resource_sampler, self)
+        index = self.ui.verticalLayout.indexOf(self.ui.systemMessageLabel)
+        self.ui.verticalLayout.insertWidget(index, self.resource_monitor_panel)
+        self.resource_sampler.start()
+
+    def setup_health_monitor(self):
+        from handlers.health_monitor import HealthMonitor
+
+        self.health_label = QLabel()
+        self.health_label.setObjectName("healthLabel")
+        self.ui.topBarLayout.addWidget(self.health_label)
+        self.health_monitor = HealthMonitor()
+        self.health_monitor.state_changed.connect(self.on_server_state_changed)
+        self.health_monitor.state_changed.connect(self.chat_handler.on_server_state_changed)
+        self.health_monitor.start()
+
+    def on_server_state_changed(self, state, details):
+        from handlers.health_monitor import SERVER_UP, SERVER_LOADING
+        if state == SERVER_UP:
+            loaded = ", ".join(details.get("loaded_models") or []) or "no model loaded"
+            self.health_label.setText(f"<span style='color:#2ecc71'>●</span> Ollama {details.get('version', '')} · {loaded}")
+        elif state == SERVER_LOADING:
+            self.health_label.setText(f"<span style='color:#f1c40f'>●</span> Loading {details.get('loading_model')}...")
+        else:
+            self.health_label.setText(f"<span style='color:#e74c3c'>●</span> Ollama unreachable · retrying in {details.get('retry_in', 0):.0f}s")
+        if state in (SERVER_UP, SERVER_LOADING) and self.handlers_ready and self.db_ready:
+            self.set_input_enabled(True)
+
+    def closeEvent(self, event):
+        for worker in (getattr(self, 'resource_sampler', None), getattr(self, 'health_monitor', None)):
+            if worker is not None:
+                worker.stop()
+                worker.wait(3000)
+        if self.handlers_ready:
+            self.chat_handler.stop_background_work(3000)
+        flush_settings()
+        super().closeEvent(event)
+
     def setup_input_field(self):
         self.ui.inputField.installEventFilter(self)
         self.ui.inputField.setAcceptRichText(False)
 
     def eventFilter(self, obj, event):
-        if obj == self.ui.inputField and event.type() == QEvent.KeyPress:
+        if obj == self.ui.inputField and event.type() == QEvent.KeyPress and self.handlers_ready:
             if event.key() in (Qt.Key_Return, Qt.Key_Enter):
                 if event.modifiers() & Qt.ShiftModifier:
                     # Shift+Enter: insert a new line
@@ -67,6 +213,7 @@ class ChatbotApp(QMainWindow):
 
     def initialize_prompt_template(self):
         try:
+            from langchain_core.prompts import PromptTemplate
             self.prompt_template = PromptTemplate(
                 input_variables=["input"],
                 template="You are a helpful AI assistant. {input}"
@@ -83,12 +230,6 @@ class ChatbotApp(QMainWindow):
             self.resize(1000, 900)
             self.ui_handler.center()
 
-            # Connect UI elements to their respective handlers
-            self.connect_ui_elements()
-
-            # Initialize the model
-            self.model_handler.change_model()
-
             app_logger.info("UI initialized successfully")
         except Exception as e:
             app_logger.error(f"Error in initUI: {str(e)}", exc_info=True)
@@ -102,6 +243,9 @@ class ChatbotApp(QMainWindow):
         # Connect menu actions
         self.ui.actionClear_Chat_History.triggered.connect(self.chat_handler.clear_chat_list)
         self.ui.actionExportChat.triggered.connect(self.chat_handler.export_chat)
+        self.ui.actionExportMetrics.triggered.connect(self.chat_handler.export_metrics)
+        self.ui.actionAttachFiles.triggered.connect(self.chat_handler.attach_files)
+        self.ui.actionAttachFolder.triggered.connect(self.chat_handler.attach_folder)
         self.ui.actionClearChat.triggered.connect(self.chat_handler.clear_chat)
         self.ui.actionCopyLastMessage.triggered.connect(self.chat_handler.copy_last_message)
         self.ui.actionToggleDarkMode.triggered.connect(self.settings_handler.toggle_dark_mode)
@@ -109,12 +253,26 @@ class ChatbotApp(QMainWindow):
         self.ui.actionShowAvailableModels.triggered.connect(self.model_handler.list_models)
         self.ui.actionOpenSettings.triggered.connect(self.settings_handler.open_settings)
         self.ui.actionShowSystemInfo.triggered.connect(self.ui_handler.show_system_info)
+        self.ui.actionShowPerformanceDashboard.triggered.connect(self.ui_handler.show_performance_dashboard)
         self.ui.actionAbout.triggered.connect(self.ui_handler.show_about)
 
         # Connect chat list and search functionality
         self.ui.chatListWidget.itemClicked.connect(self.load_selected_chat)
         self.ui.searchLineEdit.returnPressed.connect(self.search_chats)
 
+    def update_message(self, message_id, content):
+        """Called by a MessageWidget when the user saves an edit"""
+        self.chat_handler.edit_message(message_id, content)
+
+    def delete_message(self, message_id):
+        self.chat_handler.delete_message(message_id)
+
+    def regenerate_message(self, message_id):
+        self.chat_handler.regenerate_message(message_id)
+
+    def switch_branch(self, message_id, step):
+        self.chat_handler.switch_branch(message_id, step)
+
     def show_error_message(self, title, message):
         QMessageBox.critical(self, title, message)
 
@@ -127,11 +285,12 @@ class ChatbotApp(QMainWindow):
         self.chat_handler.search_chats(query)
 
     def set_app_icon(self):
-        icon_path = os.path.join('assets', 'ollama.ico')
+        from handlers import icon_cache
+        # Report missing assets once at startup instead of showing blank buttons later
+        icon_cache.check_assets()
+        icon_path = icon_cache.asset_path('ollama.ico')
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
-        else:
-            app_logger.warning(f"Icon file not found: {icon_path}")
 
 def initialize_app():
     """Initialize and run the ChatbotApp."""
@@ -139,10 +298,6 @@ def initialize_app():
         app = QApplication(sys.argv)
         app_logger.info("QApplication initialized")
         
-        settings_handler = SettingsHandler(app)
-        settings_handler.load_stylesheet()
-        app_logger.info("Stylesheet loaded")
-        
         window = ChatbotApp()
         app_logger.info("ChatbotApp instance created")
         
@@ -0,0 +1,128 @@
+# test_semantic_cache.py
+import numpy as np
+import pytest
+
+from handlers import semantic_cache
+from handlers.semantic_cache import SemanticCache, namespace_key
+
+# Fixed unit vectors, so similarities are known exactly instead of coming from an embedding model
+VECTORS = {
+    "What is the capital of France?": [1.0, 0.0, 0.0],
+    "Tell me the capital of France": [0.95, np.sqrt(1 - 0.95 ** 2), 0.0],
+    "Which city is France's capital?": [0.9, np.sqrt(1 - 0.9 ** 2), 0.0],
+    "How do I sort a list?": [0.0, 1.0, 0.0],
+    "How tall is Mount Everest?": [0.0, 0.0, 1.0],
+}
+
+
+def fake_embed(texts):
+    return np.asarray([VECTORS[text] for text in texts], dtype=np.float32)
+
+
+class FakeClock:
+    """Stands in for the time module so last-used order doesn't depend on timer resolution"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(semantic_cache, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "chat_history.db")
+
+
+def make_cache(db_path, **kwargs):
+    kwargs.setdefault("threshold", 0.92)
+    return SemanticCache(db_path, embed_fn=fake_embed, **kwargs)
+
+
+def store(cache, namespace, question, answer):
+    """Add an answer the way ChatThread does: look the question up first, then store it with its vector"""
+    hit = cache.lookup(namespace, question)
+    cache.add(namespace, question, answer, hit.vector)
+
+
+def test_hit_at_or_above_threshold(db_path, clock):
+    cache = make_cache(db_path)
+    namespace = cache.namespace_for("llama3.2:1b")
+    store(cache, namespace, "What is the capital of France?", "Paris")
+
+    hit = cache.lookup(namespace, "Tell me the capital of France")
+    assert hit.content == "Paris"
+    assert hit.score == pytest.approx(0.95, abs=1e-5)
+
+    cache.threshold = hit.score  # A score exactly at the threshold still counts
+    assert cache.lookup(namespace, "Tell me the capital of France").content == "Paris"
+    assert cache.hits == 2
+    cache.close()
+
+
+def test_miss_below_threshold(db_path, clock):
+    cache = make_cache(db_path)
+    namespace = cache.namespace_for("llama3.2:1b")
+    store(cache, namespace, "What is the capital of France?", "Paris")
+
+    hit = cache.lookup(namespace, "Which city is France's capital?")
+    assert hit.content is None
+    assert hit.score == pytest.approx(0.9, abs=1e-5)
+    assert cache.lookup(namespace, "How do I sort a list?").content is None
+    cache.close()
+
+
+def test_namespaces_are_separate_per_chat_and_embedding_model(db_path, clock):
+    cache = make_cache(db_path)
+    store(cache, cache.namespace_for("llama3.2:1b"), "What is the capital of France?", "Paris")
+
+    assert cache.lookup(cache.namespace_for("qwen2.5:0.5b"), "What is the capital of France?").content is None
+    cache.configure(cache.threshold, cache.max_entries, "mxbai-embed-large")
+    assert cache.lookup(cache.namespace_for("llama3.2:1b"), "What is the capital of France?").content is None
+    cache.configure(cache.threshold, cache.max_entries, "nomic-embed-text")
+    assert cache.lookup(cache.namespace_for("llama3.2:1b"), "What is the capital of France?").content == "Paris"
+
+    assert namespace_key("a", "b") != namespace_key("a", "c") != namespace_key("c", "b")
+    cache.close()
+
+
+def test_least_recently_used_entry_is_evicted(db_path, clock):
+    cache = make_cache(db_path, max_entries=2)
+    namespace = cache.namespace_for("llama3.2:1b")
+    store(cache, namespace, "What is the capital of France?", "Paris")
+    store(cache, namespace, "How do I sort a list?", "Use sorted()")
+    # Using the first entry makes the second one the least recently used
+    assert cache.lookup(namespace, "What is the capital of France?").content == "Paris"
+    store(cache, namespace, "How tall is Mount Everest?", "8849 m")
+
+    assert cache.lookup(namespace, "How do I sort a list?").content is None
+    assert cache.lookup(namespace, "What is the capital of France?").content == "Paris"
+    assert cache.lookup(namespace, "How tall is Mount Everest?").content == "8849 m"
+    assert len(cache._namespace(namespace).ids) == 2
+    cache.close()
+
+
+def test_index_is_reloaded_from_npz(db_path, clock):
+    cache = make_cache(db_path)
+    namespace = cache.namespace_for("llama3.2:1b")
+    store(cache, namespace, "What is the capital of France?", "Paris")
+    store(cache, namespace, "How do I sort a list?", "Use sorted()")
+    path = cache._namespace(namespace).path
+    cache.close()
+
+    reopened = make_cache(db_path)
+    index = reopened._namespace(namespace)
+    assert index.path == path
+    assert len(index.ids) == 2
+    assert index.vectors.shape == (2, 3)
+    assert reopened.lookup(namespace, "Tell me the capital of France").content == "Paris"
+    assert reopened.lookup(namespace, "How do I sort a list?").content == "Use sorted()"
+    reopened.close()
@@ -1,10 +1,15 @@
 # utility.py
 import os
 import shutil
+import json
 import logging
+import urllib.request
 
 logging
 
+# Ollama reads OLLAMA_HOST as host[:port] or a full URL; mirror that here
+DEFAULT_OLLAMA_HOST = "http://127.0.0.1:11434"
+
 class Utility:
     @staticmethod
     def find_ollama_executable():
@@ -17,4 +22,24 @@ class Utility:
                 return None
         except Exception as e:
             logging.error(f"Error finding Ollama executable: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def ollama_base_url():
+        host = os.environ.get('OLLAMA_HOST', '').strip() or DEFAULT_OLLAMA_HOST
+        if not host.startswith(('http://', 'https://')):
+            host = f"http://{host}"
+        if host.count(':') < 2:
+            host = f"{host}:11434"
+        return host.rstrip('/')
+
+    @staticmethod
+    def ollama_request(path, payload=None, timeout=10):
+        """Call the local Ollama REST API and return the decoded JSON body (GET without payload, POST with)."""
+        url = f"{Utility.ollama_base_url()}{path}"
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+        # Never route localhost traffic through a system proxy or VPN
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        with opener.open(request, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8') or 'null')
@@ -144,6 +144,12 @@ class Ui_MainWindow(object):
         self.actionLoadChat.setObjectName("actionLoadChat")
         self.actionExportChat = QtWidgets.QAction(MainWindow)
         self.actionExportChat.setObjectName("actionExportChat")
+        self.actionExportMetrics = QtWidgets.QAction(MainWindow)
+        self.actionExportMetrics.setObjectName("actionExportMetrics")
+        self.actionAttachFiles = QtWidgets.QAction(MainWindow)
+        self.actionAttachFiles.setObjectName("actionAttachFiles")
+        self.actionAttachFolder = QtWidgets.QAction(MainWindow)
+        self.actionAttachFolder.setObjectName("actionAttachFolder")
         self.actionClearChat = QtWidgets.QAction(MainWindow)
         self.actionClearChat.setObjectName("actionClearChat")
         self.actionCopyLastMessage = QtWidgets.QAction(MainWindow)
@@ -158,18 +164,25 @@ class Ui_MainWindow(object):
         self.actionOpenSettings.setObjectName("actionOpenSettings")
         self.actionShowSystemInfo = QtWidgets.QAction(MainWindow)
         self.actionShowSystemInfo.setObjectName("actionShowSystemInfo")
+        self.actionShowPerformanceDashboard = QtWidgets.QAction(MainWindow)
+        self.actionShowPerformanceDashboard.setObjectName("actionShowPerformanceDashboard")
         self.actionAbout = QtWidgets.QAction(MainWindow)
         self.actionAbout.setObjectName("actionAbout")
         self.actionClear_Chat_History = QtWidgets.QAction(MainWindow)
         self.actionClear_Chat_History.setObjectName("actionClear_Chat_History")
         self.menuFile.addAction(self.actionClear_Chat_History)
         self.menuFile.addAction(self.actionExportChat)
+        self.menuFile.addAction(self.actionExportMetrics)
+        self.menuFile.addSeparator()
+        self.menuFile.addAction(self.actionAttachFiles)
+        self.menuFile.addAction(self.actionAttachFolder)
         self.menuEdit.addAction(self.actionClearChat)
         self.menuEdit.addAction(self.actionCopyLastMessage)
         self.menuView.addAction(self.actionToggleDarkMode)
         self.menuModel.addAction(self.actionShowAvailableModels)
         self.menuSettings.addAction(self.actionOpenSettings)
         self.menuSettings.addAction(self.actionShowSystemInfo)
+        self.menuSettings.addAction(self.actionShowPerformanceDashboard)
         self.menuHelp.addAction(self.actionAbout)
         self.menubar.addAction(self.menuFile.menuAction())
         self.menubar.addAction(self.menuEdit.menuAction())
@@ -199,6 +212,9 @@ class Ui_MainWindow(object):
         self.actionLoadChat.setText(_translate("MainWindow", "Load Chat"))
         self.actionLoadChat.setShortcut(_translate("MainWindow", "Ctrl+O"))
         self.actionExportChat.setText(_translate("MainWindow", "Export Chat"))
+        self.actionExportMetrics.setText(_translate("MainWindow", "Export Generation Metrics"))
+        self.actionAttachFiles.setText(_translate("MainWindow", "Attach Files..."))
+        self.actionAttachFolder.setText(_translate("MainWindow", "Attach Folder..."))
         self.actionClearChat.setText(_translate("MainWindow", "Clear Chat"))
         self.actionCopyLastMessage.setText(_translate("MainWindow", "Copy Last Message"))
         self.actionCopyLastMessage.setShortcut(_translate("MainWindow", "Ctrl+C"))
@@ -207,5 +223,6 @@ class Ui_MainWindow(object):
         self.actionShowAvailableModels.setText(_translate("MainWindow", "Show Available Models"))
         self.actionOpenSettings.setText(_translate("MainWindow", "Open Settings"))
         self.actionShowSystemInfo.setText(_translate("MainWindow", "Show System Info"))
+        self.actionShowPerformanceDashboard.setText(_translate("MainWindow", "Show Performance Dashboard"))
         self.actionAbout.setText(_translate("MainWindow", "About"))
         self.actionClear_Chat_History.setText(_translate("MainWindow", "Clear Chat History"))
@@ -122,7 +122,7 @@ class Ui_SettingsDialog(object):
         self.font_size = QtWidgets.QSpinBox(self.ui_tab)
         self.font_size.setMinimum(8)
         self.font_size.setMaximum(24)
-        self.font_size.setProperty("value", 12)
+        self.font_size.setProperty("value", 13)
         self.font_size.setObjectName("font_size")
         self.gridLayout_font_size.addWidget(self.font_size, 0, 1, 1, 1)
         self.font_size_explanation = QtWidgets.QLabel(self.ui_tab)
@@ -415,6 +415,178 @@ class Ui_SettingsDialog(object):
         self.seed_explanation.setObjectName("seed_explanation")
         self.gridLayout_seed.addWidget(self.seed_explanation, 1, 0, 1, 2)
         self.gridLayout_advanced.addLayout(self.gridLayout_seed, 3, 0, 1, 1)
+        self.gridLayout_response_cache_enabled = QtWidgets.QGridLayout()
+        self.gridLayout_response_cache_enabled.setObjectName("gridLayout_response_cache_enabled")
+        self.response_cache_enabled_label = QtWidgets.QLabel(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.response_cache_enabled_label.sizePolicy().hasHeightForWidth())
+        self.response_cache_enabled_label.setSizePolicy(sizePolicy)
+        self.response_cache_enabled_label.setObjectName("response_cache_enabled_label")
+        self.gridLayout_response_cache_enabled.addWidget(self.response_cache_enabled_label, 0, 0, 1, 1)
+        self.response_cache_enabled = QtWidgets.QCheckBox(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.response_cache_enabled.sizePolicy().hasHeightForWidth())
+        self.response_cache_enabled.setSizePolicy(sizePolicy)
+        self.response_cache_enabled.setObjectName("response_cache_enabled")
+        self.gridLayout_response_cache_enabled.addWidget(self.response_cache_enabled, 0, 1, 1, 1)
+        self.response_cache_enabled_explanation = QtWidgets.QLabel(self.advanced_tab)
+        self.response_cache_enabled_explanation.setWordWrap(True)
+        self.response_cache_enabled_explanation.setObjectName("response_cache_enabled_explanation")
+        self.gridLayout_response_cache_enabled.addWidget(self.response_cache_enabled_explanation, 1, 0, 1, 2)
+        self.gridLayout_advanced.addLayout(self.gridLayout_response_cache_enabled, 12, 0, 1, 1)
+        self.gridLayout_response_cache_max_mb = QtWidgets.QGridLayout()
+        self.gridLayout_response_cache_max_mb.setObjectName("gridLayout_response_cache_max_mb")
+        self.response_cache_max_mb_label = QtWidgets.QLabel(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.response_cache_max_mb_label.sizePolicy().hasHeightForWidth())
+        self.response_cache_max_mb_label.setSizePolicy(sizePolicy)
+        self.response_cache_max_mb_label.setObjectName("response_cache_max_mb_label")
+        self.gridLayout_response_cache_max_mb.addWidget(self.response_cache_max_mb_label, 0, 0, 1, 1)
+        self.response_cache_max_mb = QtWidgets.QSpinBox(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.response_cache_max_mb.sizePolicy().hasHeightForWidth())
+        self.response_cache_max_mb.setSizePolicy(sizePolicy)
+        self.response_cache_max_mb.setMinimum(1)
+        self.response_cache_max_mb.setMaximum(4096)
+        self.response_cache_max_mb.setProperty("value", 50)
+        self.response_cache_max_mb.setObjectName("response_cache_max_mb")
+        self.gridLayout_response_cache_max_mb.addWidget(self.response_cache_max_mb, 0, 1, 1, 1)
+        self.response_cache_max_mb_explanation = QtWidgets.QLabel(self.advanced_tab)
+        self.response_cache_max_mb_explanation.setWordWrap(True)
+        self.response_cache_max_mb_explanation.setObjectName("response_cache_max_mb_explanation")
+        self.gridLayout_response_cache_max_mb.addWidget(self.response_cache_max_mb_explanation, 1, 0, 1, 2)
+        self.gridLayout_advanced.addLayout(self.gridLayout_response_cache_max_mb, 13, 0, 1, 1)
+        self.gridLayout_semantic_cache_enabled = QtWidgets.QGridLayout()
+        self.gridLayout_semantic_cache_enabled.setObjectName("gridLayout_semantic_cache_enabled")
+        self.semantic_cache_enabled_label = QtWidgets.QLabel(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.semantic_cache_enabled_label.sizePolicy().hasHeightForWidth())
+        self.semantic_cache_enabled_label.setSizePolicy(sizePolicy)
+        self.semantic_cache_enabled_label.setObjectName("semantic_cache_enabled_label")
+        self.gridLayout_semantic_cache_enabled.addWidget(self.semantic_cache_enabled_label, 0, 0, 1, 1)
+        self.semantic_cache_enabled = QtWidgets.QCheckBox(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.semantic_cache_enabled.sizePolicy().hasHeightForWidth())
+        self.semantic_cache_enabled.setSizePolicy(sizePolicy)
+        self.semantic_cache_enabled.setObjectName("semantic_cache_enabled")
+        self.gridLayout_semantic_cache_enabled.addWidget(self.semantic_cache_enabled, 0, 1, 1, 1)
+        self.semantic_cache_enabled_explanation = QtWidgets.QLabel(self.advanced_tab)
+        self.semantic_cache_enabled_explanation.setWordWrap(True)
+        self.semantic_cache_enabled_explanation.setObjectName("semantic_cache_enabled_explanation")
+        self.gridLayout_semantic_cache_enabled.addWidget(self.semantic_cache_enabled_explanation, 1, 0, 1, 2)
+        self.gridLayout_advanced.addLayout(self.gridLayout_semantic_cache_enabled, 14, 0, 1, 1)
+        self.gridLayout_semantic_cache_threshold = QtWidgets.QGridLayout()
+        self.gridLayout_semantic_cache_threshold.setObjectName("gridLayout_semantic_cache_threshold")
+        self.semantic_cache_threshold_label = QtWidgets.QLabel(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.semantic_cache_threshold_label.sizePolicy().hasHeightForWidth())
+        self.semantic_cache_threshold_label.setSizePolicy(sizePolicy)
+        self.semantic_cache_threshold_label.setObjectName("semantic_cache_threshold_label")
+        self.gridLayout_semantic_cache_threshold.addWidget(self.semantic_cache_threshold_label, 0, 0, 1, 1)
+        self.semantic_cache_threshold = QtWidgets.QDoubleSpinBox(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.semantic_cache_threshold.sizePolicy().hasHeightForWidth())
+        self.semantic_cache_threshold.setSizePolicy(sizePolicy)
+        self.semantic_cache_threshold.setDecimals(2)
+        self.semantic_cache_threshold.setMinimum(0.5)
+        self.semantic_cache_threshold.setMaximum(1.0)
+        self.semantic_cache_threshold.setSingleStep(0.01)
+        self.semantic_cache_threshold.setProperty("value", 0.92)
+        self.semantic_cache_threshold.setObjectName("semantic_cache_threshold")
+        self.gridLayout_semantic_cache_threshold.addWidget(self.semantic_cache_threshold, 0, 1, 1, 1)
+        self.semantic_cache_threshold_explanation = QtWidgets.QLabel(self.advanced_tab)
+        self.semantic_cache_threshold_explanation.setWordWrap(True)
+        self.semantic_cache_threshold_explanation.setObjectName("semantic_cache_threshold_explanation")
+        self.gridLayout_semantic_cache_threshold.addWidget(self.semantic_cache_threshold_explanation, 1, 0, 1, 2)
+        self.gridLayout_advanced.addLayout(self.gridLayout_semantic_cache_threshold, 15, 0, 1, 1)
+        self.gridLayout_semantic_cache_max_entries = QtWidgets.QGridLayout()
+        self.gridLayout_semantic_cache_max_entries.setObjectName("gridLayout_semantic_cache_max_entries")
+        self.semantic_cache_max_entries_label = QtWidgets.QLabel(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.semantic_cache_max_entries_label.sizePolicy().hasHeightForWidth())
+        self.semantic_cache_max_entries_label.setSizePolicy(sizePolicy)
+        self.semantic_cache_max_entries_label.setObjectName("semantic_cache_max_entries_label")
+        self.gridLayout_semantic_cache_max_entries.addWidget(self.semantic_cache_max_entries_label, 0, 0, 1, 1)
+        self.semantic_cache_max_entries = QtWidgets.QSpinBox(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.semantic_cache_max_entries.sizePolicy().hasHeightForWidth())
+        self.semantic_cache_max_entries.setSizePolicy(sizePolicy)
+        self.semantic_cache_max_entries.setMinimum(10)
+        self.semantic_cache_max_entries.setMaximum(100000)
+        self.semantic_cache_max_entries.setProperty("value", 1000)
+        self.semantic_cache_max_entries.setObjectName("semantic_cache_max_entries")
+        self.gridLayout_semantic_cache_max_entries.addWidget(self.semantic_cache_max_entries, 0, 1, 1, 1)
+        self.semantic_cache_max_entries_explanation = QtWidgets.QLabel(self.advanced_tab)
+        self.semantic_cache_max_entries_explanation.setWordWrap(True)
+        self.semantic_cache_max_entries_explanation.setObjectName("semantic_cache_max_entries_explanation")
+        self.gridLayout_semantic_cache_max_entries.addWidget(self.semantic_cache_max_entries_explanation, 1, 0, 1, 2)
+        self.gridLayout_advanced.addLayout(self.gridLayout_semantic_cache_max_entries, 16, 0, 1, 1)
+        self.gridLayout_embedding_model = QtWidgets.QGridLayout()
+        self.gridLayout_embedding_model.setObjectName("gridLayout_embedding_model")
+        self.embedding_model_label = QtWidgets.QLabel(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.embedding_model_label.sizePolicy().hasHeightForWidth())
+        self.embedding_model_label.setSizePolicy(sizePolicy)
+        self.embedding_model_label.setObjectName("embedding_model_label")
+        self.gridLayout_embedding_model.addWidget(self.embedding_model_label, 0, 0, 1, 1)
+        self.embedding_model = QtWidgets.QLineEdit(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.embedding_model.sizePolicy().hasHeightForWidth())
+        self.embedding_model.setSizePolicy(sizePolicy)
+        self.embedding_model.setObjectName("embedding_model")
+        self.gridLayout_embedding_model.addWidget(self.embedding_model, 0, 1, 1, 1)
+        self.embedding_model_explanation = QtWidgets.QLabel(self.advanced_tab)
+        self.embedding_model_explanation.setWordWrap(True)
+        self.embedding_model_explanation.setObjectName("embedding_model_explanation")
+        self.gridLayout_embedding_model.addWidget(self.embedding_model_explanation, 1, 0, 1, 2)
+        self.gridLayout_advanced.addLayout(self.gridLayout_embedding_model, 17, 0, 1, 1)
+        self.gridLayout_semantic_search_enabled = QtWidgets.QGridLayout()
+        self.gridLayout_semantic_search_enabled.setObjectName("gridLayout_semantic_search_enabled")
+        self.semantic_search_enabled_label = QtWidgets.QLabel(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.semantic_search_enabled_label.sizePolicy().hasHeightForWidth())
+        self.semantic_search_enabled_label.setSizePolicy(sizePolicy)
+        self.semantic_search_enabled_label.setObjectName("semantic_search_enabled_label")
+        self.gridLayout_semantic_search_enabled.addWidget(self.semantic_search_enabled_label, 0, 0, 1, 1)
+        self.semantic_search_enabled = QtWidgets.QCheckBox(self.advanced_tab)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.semantic_search_enabled.sizePolicy().hasHeightForWidth())
+        self.semantic_search_enabled.setSizePolicy(sizePolicy)
+        self.semantic_search_enabled.setObjectName("semantic_search_enabled")
+        self.gridLayout_semantic_search_enabled.addWidget(self.semantic_search_enabled, 0, 1, 1, 1)
+        self.semantic_search_enabled_explanation = QtWidgets.QLabel(self.advanced_tab)
+        self.semantic_search_enabled_explanation.setWordWrap(True)
+        self.semantic_search_enabled_explanation.setObjectName("semantic_search_enabled_explanation")
+        self.gridLayout_semantic_search_enabled.addWidget(self.semantic_search_enabled_explanation, 1, 0, 1, 2)
+        self.gridLayout_advanced.addLayout(self.gridLayout_semantic_search_enabled, 18, 0, 1, 1)
         self.tabs.addTab(self.advanced_tab, "")
         self.memory_tab = QtWidgets.QWidget()
         self.memory_tab.setObjectName("memory_tab")
@@ -430,6 +602,8 @@ class Ui_SettingsDialog(object):
         self.memory_type.addItem("")
         self.memory_type.addItem("")
         self.memory_type.addItem("")
+        self.memory_type.addItem("")
+        self.memory_type.addItem("")
         self.gridLayout_memory_type.addWidget(self.memory_type, 0, 1, 1, 1)
         self.memory_type_explanation = QtWidgets.QLabel(self.memory_tab)
         self.memory_type_explanation.setWordWrap(True)
@@ -452,9 +626,183 @@ class Ui_SettingsDialog(object):
         self.memory_k_explanation.setObjectName("memory_k_explanation")
         self.gridLayout_memory_k.addWidget(self.memory_k_explanation, 2, 0, 1, 2)
         self.gridLayout_memory.addLayout(self.gridLayout_memory_k, 1, 0, 1, 1)
+        self.gridLayout_retrieval_top_k = QtWidgets.QGridLayout()
+        self.gridLayout_retrieval_top_k.setObjectName("gridLayout_retrieval_top_k")
+        self.retrieval_top_k_label = QtWidgets.QLabel(self.memory_tab)
+        self.retrieval_top_k_label.setObjectName("retrieval_top_k_label")
+        self.gridLayout_retrieval_top_k.addWidget(self.retrieval_top_k_label, 0, 0, 1, 1)
+        self.retrieval_top_k = QtWidgets.QSpinBox(self.memory_tab)
+        self.retrieval_top_k.setMinimum(1)
+        self.retrieval_top_k.setMaximum(50)
+        self.retrieval_top_k.setProperty("value", 5)
+        self.retrieval_top_k.setObjectName("retrieval_top_k")
+        self.gridLayout_retrieval_top_k.addWidget(self.retrieval_top_k, 0, 1, 1, 1)
+        self.retrieval_top_k_explanation = QtWidgets.QLabel(self.memory_tab)
+        self.retrieval_top_k_explanation.setWordWrap(True)
+        self.retrieval_top_k_explanation.setObjectName("retrieval_top_k_explanation")
+        self.gridLayout_retrieval_top_k.addWidget(self.retrieval_top_k_explanation, 2, 0, 1, 2)
+        self.gridLayout_memory.addLayout(self.gridLayout_retrieval_top_k, 2, 0, 1, 1)
+        self.gridLayout_retrieval_token_budget = QtWidgets.QGridLayout()
+        self.gridLayout_retrieval_token_budget.setObjectName("gridLayout_retrieval_token_budget")
+        self.retrieval_token_budget_label = QtWidgets.QLabel(self.memory_tab)
+        self.retrieval_token_budget_label.setObjectName("retrieval_token_budget_label")
+        self.gridLayout_retrieval_token_budget.addWidget(self.retrieval_token_budget_label, 0, 0, 1, 1)
+        self.retrieval_token_budget = QtWidgets.QSpinBox(self.memory_tab)
+        self.retrieval_token_budget.setMinimum(64)
+        self.retrieval_token_budget.setMaximum(8192)
+        self.retrieval_token_budget.setSingleStep(64)
+        self.retrieval_token_budget.setProperty("value", 512)
+        self.retrieval_token_budget.setObjectName("retrieval_token_budget")
+        self.gridLayout_retrieval_token_budget.addWidget(self.retrieval_token_budget, 0, 1, 1, 1)
+        self.retrieval_token_budget_explanation = QtWidgets.QLabel(self.memory_tab)
+        self.retrieval_token_budget_explanation.setWordWrap(True)
+        self.retrieval_token_budget_explanation.setObjectName("retrieval_token_budget_explanation")
+        self.gridLayout_retrieval_token_budget.addWidget(self.retrieval_token_budget_explanation, 2, 0, 1, 2)
+        self.gridLayout_memory.addLayout(self.gridLayout_retrieval_token_budget, 3, 0, 1, 1)
+        self.gridLayout_documents_top_k = QtWidgets.QGridLayout()
+        self.gridLayout_documents_top_k.setObjectName("gridLayout_documents_top_k")
+        self.documents_top_k_label = QtWidgets.QLabel(self.memory_tab)
+        self.documents_top_k_label.setObjectName("documents_top_k_label")
+        self.gridLayout_documents_top_k.addWidget(self.documents_top_k_label, 0, 0, 1, 1)
+        self.documents_top_k = QtWidgets.QSpinBox(self.memory_tab)
+        self.documents_top_k.setMinimum(1)
+        self.documents_top_k.setMaximum(50)
+        self.documents_top_k.setProperty("value", 6)
+        self.documents_top_k.setObjectName("documents_top_k")
+        self.gridLayout_documents_top_k.addWidget(self.documents_top_k, 0, 1, 1, 1)
+        self.documents_top_k_explanation = QtWidgets.QLabel(self.memory_tab)
+        self.documents_top_k_explanation.setWordWrap(True)
+        self.documents_top_k_explanation.setObjectName("documents_top_k_explanation")
+        self.gridLayout_documents_top_k.addWidget(self.documents_top_k_explanation, 2, 0, 1, 2)
+        self.gridLayout_memory.addLayout(self.gridLayout_documents_top_k, 4, 0, 1, 1)
+        self.gridLayout_documents_token_budget = QtWidgets.QGridLayout()
+        self.gridLayout_documents_token_budget.setObjectName("gridLayout_documents_token_budget")
+        self.documents_token_budget_label = QtWidgets.QLabel(self.memory_tab)
+        self.documents_token_budget_label.setObjectName("documents_token_budget_label")
+        self.gridLayout_documents_token_budget.addWidget(self.documents_token_budget_label, 0, 0, 1, 1)
+        self.documents_token_budget = QtWidgets.QSpinBox(self.memory_tab)
+        self.documents_token_budget.setMinimum(128)
+        self.documents_token_budget.setMaximum(16384)
+        self.documents_token_budget.setSingleStep(128)
+        self.documents_token_budget.setProperty("value", 1024)
+        self.documents_token_budget.setObjectName("documents_token_budget")
+        self.gridLayout_documents_token_budget.addWidget(self.documents_token_budget, 0, 1, 1, 1)
+        self.documents_token_budget_explanation = QtWidgets.QLabel(self.memory_tab)
+        self.documents_token_budget_explanation.setWordWrap(True)
+        self.documents_token_budget_explanation.setObjectName("documents_token_budget_explanation")
+        self.gridLayout_documents_token_budget.addWidget(self.documents_token_budget_explanation, 2, 0, 1, 2)
+        self.gridLayout_memory.addLayout(self.gridLayout_documents_token_budget, 5, 0, 1, 1)
+        self.gridLayout_summary_model = QtWidgets.QGridLayout()
+        self.gridLayout_summary_model.setObjectName("gridLayout_summary_model")
+        self.summary_model_label = QtWidgets.QLabel(self.memory_tab)
+        self.summary_model_label.setObjectName("summary_model_label")
+        self.gridLayout_summary_model.addWidget(self.summary_model_label, 0, 0, 1, 1)
+        self.summary_model = QtWidgets.QLineEdit(self.memory_tab)
+        self.summary_model.setObjectName("summary_model")
+        self.gridLayout_summary_model.addWidget(self.summary_model, 0, 1, 1, 1)
+        self.summary_model_explanation = QtWidgets.QLabel(self.memory_tab)
+        self.summary_model_explanation.setWordWrap(True)
+        self.summary_model_explanation.setObjectName("summary_model_explanation")
+        self.gridLayout_summary_model.addWidget(self.summary_model_explanation, 2, 0, 1, 2)
+        self.gridLayout_memory.addLayout(self.gridLayout_summary_model, 6, 0, 1, 1)
         spacerItem1 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        self.gridLayout_memory.addItem(spacerItem1, 2, 0, 1, 1)
+        self.gridLayout_memory.addItem(spacerItem1, 7, 0, 1, 1)
         self.tabs.addTab(self.memory_tab, "")
+        self.performance_tab = QtWidgets.QWidget()
+        self.performance_tab.setObjectName("performance_tab")
+        self.gridLayout_performance = QtWidgets.QGridLayout(self.performance_tab)
+        self.gridLayout_performance.setObjectName("gridLayout_performance")
+        self.gridLayout_num_thread = QtWidgets.QGridLayout()
+        self.gridLayout_num_thread.setObjectName("gridLayout_num_thread")
+        self.num_thread_label = QtWidgets.QLabel(self.performance_tab)
+        self.num_thread_label.setObjectName("num_thread_label")
+        self.gridLayout_num_thread.addWidget(self.num_thread_label, 0, 0, 1, 1)
+        self.num_thread = QtWidgets.QSpinBox(self.performance_tab)
+        self.num_thread.setMinimum(0)
+        self.num_thread.setMaximum(256)
+        self.num_thread.setObjectName("num_thread")
+        self.gridLayout_num_thread.addWidget(self.num_thread, 0, 1, 1, 1)
+        self.num_thread_explanation = QtWidgets.QLabel(self.performance_tab)
+        self.num_thread_explanation.setWordWrap(True)
+        self.num_thread_explanation.setObjectName("num_thread_explanation")
+        self.gridLayout_num_thread.addWidget(self.num_thread_explanation, 2, 0, 1, 2)
+        self.gridLayout_performance.addLayout(self.gridLayout_num_thread, 0, 0, 1, 1)
+        self.gridLayout_num_gpu = QtWidgets.QGridLayout()
+        self.gridLayout_num_gpu.setObjectName("gridLayout_num_gpu")
+        self.num_gpu_label = QtWidgets.QLabel(self.performance_tab)
+        self.num_gpu_label.setObjectName("num_gpu_label")
+        self.gridLayout_num_gpu.addWidget(self.num_gpu_label, 0, 0, 1, 1)
+        self.num_gpu = QtWidgets.QSpinBox(self.performance_tab)
+        self.num_gpu.setMinimum(-1)
+        self.num_gpu.setMaximum(999)
+        self.num_gpu.setProperty("value", -1)
+        self.num_gpu.setObjectName("num_gpu")
+        self.gridLayout_num_gpu.addWidget(self.num_gpu, 0, 1, 1, 1)
+        self.num_gpu_explanation = QtWidgets.QLabel(self.performance_tab)
+        self.num_gpu_explanation.setWordWrap(True)
+        self.num_gpu_explanation.setObjectName("num_gpu_explanation")
+        self.gridLayout_num_gpu.addWidget(self.num_gpu_explanation, 2, 0, 1, 2)
+        self.gridLayout_performance.addLayout(self.gridLayout_num_gpu, 1, 0, 1, 1)
+        self.gridLayout_num_batch = QtWidgets.QGridLayout()
+        self.gridLayout_num_batch.setObjectName("gridLayout_num_batch")
+        self.num_batch_label = QtWidgets.QLabel(self.performance_tab)
+        self.num_batch_label.setObjectName("num_batch_label")
+        self.gridLayout_num_batch.addWidget(self.num_batch_label, 0, 0, 1, 1)
+        self.num_batch = QtWidgets.QSpinBox(self.performance_tab)
+        self.num_batch.setMinimum(1)
+        self.num_batch.setMaximum(8192)
+        self.num_batch.setSingleStep(64)
+        self.num_batch.setProperty("value", 512)
+        self.num_batch.setObjectName("num_batch")
+        self.gridLayout_num_batch.addWidget(self.num_batch, 0, 1, 1, 1)
+        self.num_batch_explanation = QtWidgets.QLabel(self.performance_tab)
+        self.num_batch_explanation.setWordWrap(True)
+        self.num_batch_explanation.setObjectName("num_batch_explanation")
+        self.gridLayout_num_batch.addWidget(self.num_batch_explanation, 2, 0, 1, 2)
+        self.gridLayout_performance.addLayout(self.gridLayout_num_batch, 2, 0, 1, 1)
+        self.gridLayout_use_mmap = QtWidgets.QGridLayout()
+        self.gridLayout_use_mmap.setObjectName("gridLayout_use_mmap")
+        self.use_mmap_label = QtWidgets.QLabel(self.performance_tab)
+        self.use_mmap_label.setObjectName("use_mmap_label")
+        self.gridLayout_use_mmap.addWidget(self.use_mmap_label, 0, 0, 1, 1)
+        self.use_mmap = QtWidgets.QCheckBox(self.performance_tab)
+        self.use_mmap.setChecked(True)
+        self.use_mmap.setObjectName("use_mmap")
+        self.gridLayout_use_mmap.addWidget(self.use_mmap, 0, 1, 1, 1)
+        self.use_mmap_explanation = QtWidgets.QLabel(self.performance_tab)
+        self.use_mmap_explanation.setWordWrap(True)
+        self.use_mmap_explanation.setObjectName("use_mmap_explanation")
+        self.gridLayout_use_mmap.addWidget(self.use_mmap_explanation, 2, 0, 1, 2)
+        self.gridLayout_performance.addLayout(self.gridLayout_use_mmap, 3, 0, 1, 1)
+        self.gridLayout_keep_alive = QtWidgets.QGridLayout()
+        self.gridLayout_keep_alive.setObjectName("gridLayout_keep_alive")
+        self.keep_alive_label = QtWidgets.QLabel(self.performance_tab)
+        self.keep_alive_label.setObjectName("keep_alive_label")
+        self.gridLayout_keep_alive.addWidget(self.keep_alive_label, 0, 0, 1, 1)
+        self.keep_alive = QtWidgets.QLineEdit(self.performance_tab)
+        self.keep_alive.setObjectName("keep_alive")
+        self.gridLayout_keep_alive.addWidget(self.keep_alive, 0, 1, 1, 1)
+        self.keep_alive_explanation = QtWidgets.QLabel(self.performance_tab)
+        self.keep_alive_explanation.setWordWrap(True)
+        self.keep_alive_explanation.setObjectName("keep_alive_explanation")
+        self.gridLayout_keep_alive.addWidget(self.keep_alive_explanation, 2, 0, 1, 2)
+        self.gridLayout_performance.addLayout(self.gridLayout_keep_alive, 4, 0, 1, 1)
+        self.gridLayout_save_model_profile = QtWidgets.QGridLayout()
+        self.gridLayout_save_model_profile.setObjectName("gridLayout_save_model_profile")
+        self.save_model_profile_label = QtWidgets.QLabel(self.performance_tab)
+        self.save_model_profile_label.setObjectName("save_model_profile_label")
+        self.gridLayout_save_model_profile.addWidget(self.save_model_profile_label, 0, 0, 1, 1)
+        self.save_model_profile = QtWidgets.QCheckBox(self.performance_tab)
+        self.save_model_profile.setObjectName("save_model_profile")
+        self.gridLayout_save_model_profile.addWidget(self.save_model_profile, 0, 1, 1, 1)
+        self.save_model_profile_explanation = QtWidgets.QLabel(self.performance_tab)
+        self.save_model_profile_explanation.setWordWrap(True)
+        self.save_model_profile_explanation.setObjectName("save_model_profile_explanation")
+        self.gridLayout_save_model_profile.addWidget(self.save_model_profile_explanation, 2, 0, 1, 2)
+        self.gridLayout_performance.addLayout(self.gridLayout_save_model_profile, 5, 0, 1, 1)
+        spacerItem2 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        self.gridLayout_performance.addItem(spacerItem2, 6, 0, 1, 1)
+        self.tabs.addTab(self.performance_tab, "")
         self.gridLayout_main.addWidget(self.tabs, 1, 0, 1, 1)
 
         self.retranslateUi(SettingsDialog)
@@ -487,7 +835,7 @@ class Ui_SettingsDialog(object):
         self.theme_explanation.setText(_translate("SettingsDialog", "Choose the color scheme of the application. Light for bright backgrounds, Dark for darker backgrounds, System to match your OS settings."))
         self.font_size_label.setText(_translate("SettingsDialog", "Font Size:"))
         self.font_size_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
-        self.font_size_explanation.setText(_translate("SettingsDialog", "Adjust the size of text in the application. Larger values make text bigger, smaller values make it smaller."))
+        self.font_size_explanation.setText(_translate("SettingsDialog", "Size of the chat message text, in points. Changing it restyles the open chat once."))
         self.tabs.setTabText(self.tabs.indexOf(self.ui_tab), _translate("SettingsDialog", "UI Settings"))
         self.presence_penalty_label.setText(_translate("SettingsDialog", "Presence Penalty:"))
         self.presence_penalty_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
@@ -523,14 +871,73 @@ class Ui_SettingsDialog(object):
         self.seed_label.setText(_translate("SettingsDialog", "Seed:"))
         self.seed_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
         self.seed_explanation.setText(_translate("SettingsDialog", "Random seed for reproducibility. Set to -1 for random results, or use a specific number for consistent outputs."))
+        self.response_cache_enabled_label.setText(_translate("SettingsDialog", "Response Cache:"))
+        self.response_cache_enabled_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.response_cache_enabled_explanation.setText(_translate("SettingsDialog", "Reuse the stored reply when the same model, settings and conversation are sent again. Most useful with a fixed seed and temperature 0."))
+        self.response_cache_max_mb_label.setText(_translate("SettingsDialog", "Response Cache Size (MB):"))
+        self.response_cache_max_mb_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.response_cache_max_mb_explanation.setText(_translate("SettingsDialog", "Maximum size of the response cache in megabytes. The least recently used replies are removed first."))
+        self.semantic_cache_enabled_label.setText(_translate("SettingsDialog", "Semantic Cache:"))
+        self.semantic_cache_enabled_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.semantic_cache_enabled_explanation.setText(_translate("SettingsDialog", "Answer an opening question from an earlier reply when it is a close paraphrase. Questions are embedded with the embedding model below."))
+        self.semantic_cache_threshold_label.setText(_translate("SettingsDialog", "Similarity Threshold:"))
+        self.semantic_cache_threshold_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.semantic_cache_threshold_explanation.setText(_translate("SettingsDialog", "How similar (cosine, 0-1) a question must be to a stored one to reuse its answer. Higher values only match near-identical wording."))
+        self.semantic_cache_max_entries_label.setText(_translate("SettingsDialog", "Semantic Cache Entries:"))
+        self.semantic_cache_max_entries_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.semantic_cache_max_entries_explanation.setText(_translate("SettingsDialog", "Questions remembered per model. The least recently used ones are removed first."))
+        self.embedding_model_label.setText(_translate("SettingsDialog", "Embedding Model:"))
+        self.embedding_model_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.embedding_model_explanation.setText(_translate("SettingsDialog", "Ollama model used to embed text, e.g. nomic-embed-text. Pull it with 'ollama pull' before enabling the semantic cache."))
+        self.semantic_search_enabled_label.setText(_translate("SettingsDialog", "Semantic Chat Search:"))
+        self.semantic_search_enabled_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.semantic_search_enabled_explanation.setText(_translate("SettingsDialog", "Embed saved messages in the background so searching your chats also finds conversations with similar meaning, not just matching words."))
         self.tabs.setTabText(self.tabs.indexOf(self.advanced_tab), _translate("SettingsDialog", "Advanced Settings"))
         self.memory_type_label.setText(_translate("SettingsDialog", "Memory Type:"))
         self.memory_type.setItemText(0, _translate("SettingsDialog", "ConversationBufferMemory"))
         self.memory_type.setItemText(1, _translate("SettingsDialog", "ConversationBufferWindowMemory"))
         self.memory_type.setItemText(2, _translate("SettingsDialog", "ConversationSummaryMemory"))
+        self.memory_type.setItemText(3, _translate("SettingsDialog", "RetrievalMemory"))
+        self.memory_type.setItemText(4, _translate("SettingsDialog", "RollingSummaryMemory"))
         self.memory_type_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
-        self.memory_type_explanation.setText(_translate("SettingsDialog", "Choose how the AI remembers previous conversations. Buffer keeps all messages, Window keeps last K messages, Summary keeps a summary."))
+        self.memory_type_explanation.setText(_translate("SettingsDialog", "Choose how the AI remembers previous conversations. Buffer keeps all messages, Window keeps last K messages, Summary keeps a summary, Retrieval keeps last K messages plus relevant messages from all past chats, Rolling Summary keeps last K messages plus a summary of older ones written in the background."))
         self.memory_k_label.setText(_translate("SettingsDialog", "Memory K:"))
         self.memory_k_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
-        self.memory_k_explanation.setText(_translate("SettingsDialog", "Number of recent conversations to remember when using ConversationBufferWindowMemory. Higher values allow for more context but use more memory."))
+        self.memory_k_explanation.setText(_translate("SettingsDialog", "Number of recent conversations to remember when using ConversationBufferWindowMemory, RetrievalMemory or RollingSummaryMemory. Higher values allow for more context but use more memory."))
+        self.retrieval_top_k_label.setText(_translate("SettingsDialog", "Retrieved Messages:"))
+        self.retrieval_top_k_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.retrieval_top_k_explanation.setText(_translate("SettingsDialog", "How many relevant messages from past chats RetrievalMemory adds to the prompt. Requires semantic chat search to be enabled."))
+        self.retrieval_token_budget_label.setText(_translate("SettingsDialog", "Retrieval Token Budget:"))
+        self.retrieval_token_budget_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.retrieval_token_budget_explanation.setText(_translate("SettingsDialog", "Upper limit, in tokens, for the retrieved messages. Keeps prompts short while still recalling older conversations."))
+        self.documents_top_k_label.setText(_translate("SettingsDialog", "File Excerpts:"))
+        self.documents_top_k_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.documents_top_k_explanation.setText(_translate("SettingsDialog", "How many excerpts from a chat\'s attached files are added to each prompt."))
+        self.documents_token_budget_label.setText(_translate("SettingsDialog", "File Excerpt Token Budget:"))
+        self.documents_token_budget_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.documents_token_budget_explanation.setText(_translate("SettingsDialog", "Upper limit, in tokens, for the attached file excerpts added to a prompt. Keep it well below the context length."))
+        self.summary_model_label.setText(_translate("SettingsDialog", "Summary Model:"))
+        self.summary_model.setPlaceholderText(_translate("SettingsDialog", "Same as chat model"))
+        self.summary_model_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.summary_model_explanation.setText(_translate("SettingsDialog", "Model that writes RollingSummaryMemory summaries in the background, e.g. a small model like qwen2.5:0.5b. Leave empty to use the chat model."))
         self.tabs.setTabText(self.tabs.indexOf(self.memory_tab), _translate("SettingsDialog", "Memory Settings"))
+        self.num_thread_label.setText(_translate("SettingsDialog", "Threads:"))
+        self.num_thread_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.num_thread_explanation.setText(_translate("SettingsDialog", "CPU threads Ollama uses to generate replies. 0 lets Ollama pick based on your CPU; setting it to the number of physical cores can speed up CPU-only models."))
+        self.num_gpu_label.setText(_translate("SettingsDialog", "GPU Layers:"))
+        self.num_gpu_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.num_gpu_explanation.setText(_translate("SettingsDialog", "Number of model layers offloaded to the GPU. -1 lets Ollama decide, 0 runs the model on the CPU only. Lower it if the model runs out of video memory."))
+        self.num_batch_label.setText(_translate("SettingsDialog", "Batch Size:"))
+        self.num_batch_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.num_batch_explanation.setText(_translate("SettingsDialog", "Prompt tokens processed at once. Larger batches read long prompts faster but need more memory."))
+        self.use_mmap_label.setText(_translate("SettingsDialog", "Memory-map Model:"))
+        self.use_mmap_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.use_mmap_explanation.setText(_translate("SettingsDialog", "Map the model file into memory so it is paged in from disk as needed and shared with the file cache. Turn off to read the whole model into RAM when it loads."))
+        self.keep_alive_label.setText(_translate("SettingsDialog", "Keep Alive:"))
+        self.keep_alive.setPlaceholderText(_translate("SettingsDialog", "5m"))
+        self.keep_alive_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.keep_alive_explanation.setText(_translate("SettingsDialog", "How long Ollama keeps the model loaded after a reply, e.g. 30s, 10m or 1h. 0 unloads it right away, -1 keeps it loaded until Ollama stops. Keeping it loaded avoids the wait for the model to load again."))
+        self.save_model_profile_label.setText(_translate("SettingsDialog", "Save for This Model:"))
+        self.save_model_profile_explanation.setStyleSheet(_translate("SettingsDialog", "font-size: 10px; color: gray;"))
+        self.save_model_profile_explanation.setText(_translate("SettingsDialog", "Store the context size, max tokens and the options above as a profile of the current model; they are used whenever that model is selected. Untick to drop the profile and save the values shown as the global values."))
+        self.tabs.setTabText(self.tabs.indexOf(self.performance_tab), _translate("SettingsDialog", "Performance"))
@@ -1,26 +1,34 @@
 import logging
 import uuid
-from PyQt5.QtWidgets import QWidget, QHBoxLayout, QTextEdit, QPushButton, QSizePolicy, QMessageBox, QFrame
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QIcon
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QTextEdit, QPushButton, QSizePolicy, QMessageBox, QFrame, QLabel, QToolButton
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+from handlers.markdown_renderer import IncrementalMarkdown, render_markdown
+from handlers import icon_cache
 from logger import app_logger  # Importing the logger
 
+STREAM_RENDER_INTERVAL_MS = 50  # Streamed tokens arriving within this window are rendered together
+
 class MessageWidget(QWidget):
-    def __init__(self, message, is_user, chat_app=None, message_id=None):
+    def __init__(self, message, is_user, chat_app=None, message_id=None, html=None):
         super().__init__()
         self.chat_app = chat_app
         self.message_id = message_id if message_id else uuid.uuid4().hex
         self.is_user = is_user
         self.is_editing = False
+        # The Markdown source; the text edit only holds the rendered HTML
+        self.markdown = message
+        self.stream = None
 
-        self.init_ui(message)
+        self.init_ui(message, html)
 
-    def init_ui(self, message):
+    def init_ui(self, message, html=None):
         layout = QHBoxLayout()
         layout.setContentsMargins(10, 5, 10, 5)
         layout.setSpacing(15)
 
-        self.create_text_edit(message)
+        self.create_text_edit(message, html)
+        self.create_bubble()
         self.create_edit_button()
 
         text_container = QHBoxLayout()
@@ -34,10 +42,11 @@ class MessageWidget(QWidget):
         # Initial size adjustment
         self.adjust_size()
 
-    def create_text_edit(self, message):
+    def create_text_edit(self, message, html=None):
         # $ Text Edit UI Element
         self.text = QTextEdit()
-        self.text.setMarkdown(message)
+        # html is the render cached in the database, if any
+        self.text.setHtml(html if html is not None else render_markdown(message))
         self.text.setReadOnly(True)
         self.text.setFont(QFont('SF Pro Text', 13))
         self.text.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -47,15 +56,127 @@ class MessageWidget(QWidget):
         self.text.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
         
         self.text.document().contentsChanged.connect(self.adjust_size)
+        self.text.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.text.customContextMenuRequested.connect(self.show_context_menu)
 
         # Set object name for styling
         self.text.setObjectName("messageText")
         self.text.setProperty("is_user", str(self.is_user).lower())
 
+    def create_bubble(self):
+        # The footer and branch controls are only built for messages that show them
+        self.footer = None
+        self.branch_bar = None
+        self.bubble = QVBoxLayout()
+        self.bubble.setContentsMargins(0, 0, 0, 0)
+        self.bubble.setSpacing(2)
+        self.bubble.addWidget(self.text)
+
+    def create_footer(self):
+        # $ Footer UI Element (generation metrics)
+        self.footer = QLabel()
+        self.footer.setObjectName("messageFooter")
+        self.footer.setFont(QFont('SF Pro Text', 9))
+        self.footer.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.bubble.insertWidget(1, self.footer)
+
+    def create_branch_controls(self):
+        # $ Branch Navigation UI Element ("‹ 2/3 ›" when the message has other versions)
+        self.branch_previous = QToolButton()
+        self.branch_previous.setText("‹")
+        self.branch_previous.setToolTip("Previous version")
+        self.branch_previous.clicked.connect(lambda: self.switch_branch(-1))
+        self.branch_label = QLabel()
+        self.branch_label.setObjectName("branchLabel")
+        self.branch_label.setFont(QFont('SF Pro Text', 9))
+        self.branch_next = QToolButton()
+        self.branch_next.setText("›")
+        self.branch_next.setToolTip("Next version")
+        self.branch_next.clicked.connect(lambda: self.switch_branch(1))
+
+        self.branch_bar = QWidget()
+        self.branch_bar.setObjectName("branchBar")
+        branch_layout = QHBoxLayout(self.branch_bar)
+        branch_layout.setContentsMargins(0, 0, 0, 0)
+        branch_layout.setSpacing(4)
+        branch_layout.addWidget(self.branch_previous)
+        branch_layout.addWidget(self.branch_label)
+        branch_layout.addWidget(self.branch_next)
+        branch_layout.addStretch()
+        self.branch_bar.setVisible(False)
+        self.bubble.addWidget(self.branch_bar)
+
+    def set_branch_info(self, index, count):
+        if self.branch_bar is None:
+            if count < 2:
+                return
+            self.create_branch_controls()
+        self.branch_label.setText(f"{index}/{count}")
+        self.branch_previous.setEnabled(index > 1)
+        self.branch_next.setEnabled(index < count)
+        if self.branch_bar.isHidden() == (count > 1):
+            self.branch_bar.setVisible(count > 1)
+            self.adjust_size()
+
+    def switch_branch(self, step):
+        if self.chat_app:
+            self.chat_app.switch_branch(self.message_id, step)
+
+    def set_markdown(self, message):
+        """Show the complete message, e.g. once streaming ends or after an edit"""
+        self.stream = None
+        if hasattr(self, 'render_timer'):
+            self.render_timer.stop()
+        self.markdown = message
+        self.text.setHtml(render_markdown(message))
+
+    def append_markdown(self, chunk):
+        """Add a streamed chunk; only the unfinished tail is parsed again, and renders are batched"""
+        if self.stream is None:
+            self.stream = IncrementalMarkdown()
+            self.stream.append(self.markdown)
+        self.stream.append(chunk)
+        self.markdown = self.stream.text
+        if not hasattr(self, 'render_timer'):
+            self.render_timer = QTimer(self)
+            self.render_timer.setSingleShot(True)
+            self.render_timer.timeout.connect(self.render_stream)
+        if not self.render_timer.isActive():
+            self.render_timer.start(STREAM_RENDER_INTERVAL_MS)
+
+    def render_stream(self):
+        if self.stream is not None:
+            self.text.setHtml(self.stream.html())
+
+    def set_footer(self, text):
+        if self.footer is None:
+            if not text:
+                return
+            self.create_footer()
+        self.footer.setText(text)
+        self.footer.setVisible(bool(text))
+        self.adjust_size()
+
+    def show_context_menu(self, position):
+        # $ Standard copy/select actions plus deleting the message
+        menu = self.text.createStandardContextMenu()
+        if self.chat_app and not self.is_editing:
+            menu.addSeparator()
+            if not self.is_user:
+                menu.addAction("Regenerate Response", lambda: self.chat_app.regenerate_message(self.message_id))
+            menu.addAction("Delete Message", self.confirm_delete)
+        menu.exec_(self.text.viewport().mapToGlobal(position))
+
+    def confirm_delete(self):
+        reply = QMessageBox.question(self, "Delete Message", "Delete this message from the chat? This cannot be undone.",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.chat_app.delete_message(self.message_id)
+
     def create_edit_button(self):
         # $ Edit Button UI Element
         self.edit_button = QPushButton()
-        self.edit_button.setIcon(QIcon("assets/pencil-50.svg"))
+        self.edit_button.setIcon(icon_cache.icon("pencil-50.svg"))
         self.edit_button.setFixedSize(30, 30)
         self.edit_button.clicked.connect(self.toggle_edit_mode)
         
@@ -66,9 +187,9 @@ class MessageWidget(QWidget):
         if self.is_user:
             container.addStretch()
             container.addWidget(self.edit_button)
-            container.addWidget(self.text)
+            container.addLayout(self.bubble)
         else:
-            container.addWidget(self.text)
+            container.addLayout(self.bubble)
             container.addWidget(self.edit_button)
             container.addStretch()
 
@@ -87,7 +208,10 @@ class MessageWidget(QWidget):
             self.text.setMinimumWidth(min_width)
             self.text.setMaximumWidth(max_width)
             self.text.setFixedHeight(new_height)
-            self.setFixedHeight(new_height + 20)
+            footer_height = self.footer.sizeHint().height() + 2 if self.footer is not None and not self.footer.isHidden() else 0
+            if self.branch_bar is not None and not self.branch_bar.isHidden():
+                footer_height += self.branch_bar.sizeHint().height() + 2
+            self.setFixedHeight(new_height + 20 + footer_height)
 
             # Force layout update
             self.updateGeometry()
@@ -108,8 +232,10 @@ class MessageWidget(QWidget):
 
     def enable_edit_mode(self):
         self.is_editing = True
+        # Edit the Markdown source rather than the rendered text
+        self.text.setPlainText(self.markdown)
         self.text.setReadOnly(False)
-        self.edit_button.setIcon(QIcon("assets/check-50.svg"))
+        self.edit_button.setIcon(icon_cache.icon("check-50.svg"))
         self.edit_button.setProperty("mode", "save")
 
     def save_edit_mode(self):
@@ -117,8 +243,9 @@ class MessageWidget(QWidget):
         if new_content:
             self.is_editing = False
             self.text.setReadOnly(True)
-            self.edit_button.setIcon(QIcon("assets/pencil-50.svg"))
+            self.edit_button.setIcon(icon_cache.icon("pencil-50.svg"))
             self.edit_button.setProperty("mode", "edit")
+            self.set_markdown(new_content)
             if self.chat_app:
                 self.chat_app.update_message(self.message_id, new_content)
         else:
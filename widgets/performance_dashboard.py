@@ -0,0 +1,203 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QWidget, QSizePolicy)
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont
+from PyQt5.QtCore import Qt, QPointF
+from handlers.metrics_handler import percentile
+from logger import app_logger
+
+# Metrics that can be charted: key -> (label, unit)
+CHART_METRICS = {
+    "tokens_per_second": ("Generation speed", "tok/s"),
+    "ttft_ms": ("Time to first token", "ms"),
+    "prompt_eval_ms": ("Prompt evaluation time", "ms"),
+    "prompt_tokens_per_second": ("Prompt evaluation speed", "tok/s"),
+}
+
+# X axes the chart can be drawn against
+CHART_AXES = {
+    "history": "Generation # (oldest → newest)",
+    "prompt_eval_count": "Prompt size (tokens)",
+}
+
+SERIES_COLORS = ["#3498db", "#e67e22", "#2ecc71", "#9b59b6", "#e74c3c", "#1abc9c", "#f1c40f", "#34495e"]
+
+ALL_MODELS = "All models"
+
+
+class MetricChart(QWidget):
+    """Minimal line/scatter chart painted with QPainter, one series per model."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.series = {}
+        self.x_label = ""
+        self.y_label = ""
+        self.connect_points = True
+        self.setMinimumHeight(260)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def set_series(self, series, x_label, y_label, connect_points=True):
+        self.series = {name: points for name, points in series.items() if points}
+        self.x_label = x_label
+        self.y_label = y_label
+        self.connect_points = connect_points
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setFont(QFont('SF Pro Text', 8))
+        left, top, right, bottom = 55, 15, 15, 35
+        plot_w = self.width() - left - right
+        plot_h = self.height() - top - bottom
+        axis_pen = QPen(QColor("#888888"))
+        painter.setPen(axis_pen)
+        painter.drawLine(left, top, left, top + plot_h)
+        painter.drawLine(left, top + plot_h, left + plot_w, top + plot_h)
+
+        if not self.series or plot_w <= 0 or plot_h <= 0:
+            painter.drawText(self.rect(), Qt.AlignCenter, "No generation metrics recorded yet")
+            return
+
+        all_points = [point for points in self.series.values() for point in points]
+        min_x = min(x for x, _ in all_points)
+        max_x = max(x for x, _ in all_points)
+        max_y = max(y for _, y in all_points) * 1.1 or 1.0
+        span_x = (max_x - min_x) or 1.0
+
+        def to_screen(x, y):
+            return QPointF(left + (x - min_x) / span_x * plot_w, top + plot_h - y / max_y * plot_h)
+
+        # Y axis ticks
+        for i in range(5):
+            value = max_y * i / 4
+            y = top + plot_h - plot_h * i / 4
+            painter.drawText(0, int(y) - 6, left - 5, 12, Qt.AlignRight | Qt.AlignVCenter, f"{value:.0f}")
+        painter.drawText(left, top + plot_h + 5, plot_w, 15, Qt.AlignLeft, f"{min_x:.0f}")
+        painter.drawText(left, top + plot_h + 5, plot_w, 15, Qt.AlignRight, f"{max_x:.0f}")
+        painter.drawText(left, top + plot_h + 18, plot_w, 15, Qt.AlignCenter, f"{self.x_label} — {self.y_label}")
+
+        for index, (name, points) in enumerate(sorted(self.series.items())):
+            color = QColor(SERIES_COLORS[index % len(SERIES_COLORS)])
+            painter.setPen(QPen(color, 2))
+            screen_points = [to_screen(x, y) for x, y in sorted(points)]
+            if self.connect_points:
+                for a, b in zip(screen_points, screen_points[1:]):
+                    painter.drawLine(a, b)
+            painter.setBrush(color)
+            for point in screen_points:
+                painter.drawEllipse(point, 2.5, 2.5)
+            # Legend
+            painter.drawText(left + 10, top + 12 + index * 14, name)
+        painter.end()
+
+
+class PerformanceDashboardDialog(QDialog):
+    def __init__(self, db_handler, parent=None):
+        super().__init__(parent)
+        self.db_handler = db_handler
+        self.rows = []
+        self.initUI()
+        self.refresh()
+
+    def initUI(self):
+        self.setWindowTitle("Performance Dashboard")
+        self.resize(1000, 700)
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        self.model_combo = QComboBox()
+        self.metric_combo = QComboBox()
+        for key, (label, unit) in CHART_METRICS.items():
+            self.metric_combo.addItem(f"{label} ({unit})", key)
+        self.axis_combo = QComboBox()
+        for key, label in CHART_AXES.items():
+            self.axis_combo.addItem(label, key)
+        self.refresh_button = QPushButton("Refresh")
+        controls.addWidget(QLabel("Model:"))
+        controls.addWidget(self.model_combo)
+        controls.addWidget(QLabel("Metric:"))
+        controls.addWidget(self.metric_combo)
+        controls.addWidget(QLabel("Against:"))
+        controls.addWidget(self.axis_combo)
+        controls.addStretch()
+        controls.addWidget(self.refresh_button)
+        layout.addLayout(controls)
+
+        self.chart = MetricChart()
+        layout.addWidget(self.chart, 3)
+
+        self.summary_table = QTableWidget()
+        self.summary_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.summary_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.summary_table, 2)
+
+        self.model_combo.currentIndexChanged.connect(self.update_chart)
+        self.metric_combo.currentIndexChanged.connect(self.update_chart)
+        self.axis_combo.currentIndexChanged.connect(self.update_chart)
+        self.refresh_button.clicked.connect(self.refresh)
+
+    def refresh(self):
+        try:
+            self.rows = self.db_handler.get_all_generation_metrics()
+            current = self.model_combo.currentText()
+            models = sorted({row["model"] for row in self.rows if row.get("model")})
+            self.model_combo.blockSignals(True)
+            self.model_combo.clear()
+            self.model_combo.addItems([ALL_MODELS] + models)
+            if current in models:
+                self.model_combo.setCurrentText(current)
+            self.model_combo.blockSignals(False)
+            self.update_chart()
+            self.update_summary()
+        except Exception as e:
+            app_logger.error(f"Error refreshing performance dashboard: {str(e)}")
+
+    def update_chart(self):
+        try:
+            metric = self.metric_combo.currentData()
+            axis = self.axis_combo.currentData()
+            selected_model = self.model_combo.currentText()
+            series = {}
+            counters = {}
+            for row in self.rows:
+                model = row.get("model") or "unknown"
+                if selected_model not in (ALL_MODELS, model) or row.get(metric) is None:
+                    continue
+                if axis == "history":
+                    counters[model] = counters.get(model, 0) + 1
+                    x = counters[model]
+                else:
+                    x = row.get(axis)
+                    if x is None:
+                        continue
+                series.setdefault(model, []).append((x, row[metric]))
+            label, unit = CHART_METRICS[metric]
+            self.chart.set_series(series, CHART_AXES[axis], f"{label} ({unit})", connect_points=(axis == "history"))
+        except Exception as e:
+            app_logger.error(f"Error updating performance chart: {str(e)}")
+
+    def update_summary(self):
+        """Aggregate medians per model and context size (num_ctx)."""
+        groups = {}
+        for row in self.rows:
+            groups.setdefault((row.get("model") or "unknown", row.get("num_ctx")), []).append(row)
+
+        headers = ["Model", "num_ctx", "Runs", "Median tok/s", "Median TTFT (ms)",
+                   "Median prompt eval (ms)", "Median prompt tok/s", "p90 token gap (ms)"]
+        self.summary_table.clear()
+        self.summary_table.setColumnCount(len(headers))
+        self.summary_table.setHorizontalHeaderLabels(headers)
+        self.summary_table.setRowCount(len(groups))
+
+        def median(rows, key):
+            value = percentile([row[key] for row in rows if row.get(key) is not None], 50)
+            return f"{value:.1f}" if value is not None else "–"
+
+        for index, ((model, num_ctx), rows) in enumerate(sorted(groups.items(), key=lambda item: (item[0][0], item[0][1] or 0))):
+            values = [model, str(num_ctx or "–"), str(len(rows)),
+                      median(rows, "tokens_per_second"), median(rows, "ttft_ms"),
+                      median(rows, "prompt_eval_ms"), median(rows, "prompt_tokens_per_second"),
+                      median(rows, "itl_p90_ms")]
+            for column, value in enumerate(values):
+                self.summary_table.setItem(index, column, QTableWidgetItem(value))
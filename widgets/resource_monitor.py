@@ -0,0 +1,101 @@
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QSizePolicy
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QPolygonF
+from PyQt5.QtCore import QPointF
+
+# (sample field, label, unit, colour); the value axis is fixed at 0-100 for percentages
+SPARKLINES = [
+    ("cpu_percent", "CPU", "%", "#3498db"),
+    ("ram_percent", "RAM", "%", "#9b59b6"),
+    ("gpu_percent", "GPU", "%", "#2ecc71"),
+    ("ollama_cpu_percent", "Ollama CPU", "%", "#e67e22"),
+    ("ollama_rss_mb", "Ollama RAM", "MB", "#e74c3c"),
+]
+
+VISIBLE_SAMPLES = 120
+
+
+class Sparkline(QWidget):
+    def __init__(self, color, fixed_max=None, parent=None):
+        super().__init__(parent)
+        self.color = QColor(color)
+        self.fixed_max = fixed_max
+        self.values = []
+        self.highlight = []
+        self.setFixedHeight(28)
+        self.setMinimumWidth(80)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def set_values(self, values, highlight):
+        self.values = values
+        self.highlight = highlight
+        self.update()
+
+    def paintEvent(self, event):
+        points = [(i, v) for i, v in enumerate(self.values) if v is not None]
+        if len(points) < 2:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        width, height = self.width(), self.height() - 2
+        max_value = self.fixed_max or max(v for _, v in points) or 1.0
+        step = width / max(len(self.values) - 1, 1)
+
+        # Shade the samples that belong to the running generation
+        shade = QColor(self.color)
+        shade.setAlpha(40)
+        for i, active in enumerate(self.highlight):
+            if active:
+                painter.fillRect(int(i * step - step / 2), 0, int(step) + 1, self.height(), shade)
+
+        painter.setPen(QPen(self.color, 1.5))
+        painter.drawPolyline(QPolygonF([QPointF(i * step, 1 + height - v / max_value * height) for i, v in points]))
+        painter.end()
+
+
+class ResourceMonitorPanel(QWidget):
+    """Row of sparklines fed by ResourceSampler.sample_ready."""
+
+    def __init__(self, sampler, parent=None):
+        super().__init__(parent)
+        self.sampler = sampler
+        self.sparklines = {}
+        self.value_labels = {}
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(12)
+        for field, label, unit, color in SPARKLINES:
+            column = QVBoxLayout()
+            column.setSpacing(0)
+            value_label = QLabel(f"{label}: –")
+            value_label.setFont(QFont('SF Pro Text', 8))
+            value_label.setObjectName("resourceValueLabel")  # Muted colour comes from the theme
+            sparkline = Sparkline(color, fixed_max=100 if unit == "%" else None)
+            column.addWidget(value_label)
+            column.addWidget(sparkline)
+            layout.addLayout(column)
+            self.sparklines[field] = sparkline
+            self.value_labels[field] = (value_label, label, unit)
+        self.setObjectName("resourceMonitorPanel")
+        sampler.sample_ready.connect(self.on_sample)
+
+    # The sampler only runs while the panel is on screen (or a reply is generating); minimizing
+    # the window hides it too
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.sampler.set_panel_visible(True)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.sampler.set_panel_visible(False)
+
+    def on_sample(self, sample):
+        samples = self.sampler.buffer.snapshot()[-VISIBLE_SAMPLES:]
+        highlight = [s.generation_id is not None for s in samples]
+        for field, sparkline in self.sparklines.items():
+            values = [getattr(s, field) for s in samples]
+            sparkline.setVisible(any(v is not None for v in values))
+            sparkline.set_values(values, highlight)
+            value_label, label, unit = self.value_labels[field]
+            value = getattr(sample, field)
+            value_label.setVisible(not sparkline.isHidden())
+            value_label.setText(f"{label}: {value:.0f}{unit}" if value is not None else f"{label}: –")
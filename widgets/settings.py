@@ -1,10 +1,11 @@
 import logging
+import copy
 import json
 import os
 import appdirs
 from PyQt5.QtWidgets import QDialog
 from PyQt5.QtCore import Qt
-from handlers.settings_handler import SETTINGS, save_settings
+from handlers.settings_handler import SETTINGS, PROFILE_SETTINGS, save_settings, model_settings, validate_settings
 from logger import app_logger  # Import the logger
 from views.settings_ui import Ui_SettingsDialog  # Import the Ui_SettingsDialog class
 from PyQt5.QtWidgets import QSpinBox, QDoubleSpinBox, QComboBox, QCheckBox, QTextEdit, QLineEdit
@@ -32,7 +33,11 @@ class SettingsDialog(QDialog):
 
     def load_settings_to_ui(self):
         try:
-            for key, value in SETTINGS.items():
+            # Profile settings show the values the current model actually uses
+            model = SETTINGS['model']
+            self.ui.save_model_profile.setText(model)
+            self.ui.save_model_profile.setChecked(model in SETTINGS['model_profiles'])
+            for key, value in model_settings().items():
                 if hasattr(self.ui, key):
                     widget = getattr(self.ui, key)
                     if isinstance(widget, (QSpinBox, QDoubleSpinBox)):
@@ -66,12 +71,21 @@ class SettingsDialog(QDialog):
                     elif isinstance(widget, QLineEdit):
                         new_settings[key] = widget.text()
             
+            # Checked, the profile settings go to the current model's profile and the global values stay;
+            # unchecked, the model's profile is dropped and the values shown become the global values
+            profiles = dict(SETTINGS['model_profiles'])
+            profiles.pop(SETTINGS['model'], None)
+            if self.ui.save_model_profile.isChecked():
+                profiles[SETTINGS['model']] = {key: new_settings.pop(key) for key in PROFILE_SETTINGS if key in new_settings}
+            new_settings['model_profiles'] = profiles
+
             # Update the global SETTINGS
-            SETTINGS.update(new_settings)
+            previous = copy.deepcopy(SETTINGS)
+            SETTINGS.update(validate_settings({**SETTINGS, **new_settings}))
             # Save the updated settings
             save_settings(SETTINGS)
-            # Apply the new settings
-            self.parent.settings_handler.apply_settings()
+            # Apply only what the changed settings affect
+            self.parent.settings_handler.apply_settings(previous)
             app_logger.info("Settings updated and applied successfully")
             super().accept()
         except Exception as e:
@@ -1,54 +1,93 @@
 from PyQt5.QtWidgets import QDialog, QMessageBox, QLabel
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from views.system_info_dialog_ui import Ui_SystemInfoDialog
-import GPUtil
-import psutil
-import platform
-import wmi
+from handlers.hardware_probe import get_hardware_probe
+from handlers.fit_estimator import FitEstimatorThread, max_parameters, DEFAULT_QUANT, VRAM_HEADROOM
+from handlers.settings_handler import SETTINGS
 from logger import app_logger
 
+PROBING_TEXT = "<p>⏳ Probing your hardware...</p>"
+
+# Volatile metrics (utilisation, free memory) are refreshed on this interval while the dialog is open
+VOLATILE_REFRESH_MS = 3000
+
+# Fit estimates can outlive a closed dialog; keep their threads referenced until they finish
+_RUNNING_THREADS = set()
+
 class SystemInfoDialog(QDialog, Ui_SystemInfoDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setupUi(self)
         self.setWindowIcon(QIcon("path/to/icon.png"))
         self.total_gpu_vram = 0
+        self.static_info = None
+        self.volatile_info = None
+        self.probe = get_hardware_probe()
         self.initUI()
 
 
     def initUI(self):
         try:
-            gpu_info = self.getLLMGPUInfo()
-            self.gpuContent.setText(gpu_info['gpu'])
-            self.vramContent.setText(gpu_info['vram'])
-
-            cpu_info = self.getLLMCPUInfo()
-            self.cpuContent.setText(cpu_info)
-            self.ramContent.setText(self.getLLMMemoryInfo())
-
-            self.calculateMaxLLMSize()
-
-            self.closeButton.clicked.connect(self.close)
-            
             for label in [self.llmSizeContent, self.gpuContent, self.vramContent, self.cpuContent, self.ramContent]:
+                label.setText(PROBING_TEXT)
                 label.setTextInteractionFlags(Qt.TextSelectableByMouse)
                 label.setWordWrap(True)
                 if isinstance(label, QLabel):
                     label.setMinimumHeight(150)
 
+            self.closeButton.clicked.connect(self.close)
+
+            self.probe.static_ready.connect(self.on_static_ready)
+            self.probe.volatile_ready.connect(self.on_volatile_ready)
+            self.refresh_timer = QTimer(self)
+            self.refresh_timer.timeout.connect(lambda: self.probe.refresh(include_static=False))
+            self.refresh_timer.start(VOLATILE_REFRESH_MS)
+            self.probe.refresh()
+
         except Exception as e:
             app_logger.error(f"Error initializing SystemInfoDialog UI: {str(e)}")
 
+    def done(self, result):
+        self.refresh_timer.stop()
+        if getattr(self, 'fit_thread', None) is not None:
+            self.fit_thread.estimates_ready.disconnect(self.show_fit_estimates)
+            self.fit_thread.error_occurred.disconnect(self.show_fit_error)
+        self.probe.static_ready.disconnect(self.on_static_ready)
+        self.probe.volatile_ready.disconnect(self.on_volatile_ready)
+        super().done(result)
+
+    def on_static_ready(self, static_info):
+        self.static_info = static_info
+        self.total_gpu_vram = static_info.get("total_vram_mb", 0)
+        self.update_hardware_labels()
+        self.calculateMaxLLMSize()
+
+    def on_volatile_ready(self, volatile_info):
+        self.volatile_info = volatile_info
+        self.update_hardware_labels()
+
+    def update_hardware_labels(self):
+        if self.static_info is None:
+            return
+        gpu_info = self.getLLMGPUInfo()
+        self.gpuContent.setText(gpu_info['gpu'])
+        self.vramContent.setText(gpu_info['vram'])
+        self.cpuContent.setText(self.getLLMCPUInfo())
+        self.ramContent.setText(self.getLLMMemoryInfo())
+
     def getLLMCPUInfo(self):
         try:
-            cpu_freq = psutil.cpu_freq()
+            static, volatile = self.static_info, self.volatile_info or {}
+            max_freq = f"{static['cpu_max_mhz']:.2f}MHz" if static.get('cpu_max_mhz') else "Unknown"
+            utilization = f"{volatile['cpu_percent']}%" if 'cpu_percent' in volatile else "⏳"
             return f"""
             <h3>🖥️ CPU Specifications</h3>
             <ul>
-                <li>Total Cores: {psutil.cpu_count(logical=True)} 🧠</li>
-                <li>Maximum Frequency: {cpu_freq.max:.2f}MHz ⚡</li>
-                <li>Current Processor Utilization: {psutil.cpu_percent()}% 📊</li>
+                <li>Model: {static['cpu_model']} 🏷️</li>
+                <li>Total Cores: {static['logical_cores']} ({static['physical_cores']} physical) 🧠</li>
+                <li>Maximum Frequency: {max_freq} ⚡</li>
+                <li>Current Processor Utilization: {utilization} 📊</li>
             </ul>
             """
         except Exception as e:
@@ -57,13 +96,15 @@ class SystemInfoDialog(QDialog, Ui_SystemInfoDialog):
 
     def getLLMMemoryInfo(self):
         try:
-            memory = psutil.virtual_memory()
+            static, volatile = self.static_info, self.volatile_info or {}
+            available = self.getSize(volatile['ram_available']) if 'ram_available' in volatile else "⏳"
+            utilization = f"{volatile['ram_percent']}%" if 'ram_percent' in volatile else "⏳"
             return f"""
             <h3>💾 RAM Specifications</h3>
             <ul>
-                <li>Total RAM Capacity: {self.getSize(memory.total)} 📈</li>
-                <li>Available RAM: {self.getSize(memory.available)} 🆓</li>
-                <li>Current RAM Utilization: {memory.percent}% 📊</li>
+                <li>Total RAM Capacity: {self.getSize(static['ram_total'])} 📈</li>
+                <li>Available RAM: {available} 🆓</li>
+                <li>Current RAM Utilization: {utilization} 📊</li>
             </ul>
             """
         except Exception as e:
@@ -74,41 +115,21 @@ class SystemInfoDialog(QDialog, Ui_SystemInfoDialog):
         try:
             gpu_info = "<h3>🎮 GPU Specifications</h3>"
             vram_info = "<h3>🧠 VRAM Specifications</h3>"
-            self.total_gpu_vram = 0
-            
-            try:
-                nvidia_gpus = GPUtil.getGPUs()
-                if nvidia_gpus:
-                    for i, gpu in enumerate(nvidia_gpus):
-                        gpu_info += f"<h4>NVIDIA GPU {i + 1}:</h4><p>Model: {gpu.name} 🖥️</p>"
-                        vram_info += f"""<h4>NVIDIA GPU {i + 1} VRAM:</h4>
-                        <ul>
-                            <li>Total Memory Capacity: {gpu.memoryTotal}MB 💾</li>
-                            <li>Available Memory: {gpu.memoryFree}MB 🆓</li>
-                        </ul>"""
-                        self.total_gpu_vram += gpu.memoryTotal
-            except Exception as nvidia_e:
-                app_logger.error(f"Error retrieving NVIDIA GPU info: {str(nvidia_e)}")
-            
-            try:
-                c = wmi.WMI()
-                amd_gpus = c.Win32_VideoController(AdapterCompatibility="Advanced Micro Devices, Inc.")
-                if amd_gpus:
-                    for i, gpu in enumerate(amd_gpus):
-                        gpu_info += f"<h4>AMD GPU {i + 1}:</h4><p>Model: {gpu.Name} 🖥️</p>"
-                        vram = int(gpu.AdapterRAM) / (1024**2) if gpu.AdapterRAM else "Unknown"
-                        vram_info += f"""<h4>AMD GPU {i + 1} VRAM:</h4>
-                        <ul>
-                            <li>Total Memory Capacity: {vram:.2f}MB 💾</li>
-                        </ul>"""
-                        if isinstance(vram, float):
-                            self.total_gpu_vram += vram
-            except Exception as amd_e:
-                app_logger.error(f"Error retrieving AMD GPU info: {str(amd_e)}")
-            
+            free_by_name = {gpu['name']: gpu for gpu in (self.volatile_info or {}).get('gpus', [])}
+
+            for i, gpu in enumerate(self.static_info['gpus']):
+                gpu_info += f"<h4>{gpu['vendor']} GPU {i + 1}:</h4><p>Model: {gpu['name']} 🖥️</p>"
+                total = f"{gpu['vram_total_mb']:.2f}MB" if gpu['vram_total_mb'] else "Unknown"
+                vram_info += f"""<h4>{gpu['vendor']} GPU {i + 1} VRAM:</h4>
+                <ul>
+                    <li>Total Memory Capacity: {total} 💾</li>"""
+                if gpu['name'] in free_by_name:
+                    vram_info += f"<li>Available Memory: {free_by_name[gpu['name']]['vram_free_mb']:.0f}MB 🆓</li>"
+                vram_info += "</ul>"
+
             return {
-                'gpu': gpu_info if gpu_info != "<h3>🎮 GPU Specifications</h3>" else "<p>❌ No GPU detected. AI performance may be significantly limited.</p>",
-                'vram': vram_info if vram_info != "<h3>🧠 VRAM Specifications</h3>" else "<p>❌ Unable to retrieve VRAM specifications.</p>"
+                'gpu': gpu_info if self.static_info['gpus'] else "<p>❌ No GPU detected. AI performance may be significantly limited.</p>",
+                'vram': vram_info if self.static_info['gpus'] else "<p>❌ Unable to retrieve VRAM specifications.</p>"
             }
         except Exception as e:
             app_logger.error(f"Error in getLLMGPUInfo: {str(e)}")
@@ -129,26 +150,60 @@ class SystemInfoDialog(QDialog, Ui_SystemInfoDialog):
             return "❌ Error"
 
     def calculateMaxLLMSize(self):
+        """Estimate model fit from RAM/VRAM, installed models' /api/show facts, num_ctx and f16_kv."""
         try:
-            quantization_bits = 4
-            overhead_factor = 1.5
+            metrics_rows = []
+            parent = self.parent()
+            if parent is not None and hasattr(parent, 'chat_handler'):
+                metrics_rows = parent.chat_handler.db_handler.get_all_generation_metrics()
+            self.fit_thread = FitEstimatorThread(SETTINGS['num_ctx'], SETTINGS['f16_kv'], metrics_rows)
+            self.fit_thread.estimates_ready.connect(self.show_fit_estimates)
+            self.fit_thread.error_occurred.connect(self.show_fit_error)
+            _RUNNING_THREADS.add(self.fit_thread)
+            self.fit_thread.finished.connect(lambda thread=self.fit_thread: _RUNNING_THREADS.discard(thread))
+            self.fit_thread.start()
+        except Exception as e:
+            self.show_fit_error(str(e))
 
-            max_memory_for_parameters_gb = self.total_gpu_vram / 1024 / overhead_factor
-            max_llm_size_billion = round(max_memory_for_parameters_gb / (quantization_bits / 8))
+    def show_fit_estimates(self, estimates, hardware):
+        try:
+            num_ctx, f16_kv = SETTINGS['num_ctx'], SETTINGS['f16_kv']
+            gpu_billion = max_parameters(hardware['vram_available_bytes'] * VRAM_HEADROOM, num_ctx, f16_kv) / 1e9
+            ram_billion = max_parameters(hardware['ram_available_bytes'] + hardware['vram_available_bytes'] * VRAM_HEADROOM, num_ctx, f16_kv) / 1e9
+            kv_label = "f16" if f16_kv else "f32"
+
+            rows = ""
+            for estimate in estimates:
+                params = f"{estimate['parameters'] / 1e9:.1f}B" if estimate['parameters'] else "?"
+                speed = f"{estimate['tokens_per_second']:.1f} tok/s ({estimate['speed_source']})" if estimate['tokens_per_second'] else "–"
+                gpu_share = f" · {estimate['gpu_fraction'] * 100:.0f}% on GPU" if estimate['placement'] == "GPU + CPU" else ""
+                rows += f"""<tr>
+                    <td>{estimate['name']}</td><td>{params}</td><td>{estimate['quantization'] or '?'}</td>
+                    <td>{self.getSize(estimate['weights_bytes'])}</td><td>{self.getSize(estimate['kv_cache_bytes'])}</td>
+                    <td>{self.getSize(estimate['total_bytes'])}</td><td>{estimate['placement']}{gpu_share}</td><td>{speed}</td>
+                </tr>"""
+            if not rows:
+                rows = "<tr><td colspan='8'>❌ No installed models found. Is Ollama running?</td></tr>"
 
             llm_size_info = f"""
             <h2>🚀 Your System's AI Capabilities</h2>
-            <h1 style="color: #2ecc71; font-size: 3.5em;">🧠 {max_llm_size_billion}B Parameters</h1>
-            <div>
-                <h3>📊 What This Means For You</h3>
-                <p>🎉 Fantastic news! Your system has the potential to handle AI models with up to {max_llm_size_billion} billion parameters. That's truly remarkable!</p>
-                <p><strong>💡 Expert Insight:</strong> We've incorporated a buffer in our calculations to ensure optimal performance. Your actual AI capabilities may fluctuate based on your specific hardware configuration and current system load.</p>
-            </div>
+            <h1 style="color: #2ecc71;">🧠 ~{gpu_billion:.0f}B on GPU · ~{ram_billion:.0f}B with system RAM</h1>
+            <p>Assuming {DEFAULT_QUANT} weights, a {num_ctx}-token context and a {kv_label} KV cache.
+            Available now: {self.getSize(hardware['vram_available_bytes'])} VRAM, {self.getSize(hardware['ram_available_bytes'])} RAM.</p>
+            <h3>📊 Installed models ranked by fit and expected speed</h3>
+            <table border="1" cellspacing="0" cellpadding="4">
+                <tr><th>Model</th><th>Params</th><th>Quant</th><th>Weights</th><th>KV cache</th><th>Total</th><th>Runs on</th><th>Speed</th></tr>
+                {rows}
+            </table>
+            <p><strong>💡 Expert Insight:</strong> Measured speeds come from your own generation metrics; other speeds are scaled from them when available, otherwise from typical memory bandwidth.</p>
             """
 
             self.llmSizeContent.setText(llm_size_info)
             self.llmSizeContent.setTextFormat(Qt.RichText)
 
         except Exception as e:
-            app_logger.error(f"Error calculating max LLM size: {str(e)}")
-            self.llmSizeContent.setText(f"<p>❌ Unable to calculate maximum AI model size. Please verify your system configuration.</p>")
\ No newline at end of file
+            self.show_fit_error(str(e))
+
+    def show_fit_error(self, error_message):
+        app_logger.error(f"Error calculating max LLM size: {error_message}")
+        self.llmSizeContent.setText(f"<p>❌ Unable to calculate maximum AI model size. Please verify your system configuration.</p>")